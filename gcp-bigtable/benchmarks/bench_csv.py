@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""Benchmark of the CSV readers of ``writerows``: ``csv.DictReader`` + ``CSVModel`` against ``fastcsv``."""
+
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import fastcsv
+import writerows
+
+
+def scale(src: str, dst: str, repeat: int) -> int:
+    """Write the rows of ``src`` ``repeat`` times into ``dst``.
+
+    Args:
+        src (str): The source CSV file.
+        dst (str): The scaled CSV file.
+        repeat (int): The number of times the CSV rows are repeated.
+
+    Returns:
+        int: The number of rows written.
+    """
+    with open(src, "rb") as src_file:
+        header = src_file.readline()
+        body = src_file.read()
+    if not body.endswith(b"\n"):
+        body += b"\n"
+    with open(dst, "wb") as dst_file:
+        dst_file.write(header)
+        for _ in range(repeat):
+            dst_file.write(body)
+    return body.count(b"\n") * repeat
+
+
+def bench(name: str, func, num_rows: int) -> float:
+    start = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - start
+    assert count == num_rows, (name, count, num_rows)
+    rate = num_rows / elapsed
+    print("{:<28} {:>10} rows {:>10.3f}s {:>12.0f} rows/s".format(name, num_rows, elapsed, rate))
+    return rate
+
+
+def main(src: str, repeat: int) -> None:
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, "scaled.csv")
+        num_rows = scale(src, path, repeat)
+
+        def _models() -> int:
+            return sum(1 for _ in writerows.read_csv_models(path))
+
+        def _mutations() -> int:
+            return sum(1 for model in writerows.read_csv_models(path) for _ in [writerows.gen_row_mutation(model)])
+
+        def _columns() -> int:
+            count = 0
+            for chunk in fastcsv.read_chunks(path):
+                chunk.timestamps("created_ts")
+                for name in ("h", "a", "d", "k", "ov", "ud"):
+                    chunk.numbers(name)
+                count += len(chunk)
+            return count
+
+        def _fast_mutations() -> int:
+            return sum(1 for chunk in fastcsv.read_chunks(path) for _ in writerows.gen_chunk_mutations(chunk))
+
+        models = bench("DictReader + CSVModel", _models, num_rows)
+        legacy = bench("  + gen_row_mutation", _mutations, num_rows)
+        columns = bench("fastcsv columns + numbers", _columns, num_rows)
+        fast = bench("  gen_chunk_mutations", _fast_mutations, num_rows)
+        print("Speedup of parsing: {:.1f}x".format(columns / models))
+        print("Speedup of the mutations: {:.1f}x".format(fast / legacy))
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument(
+        "--src",
+        type=str,
+        help="CSV-formated file as the data source.",
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "input_data.csv"))
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        help="Number of times the CSV rows are repeated.",
+        default=20)
+
+    args = parser.parse_args()
+    main(args.src, args.repeat)
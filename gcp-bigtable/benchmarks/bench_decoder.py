@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""Micro-benchmark of the row decoders in ``getrows`` and ``decoder``."""
+
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import cellcodec
+import decoder
+import models
+import writerows
+
+
+def load_rows(src: str, repeat: int) -> list:
+    """Build ``(rowkey, row)`` pairs as returned by ``happybase`` from the CSV file.
+
+    Args:
+        src (str): The source CSV file.
+        repeat (int): The number of times the CSV rows are repeated.
+
+    Returns:
+        list: The list of ``(rowkey, row)`` pairs.
+    """
+    rows = []
+    for csv_model in writerows.read_csv_models(src):
+        rowkey, data = writerows.gen_row_mutation(csv_model)
+        rows.append((rowkey.encode("utf-8"), data))
+    return rows * repeat
+
+
+def legacy_transform(rowkey: str, row: dict, sep: str) -> models.RowModelOdd:
+    """The per-row pydantic decoding as done by ``getrows`` before ``decoder`` existed."""
+    keys = ["sid", "lid", "mid", "mkt", "seq", "per", "vendor", "ts"]
+    row_dict = dict(zip(keys, rowkey.split(sep)))
+    row_dict["info"] = {}
+    row_dict["odds"] = {}
+    row_model = models.RowModelOdd(**row_dict)
+    info_dict = {}
+    for col in ["s", "per", "et"]:
+        info_dict[col] = row[":".join(["info", col]).encode("utf-8")]
+    row_model.info = models.OddInfoModel(**info_dict)
+    mkt = row_model.mkt
+    if mkt.startswith("1x2"):
+        cols, model = ["h", "a", "d"], models.ColumnModel1x2
+    elif mkt.startswith("ah"):
+        cols, model = ["k", "h", "a"], models.ColumnModelAH
+    else:
+        cols, model = ["k", "ovr", "und"], models.ColumnModelOU
+    row_model.odds = model(**{
+        col: row[":".join(["odds", col]).encode("utf-8")] for col in cols})
+    return row_model
+
+
+def bench(name: str, func, rows: list) -> float:
+    start = time.perf_counter()
+    for key, row in rows:
+        func(key, row)
+    elapsed = time.perf_counter() - start
+    rate = len(rows) / elapsed
+    print("{:<20} {:>10} rows {:>10.3f}s {:>12.0f} rows/s".format(name, len(rows), elapsed, rate))
+    return rate
+
+
+def main(src: str, repeat: int) -> None:
+    rows = load_rows(src, repeat)
+    legacy = bench("legacy pydantic", lambda k, r: legacy_transform(k.decode("utf-8"), r, ":"), rows)
+    bench("decoder + model", lambda k, r: decoder.decode_row(k, r, ":").to_model(), rows)
+    fast = bench("decoder (fast)", lambda k, r: decoder.decode_row(k, r, ":"), rows)
+    packed_rows = [(key, cellcodec.pack_columns(row)) for key, row in rows]
+    packed = bench("packed (fast)", lambda k, r: decoder.decode_row(k, r, ":"), packed_rows)
+    print("Speedup of the fast path: {:.1f}x".format(fast / legacy))
+    print("Speedup of the packed cells: {:.1f}x".format(packed / legacy))
+
+    def _size(data: list) -> int:
+        return sum(len(k) + len(c) + len(v) for k, row in data for c, v in row.items())
+
+    def _cells(data: list) -> int:
+        return sum(len(row) for _, row in data)
+
+    print("Cells: {} -> {}, bytes: {} -> {}".format(
+        _cells(rows), _cells(packed_rows), _size(rows), _size(packed_rows)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument(
+        "--src",
+        type=str,
+        help="CSV-formated file as the data source.",
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "input_data.csv"))
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        help="Number of times the CSV rows are repeated.",
+        default=5)
+
+    args = parser.parse_args()
+    main(args.src, args.repeat)
@@ -0,0 +1,282 @@
+#!/usr/bin/env python
+"""Offline benchmark of the write, multi-get and scan paths against ``memtable.MemoryTable``.
+
+Every path is run several times. The throughput and p99 latency of every
+pass are expressed relative to a fixed pure-Python reference workload
+timed right before it, i.e., in rows per reference run and in reference
+runs, so that they depend on the code far more than on the speed of the
+machine, and their median across the passes is kept.
+
+The relative results are compared with the baseline stored in
+``baseline.json``: a throughput lower, or a p99 latency higher, than the
+baseline by more than the respective tolerance is reported as a
+regression and fails the run.
+"""
+
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import fastcsv
+import getrows
+import numpy as np
+import writerows
+from memtable import MemoryTable
+
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def load_mutations(src: str, scale: int) -> list:
+    """Build the row mutations of ``src`` cloned into ``scale`` matches.
+
+    Args:
+        src (str): The source CSV file.
+        scale (int): The number of matches, the first being the original one.
+
+    Returns:
+        list: The ``(rowkey, data)`` pairs.
+    """
+    base = [m for chunk in fastcsv.read_chunks(src) for _, m in writerows.gen_chunk_mutations(chunk)]
+    mutations = []
+    for k in range(scale):
+        mid = ":{}:".format(7654321 + k)
+        mutations.extend((rowkey.replace(":7654321:", mid, 1), data) for rowkey, data in base)
+    return mutations
+
+
+def reference_workload() -> int:
+    """Run the fixed pure-Python workload the results are expressed relative to.
+
+    The workload formats, splits and parses row keys and values, and builds
+    and sorts a mapping of rows, as the benchmarked paths mostly do.
+
+    Returns:
+        int: The number of rows built.
+    """
+    rows = {}
+    for i in range(5000):
+        rowkey = "1:213:{}:1x2:{}:pre:vendor{}:{}".format(7654321 + i % 97, i % 13, i % 7, 1595912893 + i)
+        fields = rowkey.split(":")
+        odds = 1.0 + (i % 300) / 100
+        rows[rowkey.encode("utf-8")] = {
+            b"info:per": fields[5].encode("utf-8"),
+            b"odds:h": repr(odds).encode("utf-8"),
+            b"odds:a": repr(float(fields[4]) + odds).encode("utf-8"),
+        }
+    return len(sorted(rows))
+
+
+def _time_reference(runs: int = 3) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        reference_workload()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure(name: str, ops, func, repeat: int) -> dict:
+    """Run ``func`` on every operation ``repeat`` times and summarize the passes.
+
+    The reference workload is timed right before every pass, so that the
+    relative results of a pass are not skewed by the machine slowing down,
+    or speeding up, between the two. The median of the relative results
+    across the passes is kept, so that neither a lucky nor an unlucky pass
+    sets the baseline.
+
+    Args:
+        name (str): The name of the path.
+        ops (list): The arguments of every operation.
+        func: The operation, returning the number of rows it processed.
+        repeat (int): The number of passes over ``ops``.
+
+    Returns:
+        dict: The number of operations and rows, the highest rows per second and lowest p50 and p99 latency
+        in milliseconds across the passes, and the median throughput and p99 latency relative to the
+        reference workload, i.e., ``rows_per_ref`` rows per reference run and a p99 of ``p99_refs`` reference runs.
+    """
+    passes = []
+    for _ in range(repeat):
+        reference = _time_reference()
+        latencies = []
+        rows = 0
+        start = time.perf_counter()
+        for op in ops:
+            op_start = time.perf_counter()
+            rows += func(op)
+            latencies.append(time.perf_counter() - op_start)
+        elapsed = time.perf_counter() - start
+        p50, p99 = np.percentile(latencies, [50, 99])
+        passes.append((rows / elapsed, p50, p99, rows / elapsed * reference, p99 / reference))
+    best = np.max(passes, axis=0)
+    least = np.min(passes, axis=0)
+    median = np.median(passes, axis=0)
+    result = {
+        "ops": len(ops), "rows": rows, "rows_per_s": best[0], "p50_ms": least[1] * 1000,
+        "p99_ms": least[2] * 1000, "rows_per_ref": median[3], "p99_refs": median[4]}
+    print("{:<12} {:>6} ops {:>9} rows {:>12.0f} rows/s  p50 {:>8.3f}ms  p99 {:>8.3f}ms"
+          "  {:>9.1f} rows/ref  p99 {:>6.3f} refs".format(
+              name, len(ops), rows, result["rows_per_s"], result["p50_ms"], result["p99_ms"],
+              result["rows_per_ref"], result["p99_refs"]))
+    return result
+
+
+def run(src: str, scale: int, latency: float, seed: int, repeat: int = 5) -> dict:
+    """Run the benchmark suite.
+
+    Args:
+        src (str): The source CSV file.
+        scale (int): The number of matches the source rows are cloned into.
+        latency (float): The number of seconds injected per RPC.
+        seed (int): The seed of the random operations.
+        repeat (int): The number of passes per path.
+
+    Returns:
+        dict: The results per path.
+    """
+    rng = random.Random(seed)
+    mutations = load_mutations(src, scale)
+    table = MemoryTable(latency=latency)
+    batch_size = 500
+    batches = [mutations[i:i + batch_size] for i in range(0, len(mutations), batch_size)]
+    results = {}
+    results["write"] = measure(
+        "write", batches, lambda batch: writerows.write_mutations(table, batch, batch_size)[0], repeat)
+
+    rowkeys = sorted({rowkey for rowkey, _ in mutations})
+    gets = [rng.sample(rowkeys, 100) for _ in range(200)]
+    results["multi_get"] = measure(
+        "multi-get", gets, lambda keys: len(getrows.get_rowkeys(table, keys, ":", max_workers=1)), repeat)
+    results["multi_get_fast"] = measure(
+        "  fast", gets, lambda keys: len(getrows.get_rowkeys(table, keys, ":", max_workers=1, fast=True)), repeat)
+
+    starts = [rng.randrange(len(rowkeys) - 200) for _ in range(200)]
+    results["scan"] = measure(
+        "scan", starts,
+        lambda i: len(getrows.scan_rows_range(table, rowkeys[i], rowkeys[i + 200], ":")), repeat)
+    results["scan_fast"] = measure(
+        "  fast", starts,
+        lambda i: sum(1 for _ in getrows.iter_rows_range(table, rowkeys[i], rowkeys[i + 200], ":", fast=True)),
+        repeat)
+
+    raw = list(table.scan(row_stop=rowkeys[min(len(rowkeys) - 1, 20000)]))
+    groups = [raw[i:i + 1000] for i in range(0, len(raw), 1000)]
+    results["transform"] = measure(
+        "transform", groups,
+        lambda group: len([getrows._transform_row_model(key, row, ":") for key, row in group]), repeat)
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float, latency_tolerance: float) -> list:
+    """Compare the results relative to the reference workload with a baseline.
+
+    Args:
+        results (dict): The results per path.
+        baseline (dict): The baseline results per path.
+        tolerance (float): The relative degradation of the throughput tolerated.
+        latency_tolerance (float): The relative degradation of the p99 latency tolerated.
+
+    Returns:
+        list: The descriptions of the regressions.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None or "rows_per_ref" not in base:
+            continue
+        if result["rows_per_ref"] < base["rows_per_ref"] * (1 - tolerance):
+            regressions.append("{}: {:.1f} rows/ref, baseline {:.1f} rows/ref".format(
+                name, result["rows_per_ref"], base["rows_per_ref"]))
+        if result["p99_refs"] > base["p99_refs"] * (1 + latency_tolerance):
+            regressions.append("{}: p99 {:.3f} refs, baseline {:.3f} refs".format(
+                name, result["p99_refs"], base["p99_refs"]))
+    return regressions
+
+
+def main(src: str, scale: int, latency: float, seed: int, baseline_path: str,
+         save: bool, tolerance: float, latency_tolerance: float, repeat: int) -> int:
+    # The relative results still differ across interpreters, whose baselines are not compared.
+    config = {"scale": scale, "latency": latency, "seed": seed,
+              "python": "{}.{}".format(*platform.python_version_tuple()[:2])}
+    results = run(src, scale, latency, seed, repeat)
+    if save:
+        with open(baseline_path, "w") as baseline_file:
+            json.dump({"config": config, "results": results}, baseline_file, indent=2, sort_keys=True)
+        print("Saved the baseline to {}".format(baseline_path))
+        return 0
+    if not os.path.exists(baseline_path):
+        print("No baseline at {}, run with --save-baseline first".format(baseline_path))
+        return 0
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)
+    if baseline["config"] != config:
+        print("The baseline was recorded with {}, not compared".format(baseline["config"]))
+        return 0
+    regressions = compare(results, baseline["results"], tolerance, latency_tolerance)
+    for regression in regressions:
+        print("REGRESSION {}".format(regression))
+    if not regressions:
+        print("No regression against the baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--src",
+        type=str,
+        help="CSV-formated file as the data source.",
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "input_data.csv"))
+    parser.add_argument(
+        "--scale",
+        type=int,
+        help="Number of matches the source rows are cloned into.",
+        default=10)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        help="Number of seconds injected per RPC.",
+        default=0.0)
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="Seed of the random operations.",
+        default=0)
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        help="Number of passes per path.",
+        default=5)
+    parser.add_argument(
+        "--baseline",
+        type=str,
+        help="Baseline file.",
+        default=BASELINE)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Store the results as the baseline instead of comparing them.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        help="Relative degradation of the throughput tolerated.",
+        default=0.25)
+    parser.add_argument(
+        "--latency-tolerance",
+        type=float,
+        help="Relative degradation of the p99 latency tolerated.",
+        default=1.0)
+
+    args = parser.parse_args()
+    sys.exit(main(args.src, args.scale, args.latency, args.seed, args.baseline,
+                  args.save_baseline, args.tolerance, args.latency_tolerance, args.repeat))
@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+
+
+import asyncio
+import getrows
+import models
+from google.cloud.bigtable.data import BigtableDataClientAsync
+from google.cloud.bigtable.data import ReadRowsQuery
+from google.cloud.bigtable.data import RowRange
+from google.cloud.bigtable.data.row_filters import CellsColumnLimitFilter
+from google.cloud.bigtable.data.row_filters import ColumnQualifierRegexFilter
+from google.cloud.bigtable.data.row_filters import FamilyNameRegexFilter
+from google.cloud.bigtable.data.row_filters import RowFilter
+from google.cloud.bigtable.data.row_filters import RowFilterChain
+from google.cloud.bigtable.data.row_filters import RowFilterUnion
+from typing import AsyncIterator, Awaitable, Iterable, List, Optional, Tuple, TypeVar, Union
+
+
+T = TypeVar("T")
+
+
+def to_row_dict(row) -> dict:
+    """Convert a row of the data API into a row as returned by ``happybase``.
+
+    Args:
+        row (google.cloud.bigtable.data.Row): The row read through the data API.
+
+    Returns:
+        dict: The mapping from ``b"family:qualifier"`` to the value of the latest cell of every column.
+    """
+    data: dict = {}
+    # The cells of a column come newest first.
+    for cell in row.cells:
+        qualifier = cell.qualifier if isinstance(cell.qualifier, bytes) else cell.qualifier.encode("utf-8")
+        data.setdefault(cell.family.encode("utf-8") + b":" + qualifier, cell.value)
+    return data
+
+
+def columns_filter(columns: Optional[Iterable[str]] = None) -> RowFilter:
+    """Build the row filter reading the latest cell of the given columns.
+
+    Args:
+        columns (Iterable[str], optional): The column families, e.g., ``"odds"``, or columns, e.g.,
+            ``"info:s"``. All the columns if not given.
+
+    Returns:
+        RowFilter: The row filter, as applied by ``happybase`` to ``columns``.
+    """
+    latest = CellsColumnLimitFilter(1)
+    if not columns:
+        return latest
+    selections: List[RowFilter] = []
+    for column in columns:
+        family, _, qualifier = column.partition(":")
+        selection: RowFilter = FamilyNameRegexFilter(family)
+        if qualifier:
+            selection = RowFilterChain(filters=[selection, ColumnQualifierRegexFilter(qualifier.encode("utf-8"))])
+        selections.append(selection)
+    selection = selections[0] if len(selections) == 1 else RowFilterUnion(filters=selections)
+    return RowFilterChain(filters=[selection, latest])
+
+
+async def gather(awaitables: Iterable[Awaitable[T]]) -> List[T]:
+    """Await concurrently, cancelling the awaitables left once one fails or the caller is cancelled.
+
+    Args:
+        awaitables (Iterable[Awaitable[T]]): The awaitables.
+
+    Returns:
+        List[T]: The results, in the order of ``awaitables``.
+    """
+    tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+class AsyncTable(object):
+    """An asyncio table reading rows as returned by ``happybase``.
+
+    At most ``max_in_flight`` requests are in flight at once across all the
+    callers; the others wait for a slot without holding a thread. A scan
+    holds its slot until it is exhausted or closed.
+
+    Args:
+        table (google.cloud.bigtable.data.TableAsync): The table of the data API.
+        max_in_flight (int): The maximum number of concurrent requests.
+        client (BigtableDataClientAsync, optional): The client of ``table``, closed by :meth:`close` if given.
+    """
+
+    def __init__(self, table, max_in_flight: int = 64, client: Optional[BigtableDataClientAsync] = None):
+        self.table = table
+        self.max_in_flight = max_in_flight
+        self._client = client
+        self._slots = asyncio.Semaphore(max_in_flight)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def rows(self, rowkeys: List[Union[str, bytes]],
+                   columns: Optional[Iterable[str]] = None) -> List[Tuple[bytes, dict]]:
+        """Read the given rows by means of a single request, none if ``rowkeys`` is empty.
+
+        Args:
+            rowkeys (List[Union[str, bytes]]): The row keys.
+            columns (Iterable[str], optional): The columns or column families to read.
+
+        Returns:
+            List[Tuple[bytes, dict]]: The pairs of row key and columns of the rows found, in row key order.
+        """
+        if not rowkeys:
+            # A query without row keys nor ranges reads the whole table.
+            return []
+        query = ReadRowsQuery(row_keys=[getrows._to_bytes(key) for key in rowkeys],
+                              row_filter=columns_filter(columns))
+        async with self._slots:
+            rows = await self.table.read_rows(query)
+        return [(row.row_key, to_row_dict(row)) for row in rows]
+
+    async def scan(self, start: Union[str, bytes] = b"", stop: Union[str, bytes] = b"",
+                   columns: Optional[Iterable[str]] = None,
+                   limit: Optional[int] = None) -> AsyncIterator[Tuple[bytes, dict]]:
+        """Scan a row key range.
+
+        Breaking out of the iteration, or cancelling the task consuming it,
+        cancels the request.
+
+        Args:
+            start (Union[str, bytes]): The first row key of the range, inclusive.
+            stop (Union[str, bytes]): The row key ending the range, exclusive. The end of the table if empty.
+            columns (Iterable[str], optional): The columns or column families to read.
+            limit (int, optional): The maximum number of rows.
+
+        Yields:
+            Tuple[bytes, dict]: The pairs of row key and columns, in row key order.
+        """
+        query = ReadRowsQuery(
+            row_ranges=RowRange(getrows._to_bytes(start) or None, getrows._to_bytes(stop) or None),
+            limit=limit, row_filter=columns_filter(columns))
+        async with self._slots:
+            stream = await self.table.read_rows_stream(query)
+            try:
+                async for row in stream:
+                    yield row.row_key, to_row_dict(row)
+            finally:
+                aclose = getattr(stream, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+
+    async def close(self) -> None:
+        """Close the table, and its client if owned."""
+        await self.table.close()
+        if self._client is not None:
+            await self._client.close()
+
+
+async def open_table(project_id: str, instance_id: str, table_name: str,
+                     max_in_flight: int = 64) -> AsyncTable:
+    """Create an asyncio table with its own client, to be closed once done.
+
+    The client is bound to the running event loop, on which the channels
+    are opened and warmed up.
+
+    Args:
+        project_id (str): The project ID on GCP.
+        instance_id (str): The Bigtable instance ID on GCP.
+        table_name (str): The target table name in Bigtable on GCP.
+        max_in_flight (int): The maximum number of concurrent requests.
+
+    Returns:
+        AsyncTable: The table.
+    """
+    client = BigtableDataClientAsync(project=project_id)
+    return AsyncTable(client.get_table(instance_id, table_name), max_in_flight, client)
+
+
+async def get_rows(
+    table: AsyncTable,
+    rowkeys: List[str],
+    sep: str = ":",
+    chunk_size: int = 100,
+    missing: Optional[List[str]] = None,
+    fast: bool = False,
+) -> List[models.RowModelOdd]:
+    """Get rows by row keys, as :func:`getrows.get_rowkeys` does.
+
+    The row keys are split into chunks of ``chunk_size`` keys, each of
+    which is read by one request, and all the chunks are requested at once
+    within the in-flight limit of ``table``. If a request fails, or the
+    caller is cancelled, the requests left are cancelled.
+
+    Args:
+        table (AsyncTable): The table to be queried.
+        rowkeys (List[str]): The row keys.
+        sep (str): The delimiter in the given row keys.
+        chunk_size (int): The maximum number of row keys per request.
+        missing (List[str], optional): If given, the row keys not found are appended to it.
+        fast (bool): Return unvalidated ``decoder.OddRow`` objects instead of ``RowModelOdd``.
+
+    Returns:
+        List[models.RowModelOdd]: The rows found, in the order of ``rowkeys``.
+    """
+    chunks = [rowkeys[i:i + chunk_size] for i in range(0, len(rowkeys), chunk_size)]
+    found: dict = {}
+    for result in await gather(table.rows(chunk) for chunk in chunks):
+        found.update(result)
+
+    row_model = []
+    for rowkey in rowkeys:
+        row = found.get(rowkey.encode("utf-8"))
+        if not row:
+            if missing is not None:
+                missing.append(rowkey)
+            continue
+        row_model.append(getrows._decode(rowkey, row, sep, fast))
+    return row_model
+
+
+async def scan_rows(
+    table: AsyncTable,
+    start: str,
+    stop: str,
+    sep: str,
+    limit: Optional[int] = None,
+    columns: Optional[List[str]] = None,
+    fast: bool = False,
+) -> AsyncIterator[models.RowModelOdd]:
+    """Scan a row key range lazily, as :func:`getrows.iter_rows_range` does.
+
+    Args:
+        table (AsyncTable): The table to be scanned.
+        start (str): A row key indicates the start of a row key range to scan.
+        stop (str): A row key indicates the stop of a row key range to scan.
+        sep (str): The delimiter in the given row keys.
+        limit (int, optional): The maximum number of rows to return.
+        columns (List[str], optional): The columns or column families to retrieve, e.g., ``["odds"]``.
+        fast (bool): Yield unvalidated ``decoder.OddRow`` objects instead of ``RowModelOdd``.
+
+    Yields:
+        models.RowModelOdd: The scanning results.
+    """
+    rows = table.scan(start, stop, columns, limit)
+    try:
+        async for key, row in rows:
+            yield getrows._decode(key, row, sep, fast)
+    finally:
+        await rows.aclose()
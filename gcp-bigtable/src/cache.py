@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+
+
+class CacheStats(NamedTuple):
+    """Counters of a :class:`RowCache`.
+
+    Attributes:
+        hits (int): The number of lookups answered by the cache.
+        misses (int): The number of lookups not answered by the cache.
+        evictions (int): The number of entries evicted to respect the size bound.
+        expirations (int): The number of entries dropped because their TTL elapsed.
+        invalidations (int): The number of entries dropped by invalidation.
+        size (int): The number of entries currently cached.
+    """
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    invalidations: int
+    size: int
+
+
+class RowCache(object):
+    """A thread-safe and size-bounded LRU cache of rows with per-entry TTL.
+
+    Missing rows are cached as empty rows, i.e., ``{}``, for
+    ``negative_ttl`` seconds so that lookups of absent keys are not sent to
+    Bigtable repeatedly.
+
+    Args:
+        maxsize (int): The maximum number of cached rows.
+        ttl (float): The number of seconds a row is cached.
+        negative_ttl (float, optional): The number of seconds a missing row is cached. Defaults to ``ttl``.
+        clock (Callable[[], float]): The monotonic clock used for expiration.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10000,
+        ttl: float = 1.0,
+        negative_ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def get(self, key: bytes) -> Optional[dict]:
+        """Get the cached row of ``key``.
+
+        Args:
+            key (bytes): The row key.
+
+        Returns:
+            Optional[dict]: The cached row, ``{}`` if the row is cached as missing, or ``None`` on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > self._clock():
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self._expirations += 1
+            self._misses += 1
+            return None
+
+    def put(self, key: bytes, row: dict) -> None:
+        """Cache the ``row`` of ``key``. An empty ``row`` caches the key as missing.
+
+        Args:
+            key (bytes): The row key.
+            row (dict): The row as returned by ``happybase``.
+        """
+        ttl = self.ttl if row else self.negative_ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + ttl, row)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, keys: Iterable[bytes]) -> None:
+        """Drop the cached rows of ``keys``.
+
+        Args:
+            keys (Iterable[bytes]): The row keys.
+        """
+        with self._lock:
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self._invalidations += 1
+
+    def clear(self) -> None:
+        """Drop all the cached rows."""
+        with self._lock:
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        """Get the counters of this cache.
+
+        Returns:
+            CacheStats: The counters.
+        """
+        with self._lock:
+            return CacheStats(
+                self._hits, self._misses, self._evictions,
+                self._expirations, self._invalidations, len(self._entries))
+
+
+def _to_bytes(key: Union[str, bytes]) -> bytes:
+    return key.encode("utf-8") if isinstance(key, str) else key
+
+
+class _InvalidatingBatch(object):
+    def __init__(self, batch, cache: RowCache):
+        self._batch = batch
+        self._cache = cache
+        self._keys: Set[bytes] = set()
+
+    def __getattr__(self, name):
+        return getattr(self._batch, name)
+
+    def __enter__(self):
+        self._batch.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            return self._batch.__exit__(*exc_info)
+        finally:
+            self._invalidate()
+
+    def _invalidate(self):
+        # Only once the mutations are sent, lest a concurrent read caches the row again before they land.
+        keys, self._keys = self._keys, set()
+        self._cache.invalidate(keys)
+
+    def put(self, row, data, *args, **kwargs):
+        self._keys.add(_to_bytes(row))
+        return self._batch.put(row, data, *args, **kwargs)
+
+    def delete(self, row, *args, **kwargs):
+        self._keys.add(_to_bytes(row))
+        return self._batch.delete(row, *args, **kwargs)
+
+    def send(self):
+        try:
+            return self._batch.send()
+        finally:
+            self._invalidate()
+
+
+class CachedTable(object):
+    """A read-through cache around a ``happybase.Table``.
+
+    ``row`` and ``rows`` are answered from the ``cache`` when possible, and
+    only the keys missed are fetched from the wrapped table. Writes through
+    ``put``, ``delete`` and ``batch`` invalidate the written keys once the
+    mutations are sent, so that a row read while its write is in flight is
+    not left cached. Any other attribute is delegated to the wrapped table.
+
+    Args:
+        table (happybase.Table): The wrapped table instance.
+        cache (RowCache): The cache of the rows.
+
+    Attributes:
+        table (happybase.Table): The wrapped table instance.
+        cache (RowCache): The cache of the rows.
+    """
+
+    def __init__(self, table, cache: RowCache):
+        self.table = table
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self.table, name)
+
+    def row(self, row: Union[str, bytes], columns=None, *args, **kwargs) -> dict:
+        """Get a single row, reading through the cache when no column projection is given."""
+        if columns is not None or args or kwargs:
+            return self.table.row(row, columns, *args, **kwargs)
+        key = _to_bytes(row)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        result = self.table.row(key)
+        self.cache.put(key, result)
+        return result
+
+    def rows(self, rows: List[Union[str, bytes]], columns=None, *args, **kwargs) -> List[Tuple[bytes, dict]]:
+        """Get multiple rows, fetching only the keys missed by the cache in one call."""
+        if columns is not None or args or kwargs:
+            return self.table.rows(rows, columns, *args, **kwargs)
+        keys = [_to_bytes(row) for row in rows]
+        found: Dict[bytes, dict] = {}
+        missed: List[bytes] = []
+        for key in keys:
+            cached = self.cache.get(key)
+            if cached is None:
+                missed.append(key)
+            elif cached:
+                found[key] = cached
+        if missed:
+            fetched = dict(self.table.rows(missed))
+            for key in missed:
+                row = fetched.get(key, {})
+                self.cache.put(key, row)
+                if row:
+                    found[key] = row
+        return [(key, found[key]) for key in keys if key in found]
+
+    def put(self, row, data, *args, **kwargs):
+        """Write a row, then invalidate its cached entry."""
+        try:
+            return self.table.put(row, data, *args, **kwargs)
+        finally:
+            self.cache.invalidate([_to_bytes(row)])
+
+    def delete(self, row, *args, **kwargs):
+        """Delete a row, then invalidate its cached entry."""
+        try:
+            return self.table.delete(row, *args, **kwargs)
+        finally:
+            self.cache.invalidate([_to_bytes(row)])
+
+    def batch(self, *args, **kwargs):
+        """Create a batch which invalidates the cached entries of the rows it writes once they are sent."""
+        return _InvalidatingBatch(self.table.batch(*args, **kwargs), self.cache)
@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+
+
+import functools
+import re
+import struct
+from typing import Dict, Tuple
+
+
+INFO_COLUMN = b"info:p"
+ODDS_COLUMN = b"odds:p"
+
+# The market tags of the packed odds cell and the qualifiers they store, in
+# order. This table is part of the storage format and must only be appended to.
+MARKET_QUALIFIERS: Tuple[Tuple[str, ...], ...] = (
+    ("h", "a", "d"),
+    ("k", "h", "a"),
+    ("k", "ovr", "und"),
+)
+_MARKET_TAGS: Dict[frozenset, int] = {
+    frozenset(qualifiers): tag for tag, qualifiers in enumerate(MARKET_QUALIFIERS)
+}
+
+# Every value is stored in slots of a flags byte and a float32. The low bits
+# of the flags hold the number of decimals the value was written with, so
+# that the original string is restored exactly.
+_SLOT = struct.Struct("<Bf")
+_TAG = struct.Struct("<B")
+_DECIMALS = 0x07
+_PLUS = 0x08
+_MINUS = 0x10
+_EMPTY = 0x20
+_QUARTER = 0x40
+_MAX_DECIMALS = 6
+
+_NUMBER = re.compile(r"([+-]?)(\d+(?:\.\d+)?)(?:/(\d+(?:\.\d+)?))?")
+
+
+class PackError(ValueError):
+    """Raised when values cannot be represented in the packed format."""
+
+
+def _decimals(text: str) -> int:
+    point = text.find(".")
+    return 0 if point < 0 else len(text) - point - 1
+
+
+def _pack_value(value: str, quarter: bool) -> bytes:
+    if not value:
+        return _SLOT.pack(_EMPTY, 0.0) * (2 if quarter else 1)
+    match = _NUMBER.fullmatch(value)
+    if match is None or (match.group(3) is not None and not quarter):
+        raise PackError("Not a packable odds value: {!r}".format(value))
+    sign, first, second = match.groups()
+    flags = {"": 0, "+": _PLUS, "-": _MINUS}[sign]
+    slots = []
+    for part in (first, second) if quarter else (first,):
+        if part is None:
+            slots.append(_SLOT.pack(_EMPTY, 0.0))
+            continue
+        decimals = _decimals(part)
+        if decimals > _MAX_DECIMALS or len(part) - (1 if decimals else 0) > 7:
+            # Beyond the precision of float32.
+            raise PackError("Not a packable odds value: {!r}".format(value))
+        slots.append(_SLOT.pack(flags | decimals, float(part)))
+    if second is not None:
+        slots[0] = _SLOT.pack(flags | _QUARTER | _decimals(first), float(first))
+    return b"".join(slots)
+
+
+def _unpack_value(data: bytes, offset: int, quarter: bool) -> str:
+    flags, number = _SLOT.unpack_from(data, offset)
+    if flags & _EMPTY:
+        return ""
+    sign = "+" if flags & _PLUS else "-" if flags & _MINUS else ""
+    text = "{}{:.{}f}".format(sign, number, flags & _DECIMALS)
+    if quarter and flags & _QUARTER:
+        flags, number = _SLOT.unpack_from(data, offset + _SLOT.size)
+        text += "/{:.{}f}".format(number, flags & _DECIMALS)
+    return text
+
+
+def pack_odds(odds: Dict[str, str]) -> bytes:
+    """Pack the odds of a row into a single cell.
+
+    The cell starts with the market tag, followed by one fixed-width slot per
+    qualifier of the market in :data:`MARKET_QUALIFIERS` order. The handicap
+    ``k`` always takes two slots so that quarter lines such as ``4.5/5`` fit.
+
+    Args:
+        odds (Dict[str, str]): The mapping from the odds qualifiers to their values.
+
+    Returns:
+        bytes: The packed cell.
+
+    Raises:
+        PackError: If the qualifiers match no market or a value is not a plain number.
+    """
+    tag = _MARKET_TAGS.get(frozenset(odds))
+    if tag is None:
+        raise PackError("Unknown odds qualifiers: {}".format(sorted(odds)))
+    return _TAG.pack(tag) + b"".join(
+        _pack_value(odds[col], col == "k") for col in MARKET_QUALIFIERS[tag])
+
+
+# Cells repeat a lot across the rows of a series, so that unpacking is cached.
+@functools.lru_cache(maxsize=65536)
+def unpack_odds(data: bytes) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Unpack a cell packed by :func:`pack_odds`.
+
+    Args:
+        data (bytes): The packed cell.
+
+    Returns:
+        Tuple[Tuple[str, ...], Tuple[str, ...]]: The qualifiers of the market and their values.
+    """
+    qualifiers = MARKET_QUALIFIERS[data[0]]
+    offset = _TAG.size
+    values = []
+    for col in qualifiers:
+        quarter = col == "k"
+        values.append(_unpack_value(data, offset, quarter))
+        offset += _SLOT.size * (2 if quarter else 1)
+    return qualifiers, tuple(values)
+
+
+@functools.lru_cache(maxsize=65536)
+def unpack_odds_floats(data: bytes) -> Tuple[Tuple[str, ...], Tuple[float, ...]]:
+    """Unpack a cell packed by :func:`pack_odds` directly into numbers.
+
+    Quarter lines are averaged and empty values are ``NaN``, as in
+    :func:`columnar.parse_odds_value`.
+
+    Args:
+        data (bytes): The packed cell.
+
+    Returns:
+        Tuple[Tuple[str, ...], Tuple[float, ...]]: The qualifiers of the market and their values.
+    """
+    qualifiers = MARKET_QUALIFIERS[data[0]]
+    offset = _TAG.size
+    values = []
+    for col in qualifiers:
+        flags, number = _SLOT.unpack_from(data, offset)
+        if flags & _EMPTY:
+            number = float("nan")
+        else:
+            # float32 -> shortest decimal, e.g. 1.5700000524 -> 1.57.
+            number = round(number, flags & _DECIMALS)
+            if col == "k" and flags & _QUARTER:
+                second_flags, second = _SLOT.unpack_from(data, offset + _SLOT.size)
+                number = (number + round(second, second_flags & _DECIMALS)) / 2
+            if flags & _MINUS:
+                number = -number
+        values.append(number)
+        offset += _SLOT.size * (2 if col == "k" else 1)
+    return qualifiers, tuple(values)
+
+
+def pack_info(s: str, per: str, et: str) -> bytes:
+    """Pack the information of a row into a single cell of length-prefixed strings.
+
+    Args:
+        s (str): The score.
+        per (str): The period.
+        et (str): The elapsed time.
+
+    Returns:
+        bytes: The packed cell.
+    """
+    fields = [value.encode("utf-8") for value in (s, per, et)]
+    if any(len(field) > 0xff for field in fields):
+        raise PackError("Information too long to be packed: {}".format(fields))
+    return b"".join(bytes((len(field),)) + field for field in fields)
+
+
+@functools.lru_cache(maxsize=65536)
+def unpack_info(data: bytes) -> Tuple[str, str, str]:
+    """Unpack a cell packed by :func:`pack_info`.
+
+    Args:
+        data (bytes): The packed cell.
+
+    Returns:
+        Tuple[str, str, str]: The score, the period and the elapsed time.
+    """
+    values = []
+    offset = 0
+    for _ in range(3):
+        length = data[offset]
+        values.append(data[offset + 1:offset + 1 + length].decode("utf-8"))
+        offset += 1 + length
+    return values[0], values[1], values[2]
+
+
+def _columns(family: str, values: Dict[str, str]) -> Dict[bytes, bytes]:
+    return {
+        "{}:{}".format(family, qualifier).encode("utf-8"): value.encode("utf-8")
+        for qualifier, value in values.items()
+    }
+
+
+def pack_columns(data: Dict[bytes, bytes]) -> Dict[bytes, bytes]:
+    """Convert a column mapping of storage format v1 into storage format v2.
+
+    The ``odds`` and ``info`` cells are replaced by :data:`ODDS_COLUMN` and
+    :data:`INFO_COLUMN` respectively. Any family which cannot be packed, e.g.,
+    because a value is not a plain number, and any other column, e.g.,
+    ``info:valid``, are kept as they are.
+
+    Args:
+        data (Dict[bytes, bytes]): The mapping from encoded column names to encoded values.
+
+    Returns:
+        Dict[bytes, bytes]: The column mapping in storage format v2.
+    """
+    odds: Dict[str, str] = {}
+    info: Dict[str, str] = {}
+    rest: Dict[bytes, bytes] = {}
+    for column, value in data.items():
+        family, _, qualifier = column.partition(b":")
+        if family == b"odds":
+            odds[qualifier.decode("utf-8")] = value.decode("utf-8")
+        elif family == b"info" and qualifier in (b"s", b"per", b"et"):
+            info[qualifier.decode("utf-8")] = value.decode("utf-8")
+        else:
+            rest[column] = value
+    packed: Dict[bytes, bytes] = {}
+    try:
+        if len(info) != 3:
+            raise PackError("Incomplete information: {}".format(sorted(info)))
+        packed[INFO_COLUMN] = pack_info(info["s"], info["per"], info["et"])
+    except PackError:
+        packed.update(_columns("info", info))
+    if odds:
+        try:
+            packed[ODDS_COLUMN] = pack_odds(odds)
+        except PackError:
+            packed.update(_columns("odds", odds))
+    packed.update(rest)
+    return packed
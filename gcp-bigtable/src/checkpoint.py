@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+
+
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, Optional, Set, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+
+def state_path(src: str, directory: Optional[str] = None) -> str:
+    """Get the path of the state file of a source file.
+
+    Args:
+        src (str): The source file.
+        directory (str, optional): The directory of the state files. Defaults to the directory of ``src``.
+
+    Returns:
+        str: The path of the state file, i.e., ``<src>.checkpoint``.
+    """
+    name = os.path.basename(src) + ".checkpoint"
+    return os.path.join(directory if directory is not None else os.path.dirname(src), name)
+
+
+class Checkpoint(object):
+    """Track the position in a source file up to which the rows are durably written.
+
+    The reader stage reports the position after every row through
+    :meth:`track`. A writer calls :meth:`seal` when a batch is complete,
+    which records the position of the last row read, and :meth:`confirm`
+    once the batch is written. The batches may be confirmed in any order,
+    e.g., by parallel writers; the durable position only advances over
+    batches confirmed without a gap. It is persisted at most every
+    ``interval`` seconds and by :meth:`save`.
+
+    Args:
+        path (str): The state file.
+        src (str): The source file.
+        interval (float): The minimal number of seconds between two saves.
+        clock (Callable[[], float]): The monotonic clock.
+
+    Attributes:
+        offset (int): The byte offset in ``src`` up to which the rows are durably written.
+        rows (int): The number of rows durably written.
+        skipped (int): The number of rows skipped by resuming.
+    """
+
+    def __init__(self, path: str, src: str, interval: float = 5.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.path = path
+        self.src = src
+        self.interval = interval
+        self._clock = clock
+        self.offset = 0
+        self.rows = 0
+        self.skipped = 0
+        self._read = (0, 0)
+        self._sealed: Dict[int, Tuple[int, int]] = {}
+        self._done: Set[int] = set()
+        self._next = 0
+        self._low = 0
+        self._lock = threading.Lock()
+        self._saved = clock()
+
+    def load(self) -> int:
+        """Resume from the state file, if any.
+
+        Returns:
+            int: The number of rows skipped.
+
+        Raises:
+            ValueError: The state file belongs to another source file, or the source file shrank.
+        """
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path) as state_file:
+            state = json.load(state_file)
+        if state["src"] != os.path.abspath(self.src):
+            raise ValueError("{} is the checkpoint of {}".format(self.path, state["src"]))
+        if os.path.getsize(self.src) < state["offset"]:
+            raise ValueError("{} is shorter than its checkpoint".format(self.src))
+        self.offset, self.rows = state["offset"], state["rows"]
+        self._read = (self.offset, self.rows)
+        self.skipped = self.rows
+        return self.skipped
+
+    def track(self, rows: Iterable[Tuple[int, T]]) -> Iterator[T]:
+        """Pass the rows read through while recording the position after each.
+
+        Args:
+            rows (Iterable[Tuple[int, T]]): Pairs of the byte offset after a row and the row.
+
+        Yields:
+            T: The rows.
+        """
+        count = self._read[1]
+        for offset, row in rows:
+            count += 1
+            # Recorded before the row is handed over, so that a batch sealed
+            # right after it includes it.
+            self._read = (offset, count)
+            yield row
+
+    def seal(self) -> int:
+        """Record the position of the last row read as the end of a batch.
+
+        Returns:
+            int: The token to confirm the batch with.
+        """
+        with self._lock:
+            token = self._next
+            self._next += 1
+            self._sealed[token] = self._read
+            return token
+
+    def confirm(self, token: int) -> None:
+        """Mark a sealed batch as durably written.
+
+        Args:
+            token (int): The token returned by :meth:`seal`.
+        """
+        with self._lock:
+            self._done.add(token)
+            while self._low in self._done:
+                self._done.remove(self._low)
+                self.offset, self.rows = self._sealed.pop(self._low)
+                self._low += 1
+            due = self._clock() - self._saved >= self.interval
+        if due:
+            self.save()
+
+    def commit(self) -> None:
+        """Mark all the rows read as durably written."""
+        self.confirm(self.seal())
+
+    def save(self) -> None:
+        """Persist the durable position atomically."""
+        with self._lock:
+            state = {"src": os.path.abspath(self.src), "offset": self.offset, "rows": self.rows}
+            self._saved = self._clock()
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as state_file:
+                json.dump(state, state_file)
+            os.replace(tmp, self.path)
@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+
+
+import cellcodec
+import decoder
+import keycodec
+import numpy as np
+from google.cloud import happybase
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+ODDS_QUALIFIERS: Tuple[str, ...] = ("h", "a", "d", "k", "ovr", "und")
+_ODDS_INDEX: Dict[bytes, int] = {
+    "odds:{}".format(col).encode("utf-8"): i for i, col in enumerate(ODDS_QUALIFIERS)
+}
+
+_LATEST_FIRST_TAG = keycodec.LATEST_FIRST.prefix().encode("utf-8")
+
+
+class OddsColumns(NamedTuple):
+    """Scan results in a struct-of-arrays layout.
+
+    The odds columns not applicable to the market of a row, e.g., ``d`` for
+    ``ah``, are ``NaN``. The vendor, market and period are categorical codes
+    indexing into ``vendors``, ``markets`` and ``periods`` respectively.
+
+    Attributes:
+        ts (np.ndarray): The epoch timestamps as ``int64``.
+        seq (np.ndarray): The sequence numbers of the betting lines as ``int32``.
+        vendor (np.ndarray): The vendor codes as ``int32``.
+        mkt (np.ndarray): The market codes as ``int32``.
+        per (np.ndarray): The period codes as ``int32``.
+        h (np.ndarray): The odds of home team to win as ``float64``.
+        a (np.ndarray): The odds of away team to win as ``float64``.
+        d (np.ndarray): The odds of draw as ``float64``.
+        k (np.ndarray): The handicap or total points as ``float64``.
+        ovr (np.ndarray): The odds of over as ``float64``.
+        und (np.ndarray): The odds of under as ``float64``.
+        vendors (Tuple[str, ...]): The vendor categories.
+        markets (Tuple[str, ...]): The market categories.
+        periods (Tuple[str, ...]): The period categories.
+    """
+    ts: np.ndarray
+    seq: np.ndarray
+    vendor: np.ndarray
+    mkt: np.ndarray
+    per: np.ndarray
+    h: np.ndarray
+    a: np.ndarray
+    d: np.ndarray
+    k: np.ndarray
+    ovr: np.ndarray
+    und: np.ndarray
+    vendors: Tuple[str, ...]
+    markets: Tuple[str, ...]
+    periods: Tuple[str, ...]
+
+
+def parse_odds_value(value: bytes) -> float:
+    """Parse an odds value into a float.
+
+    Quarter lines such as ``b"4.5/5"`` are parsed as the average of both
+    lines, and empty values as ``NaN``.
+
+    Args:
+        value (bytes): The encoded odds value.
+
+    Returns:
+        float: The parsed value.
+    """
+    if not value:
+        return float("nan")
+    if b"/" in value:
+        # "-0.5/1" denotes the lines -0.5 and -1, and "-0/0.5" the lines 0 and -0.5.
+        sign = -1.0 if value.startswith(b"-") else 1.0
+        parts = value.lstrip(b"+-").split(b"/")
+        return sign * sum(float(p) for p in parts) / len(parts)
+    return float(value)
+
+
+class ColumnarBuilder(object):
+    """Accumulate rows into growing NumPy arrays.
+
+    The arrays are allocated in chunks of ``chunk_size`` rows, and parsed
+    odds values as well as categories are cached, so that no Python object
+    is kept per row. The packed odds cells of :mod:`cellcodec` are read
+    directly as numbers.
+
+    Args:
+        sep (str): The delimiter used in the row keys.
+        chunk_size (int): The number of rows the arrays grow by.
+    """
+
+    def __init__(self, sep: str = ":", chunk_size: int = 65536):
+        self._sep = sep.encode("utf-8")
+        self._chunk_size = chunk_size
+        self._chunks: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._pos = chunk_size
+        self._ints = np.empty((5, 0), dtype=np.int64)
+        self._odds = np.empty((len(ODDS_QUALIFIERS), 0), dtype=np.float64)
+        self._categories: Tuple[Dict[bytes, int], ...] = ({}, {}, {})
+        self._values: Dict[bytes, float] = {}
+        self._columns: Dict[bytes, List[Tuple[bytes, int]]] = {}
+        self._packed: Dict[bytes, List[Tuple[int, float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._chunks) * self._chunk_size - self._chunk_size + self._pos
+
+    def _grow(self) -> None:
+        # Filled chunks are kept aside and only concatenated once in ``build``.
+        self._ints = np.empty((5, self._chunk_size), dtype=np.int64)
+        self._odds = np.full(
+            (len(ODDS_QUALIFIERS), self._chunk_size), np.nan, dtype=np.float64)
+        self._chunks.append((self._ints, self._odds))
+        self._pos = 0
+
+    def _code(self, field: int, value: bytes) -> int:
+        categories = self._categories[field]
+        code = categories.get(value)
+        if code is None:
+            code = len(categories)
+            categories[value] = code
+        return code
+
+    def _market_columns(self, mkt: bytes) -> List[Tuple[bytes, int]]:
+        columns = self._columns.get(mkt)
+        if columns is None:
+            layout = decoder.market_layout(mkt.decode("utf-8"))
+            columns = [(col, _ODDS_INDEX[col]) for col in layout.columns]
+            self._columns[mkt] = columns
+        return columns
+
+    def _packed_values(self, packed: bytes) -> List[Tuple[int, float]]:
+        values = self._packed.get(packed)
+        if values is None:
+            qualifiers, numbers = cellcodec.unpack_odds_floats(packed)
+            values = [
+                (ODDS_QUALIFIERS.index(col), number)
+                for col, number in zip(qualifiers, numbers)]
+            self._packed[packed] = values
+        return values
+
+    def append(self, rowkey: bytes, row: dict) -> None:
+        """Append a row as returned by ``happybase``.
+
+        Args:
+            rowkey (bytes): The row key.
+            row (dict): The mapping from encoded column names to encoded values.
+        """
+        if self._pos == self._chunk_size:
+            self._grow()
+        i = self._pos
+        if rowkey.startswith(_LATEST_FIRST_TAG):
+            key = keycodec.LATEST_FIRST.decode(rowkey.decode("utf-8"))
+            mkt, seq, per, vendor = (field.encode("utf-8") for field in key[3:7])
+            ts = key.ts
+        else:
+            _, _, _, mkt, seq, per, vendor, ts = rowkey.split(self._sep)
+        ints = self._ints
+        ints[0, i] = int(ts)
+        ints[1, i] = int(seq) if seq else 0
+        ints[2, i] = self._code(0, vendor)
+        ints[3, i] = self._code(1, mkt)
+        ints[4, i] = self._code(2, per)
+        packed = row.get(cellcodec.ODDS_COLUMN)
+        if packed is not None:
+            for index, value in self._packed_values(packed):
+                self._odds[index, i] = value
+            self._pos = i + 1
+            return
+        values = self._values
+        for col, index in self._market_columns(mkt):
+            raw = row.get(col)
+            if raw is None:
+                continue
+            value = values.get(raw)
+            if value is None:
+                value = parse_odds_value(raw)
+                values[raw] = value
+            self._odds[index, i] = value
+        self._pos = i + 1
+
+    def build(self) -> OddsColumns:
+        """Build the struct-of-arrays of the rows appended so far.
+
+        Returns:
+            OddsColumns: The columnar results.
+        """
+        if self._chunks:
+            last = len(self._chunks) - 1
+            ints = np.concatenate(
+                [chunk[0] if i < last else chunk[0][:, :self._pos]
+                 for i, chunk in enumerate(self._chunks)], axis=1)
+            odds = np.concatenate(
+                [chunk[1] if i < last else chunk[1][:, :self._pos]
+                 for i, chunk in enumerate(self._chunks)], axis=1)
+        else:
+            ints = self._ints
+            odds = self._odds
+        labels = tuple(
+            tuple(value.decode("utf-8") for value in categories)
+            for categories in self._categories)
+        return OddsColumns(
+            ts=ints[0],
+            seq=ints[1].astype(np.int32),
+            vendor=ints[2].astype(np.int32),
+            mkt=ints[3].astype(np.int32),
+            per=ints[4].astype(np.int32),
+            h=odds[0],
+            a=odds[1],
+            d=odds[2],
+            k=odds[3],
+            ovr=odds[4],
+            und=odds[5],
+            vendors=labels[0],
+            markets=labels[1],
+            periods=labels[2],
+        )
+
+
+def to_columnar(
+    rows: Iterable[Tuple[bytes, dict]], sep: str = ":", chunk_size: int = 65536
+) -> OddsColumns:
+    """Decode raw ``(rowkey, row)`` pairs into a struct-of-arrays.
+
+    Args:
+        rows (Iterable[Tuple[bytes, dict]]): The rows as returned by ``happybase``.
+        sep (str): The delimiter used in the row keys.
+        chunk_size (int): The number of rows the arrays grow by.
+
+    Returns:
+        OddsColumns: The columnar results.
+    """
+    builder = ColumnarBuilder(sep, chunk_size)
+    for key, row in rows:
+        builder.append(key, row)
+    return builder.build()
+
+
+def scan_columnar(
+    table_instance: happybase.Table,
+    start: str,
+    stop: str,
+    sep: str = ":",
+    limit: Optional[int] = None,
+    chunk_size: int = 65536,
+) -> OddsColumns:
+    """Scan a row key range directly into a struct-of-arrays.
+
+    Only the ``odds`` family is read since the ``info`` columns are not
+    part of the columnar results.
+
+    Args:
+        table_instance(happybase.Table): The table instance to be scanned.
+        start (str): A row key indicates the start of a row key range to scan.
+        stop (str): A row key indicates the stop of a row key range to scan.
+        sep (str): The delimiter in the given row keys.
+        limit (int, optional): The maximum number of rows to return.
+        chunk_size (int): The number of rows the arrays grow by.
+
+    Returns:
+        OddsColumns: The columnar results.
+    """
+    rows = table_instance.scan(row_start=start, row_stop=stop, columns=["odds"], limit=limit)
+    return to_columnar(rows, sep, chunk_size)
+
+
+def save_columnar(columns: OddsColumns, path: str) -> None:
+    """Save columnar results into a NumPy ``.npz`` file, one array per field.
+
+    Args:
+        columns (OddsColumns): The columnar results.
+        path (str): The output file, to be read by ``np.load``.
+    """
+    np.savez(path, **columns._asdict())
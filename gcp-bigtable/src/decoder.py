@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+
+
+import cellcodec
+import keycodec
+import models
+from pydantic import BaseModel
+from typing import Dict, NamedTuple, Optional, Tuple, Type, Union
+
+
+INFO_QUALIFIERS: Tuple[str, ...] = ("s", "per", "et")
+INFO_COLUMNS: Tuple[bytes, ...] = tuple(
+    "info:{}".format(col).encode("utf-8") for col in INFO_QUALIFIERS)
+
+ODDS_1X2_QUALIFIERS: Tuple[str, ...] = ("h", "a", "d")
+ODDS_AH_QUALIFIERS: Tuple[str, ...] = ("k", "h", "a")
+ODDS_OU_QUALIFIERS: Tuple[str, ...] = ("k", "ovr", "und")
+
+
+class MarketLayout(NamedTuple):
+    """The odds columns of a market.
+
+    Attributes:
+        qualifiers (Tuple[str, ...]): The column qualifiers in the ``odds`` family.
+        columns (Tuple[bytes, ...]): The encoded column names, e.g., ``b"odds:h"``.
+        model (Type[BaseModel]): The odds model of the market.
+    """
+    qualifiers: Tuple[str, ...]
+    columns: Tuple[bytes, ...]
+    model: Type[BaseModel]
+
+
+def _layout(qualifiers: Tuple[str, ...], model: Type[BaseModel]) -> MarketLayout:
+    columns = tuple("odds:{}".format(col).encode("utf-8") for col in qualifiers)
+    return MarketLayout(qualifiers, columns, model)
+
+
+LAYOUT_1X2 = _layout(ODDS_1X2_QUALIFIERS, models.ColumnModel1x2)
+LAYOUT_AH = _layout(ODDS_AH_QUALIFIERS, models.ColumnModelAH)
+LAYOUT_OU = _layout(ODDS_OU_QUALIFIERS, models.ColumnModelOU)
+
+_MARKET_LAYOUTS: Dict[str, MarketLayout] = {}
+
+
+def market_layout(market: str) -> MarketLayout:
+    """Get the odds layout of the given ``market``.
+
+    The layout is resolved from the market prefix once and then looked up
+    from a dispatch table.
+
+    Args:
+        market (str): The given market such as `1x2`, `ah`, `ou`, `ah_1st` etc.
+
+    Returns:
+        MarketLayout: The odds layout of the market.
+    """
+    layout = _MARKET_LAYOUTS.get(market)
+    if layout is None:
+        if market.startswith("1x2"):
+            layout = LAYOUT_1X2
+        elif market.startswith("ah"):
+            layout = LAYOUT_AH
+        else:
+            layout = LAYOUT_OU
+        _MARKET_LAYOUTS[market] = layout
+    return layout
+
+
+class OddRow(NamedTuple):
+    """A compact and unvalidated representation of a row in the Bigtable.
+
+    Attributes:
+        sid (str): The ID to identify the category of a sport.
+        lid (str): The ID to identify the league.
+        mid (str): The ID to identify the match.
+        mkt (str): The ID to identify the market.
+        seq (str): The sequence number of the betting line within a market.
+        per (str): The period of the match.
+        vendor (str): The vendor offering this betting line/market.
+        ts (int): The epoch timestamp of the row created.
+        info (Optional[Tuple[Optional[str], ...]]): The values of ``INFO_QUALIFIERS``, or ``None`` if the family is absent.
+        odds (Optional[Tuple[Optional[str], ...]]): The values of the market qualifiers, or ``None`` if the family is absent.
+    """
+    sid: str
+    lid: str
+    mid: str
+    mkt: str
+    seq: str
+    per: str
+    vendor: str
+    ts: int
+    info: Optional[Tuple[Optional[str], ...]]
+    odds: Optional[Tuple[Optional[str], ...]]
+
+    def to_model(self) -> models.RowModelOdd:
+        """Convert this row into a validated ``RowModelOdd``.
+
+        Returns:
+            models.RowModelOdd: The validated data model of this row.
+        """
+        row_model = models.RowModelOdd(
+            sid=self.sid, lid=self.lid, mid=self.mid, mkt=self.mkt, seq=self.seq,
+            per=self.per, vendor=self.vendor, ts=self.ts)
+        if self.info is not None:
+            row_model.info = models.OddInfoModel(**{
+                col: value for col, value in zip(INFO_QUALIFIERS, self.info)
+                if value is not None
+            })
+        if self.odds is not None:
+            layout = market_layout(self.mkt)
+            row_model.odds = layout.model(**{
+                col: value for col, value in zip(layout.qualifiers, self.odds)
+                if value is not None
+            })
+        return row_model
+
+
+def _decode_values(row: dict, columns: Tuple[bytes, ...]) -> Optional[Tuple[Optional[str], ...]]:
+    get = row.get
+    values = tuple(get(col) for col in columns)
+    if values.count(None) == len(values):
+        return None
+    return tuple(None if value is None else value.decode("utf-8") for value in values)
+
+
+def _decode_odds(row: dict, layout: MarketLayout) -> Optional[Tuple[Optional[str], ...]]:
+    packed = row.get(cellcodec.ODDS_COLUMN)
+    if packed is None:
+        return _decode_values(row, layout.columns)
+    qualifiers, values = cellcodec.unpack_odds(packed)
+    if qualifiers == layout.qualifiers:
+        return values
+    found = dict(zip(qualifiers, values))
+    return tuple(found.get(col) for col in layout.qualifiers)
+
+
+def _decode_info(row: dict) -> Optional[Tuple[Optional[str], ...]]:
+    packed = row.get(cellcodec.INFO_COLUMN)
+    if packed is None:
+        return _decode_values(row, INFO_COLUMNS)
+    return cellcodec.unpack_info(packed)
+
+
+_LATEST_FIRST_TAG = keycodec.LATEST_FIRST.prefix()
+
+
+def decode_row(rowkey: Union[str, bytes], row: dict, sep: str = ":") -> OddRow:
+    """Decode a row without any validation.
+
+    Row keys of both the original and the latest-first layouts of 
+    :mod:`keycodec` are supported, and so are the cells of both storage 
+    formats, i.e., one cell per value or the packed cells of :mod:`cellcodec`.
+
+    Args:
+        rowkey (Union[str, bytes]): The row key.
+        row (dict): The mapping from encoded column names to encoded values.
+        sep (str): The delimiter used in the given ``rowkey`` of the original layout.
+
+    Returns:
+        OddRow: The decoded row.
+    """
+    if isinstance(rowkey, bytes):
+        rowkey = rowkey.decode("utf-8")
+    if rowkey.startswith(_LATEST_FIRST_TAG):
+        sid, lid, mid, mkt, seq, per, vendor, ts = keycodec.LATEST_FIRST.decode(rowkey)
+    else:
+        sid, lid, mid, mkt, seq, per, vendor, ts = rowkey.split(sep)
+    return OddRow(
+        sid, lid, mid, mkt, seq, per, vendor, int(ts),
+        _decode_info(row),
+        _decode_odds(row, market_layout(mkt)),
+    )
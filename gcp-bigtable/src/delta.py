@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+
+
+import keycodec
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+
+HEARTBEAT_COLUMN = b"info:valid"
+
+
+class DeltaFilter(object):
+    """Drop row mutations which do not change the odds or the information of a series.
+
+    A series is identified by the match and the (market, seq, period,
+    vendor) part of the row key. A mutation is emitted only if its columns
+    differ from those of the last mutation emitted for the same series. The columns listed in
+    ``ignore`` are not compared, e.g., ``info:et`` which changes on every
+    live message.
+
+    When ``heartbeat`` is given, an unchanged snapshot coming at least
+    ``heartbeat`` seconds after the last write of its series is turned into
+    a single ``info:valid`` cell holding the timestamp at which the last
+    emitted row was still valid. The cell is written to that last row rather
+    than to a new row.
+
+    Args:
+        sep (str): The delimiter used in the row keys of the original layout.
+        ignore (Iterable[bytes]): The encoded column names not compared.
+        heartbeat (int, optional): The minimal number of seconds between heartbeats of a series.
+
+    Attributes:
+        skipped (int): The number of mutations dropped.
+        heartbeats (int): The number of heartbeats emitted.
+    """
+
+    def __init__(
+        self,
+        sep: str = ":",
+        ignore: Iterable[bytes] = (),
+        heartbeat: Optional[int] = None,
+    ):
+        self._sep = sep
+        self._ignore = frozenset(ignore)
+        self._heartbeat = heartbeat
+        # series -> (last emitted rowkey, compared columns, ts of the last write)
+        self._last: Dict[Tuple[str, ...], Tuple[str, dict, int]] = {}
+        self.skipped = 0
+        self.heartbeats = 0
+
+    def _compared(self, data: dict) -> dict:
+        if not self._ignore:
+            return data
+        return {k: v for k, v in data.items() if k not in self._ignore}
+
+    def filter(self, mutations: Iterable[Tuple[str, dict]]) -> Iterator[Tuple[str, dict]]:
+        """Filter the given row mutations.
+
+        Args:
+            mutations (Iterable[Tuple[str, dict]]): Pairs of row key and column mapping in arrival order.
+
+        Yields:
+            Tuple[str, dict]: The mutations which change their series, and the heartbeats.
+        """
+        for rowkey, data in mutations:
+            key = keycodec.decode(rowkey, self._sep)
+            series = tuple(key[:7])
+            ts = key.ts
+            compared = self._compared(data)
+            last = self._last.get(series)
+            if last is None or last[1] != compared:
+                self._last[series] = (rowkey, compared, ts)
+                yield rowkey, data
+                continue
+            self.skipped += 1
+            if self._heartbeat is not None and ts - last[2] >= self._heartbeat:
+                self._last[series] = (last[0], last[1], ts)
+                self.heartbeats += 1
+                yield last[0], {HEARTBEAT_COLUMN: str(ts).encode("utf-8")}
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+
+
+import columnar
+import csv
+import datetime
+import functools
+import mmap
+import numpy as np
+import os
+from typing import Dict, Iterator, List, Tuple
+
+
+@functools.lru_cache(maxsize=65536)
+def parse_timestamp(value: bytes) -> int:
+    """Parse an ISO 8601 timestamp into an epoch timestamp, as :func:`writerows.gen_row_mutation` does.
+
+    Args:
+        value (bytes): The encoded timestamp, e.g., ``b"2020-07-28T05:08:13"``.
+
+    Returns:
+        int: The epoch timestamp, naive timestamps being in local time.
+    """
+    return int(datetime.datetime.fromisoformat(value.decode("utf-8")).timestamp())
+
+
+@functools.lru_cache(maxsize=65536)
+def _parse_number(value: bytes) -> float:
+    return columnar.parse_odds_value(value)
+
+
+class CsvChunk(object):
+    """A chunk of consecutive CSV rows in a column layout.
+
+    The fields are kept as the ``bytes`` split from the file. Per-row
+    dictionaries are only built by :meth:`dicts`.
+
+    Args:
+        header (Tuple[str, ...]): The field names, in the order of the columns.
+        rows (List[List[bytes]]): The fields of every row.
+        offsets (np.ndarray): The byte offset in the file after every row.
+
+    Attributes:
+        header (Tuple[str, ...]): The field names, in the order of the columns.
+        columns (Dict[str, Tuple[bytes, ...]]): The fields of all the rows per field name.
+        offsets (np.ndarray): The byte offset in the file after every row as ``int64``.
+    """
+
+    def __init__(self, header: Tuple[str, ...], rows: List[List[bytes]], offsets: np.ndarray):
+        widths = set(map(len, rows))
+        if widths - {len(header)}:
+            raise ValueError("Rows of {} fields with a header of {} fields".format(
+                sorted(widths - {len(header)}), len(header)))
+        self.header = header
+        self.columns: Dict[str, Tuple[bytes, ...]] = dict(zip(header, zip(*rows)))
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def _unique(self, name: str) -> Tuple[np.ndarray, np.ndarray]:
+        return np.unique(np.array(self.columns[name]), return_inverse=True)
+
+    def timestamps(self, name: str = "created_ts") -> np.ndarray:
+        """Convert a timestamp column into epoch timestamps.
+
+        Every distinct value of the chunk is parsed once, and the parsed
+        values are cached across chunks.
+
+        Args:
+            name (str): The field name.
+
+        Returns:
+            np.ndarray: The epoch timestamps as ``int64``.
+        """
+        values, inverse = self._unique(name)
+        parsed = np.fromiter(map(parse_timestamp, values.tolist()), np.int64, len(values))
+        return parsed[inverse.ravel()]
+
+    def numbers(self, name: str) -> np.ndarray:
+        """Convert an odds column into floats as :func:`columnar.parse_odds_value` does.
+
+        Args:
+            name (str): The field name, e.g., ``h`` or ``k``.
+
+        Returns:
+            np.ndarray: The values as ``float64``, ``NaN`` for empty fields.
+        """
+        values, inverse = self._unique(name)
+        parsed = np.fromiter(map(_parse_number, values.tolist()), np.float64, len(values))
+        return parsed[inverse.ravel()]
+
+    def dicts(self) -> Iterator[Dict[str, str]]:
+        """Build the row dictionaries, as ``csv.DictReader`` does.
+
+        Yields:
+            Dict[str, str]: The mapping from field names to values of one row.
+        """
+        header = self.header
+        for values in zip(*(self.columns[name] for name in header)):
+            yield dict(zip(header, (value.decode("utf-8") for value in values)))
+
+
+def _split_quoted(data: bytes, start: int) -> Tuple[List[List[bytes]], List[int]]:
+    """Split a chunk containing quoted fields by means of the ``csv`` module."""
+    position = start
+
+    def _lines():
+        nonlocal position
+        for line in data.splitlines(keepends=True):
+            position += len(line)
+            yield line.decode("utf-8")
+
+    rows, offsets = [], []
+    for row in csv.reader(_lines()):
+        if row:
+            rows.append([field.encode("utf-8") for field in row])
+            offsets.append(position)
+    return rows, offsets
+
+
+def _split(data: bytes, start: int) -> Tuple[List[List[bytes]], np.ndarray]:
+    """Split a chunk of whole lines into the fields of its rows."""
+    if b'"' in data:
+        rows, offsets = _split_quoted(data, start)
+        return rows, np.array(offsets, dtype=np.int64)
+    lines = data.split(b"\n")
+    ends = start + np.cumsum(np.fromiter(map(len, lines), np.int64, len(lines)) + 1)
+    if lines[-1] == b"":
+        lines.pop()
+        ends = ends[:-1]
+    if len(ends):
+        ends[-1] = min(ends[-1], start + len(data))
+    if b"\r" in data:
+        lines = [line.rstrip(b"\r") for line in lines]
+    if b"" in lines:
+        # Blank lines are skipped, as by ``csv.DictReader``.
+        keep = [i for i, line in enumerate(lines) if line]
+        lines = [lines[i] for i in keep]
+        ends = ends[keep]
+    return [line.split(b",") for line in lines], ends
+
+
+def read_chunks(src: str, offset: int = 0, chunk_bytes: int = 4 * 1024 * 1024) -> Iterator[CsvChunk]:
+    """Read the given CSV file through a memory map, in chunks of whole rows.
+
+    The fields are split in the order of the header line. Only the chunk
+    being split is copied out of the memory map.
+
+    Args:
+        src (str): The source CSV file.
+        offset (int): The byte offset of the first row to read, e.g., from a checkpoint. 0 for the first row.
+        chunk_bytes (int): The approximate number of bytes per chunk.
+
+    Yields:
+        CsvChunk: The chunks of rows, in file order.
+    """
+    with open(src, "rb") as csv_file:
+        if os.fstat(csv_file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(csv_file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            header_end = mm.find(b"\n") + 1 or size
+            header = tuple(next(csv.reader([mm[:header_end].decode("utf-8")])))
+            position = max(offset, header_end)
+            while position < size:
+                end = mm.find(b"\n", min(position + chunk_bytes, size) - 1)
+                end = size if end < 0 else end + 1
+                quotes = mm[position:end].count(b'"')
+                while quotes % 2 and end < size:
+                    # A quoted field spans the end of the chunk: extend it by a line until the quotes balance.
+                    line_end = mm.find(b"\n", end)
+                    line_end = size if line_end < 0 else line_end + 1
+                    quotes += mm[end:line_end].count(b'"')
+                    end = line_end
+                data = mm[position:end]
+                rows, offsets = _split(data, position)
+                if rows:
+                    yield CsvChunk(header, rows, offsets)
+                position = end
@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+
+
+import datetime
+import random
+import threading
+import time
+from google.api_core import exceptions
+from pydantic import BaseModel
+from typing import Callable, Dict, List
+
+
+# DEADLINE_EXCEEDED, RESOURCE_EXHAUSTED, ABORTED, INTERNAL and UNAVAILABLE.
+RETRYABLE_CODES = frozenset((4, 8, 10, 13, 14))
+RETRYABLE_ERRORS = (
+    exceptions.DeadlineExceeded,
+    exceptions.TooManyRequests,
+    exceptions.Aborted,
+    exceptions.InternalServerError,
+    exceptions.ServiceUnavailable,
+)
+
+
+class WriteError(RuntimeError):
+    """Raised when row mutations fail for good.
+
+    Args:
+        message (str): The description of the failure.
+        rowkeys (List[bytes]): The row keys of the failed row mutations.
+
+    Attributes:
+        rowkeys (List[bytes]): The row keys of the failed row mutations.
+    """
+
+    def __init__(self, message: str, rowkeys: List[bytes]):
+        super().__init__(message)
+        self.rowkeys = rowkeys
+
+
+class FlowControl(BaseModel):
+    """Options of the flow-controlled writes.
+
+    Args:
+        max_attempts (int): The maximum number of attempts of a row mutation.
+        backoff_initial (float): The upper bound in seconds of the delay before the first retry.
+        backoff_max (float): The upper bound in seconds of the delay before any retry.
+        target_latency (float): The write latency in seconds above which the rate is decreased.
+        initial_rate (float): The initial rate in rows per second.
+        min_rate (float): The minimum rate in rows per second.
+        max_rate (float): The maximum rate in rows per second.
+        increase (float): The rows per second added to the rate after a fast write.
+        decrease (float): The factor applied to the rate after a slow or throttled write.
+    """
+    max_attempts: int = 8
+    backoff_initial: float = 0.1
+    backoff_max: float = 10.0
+    target_latency: float = 0.5
+    initial_rate: float = 5000.0
+    min_rate: float = 100.0
+    max_rate: float = 100000.0
+    increase: float = 500.0
+    decrease: float = 0.5
+
+
+def backoff_delay(attempt: int, initial: float = 0.1, maximum: float = 10.0,
+                  rand: Callable[[], float] = random.random) -> float:
+    """Get the jittered exponential delay before a retry.
+
+    The delay is drawn uniformly below the exponential bound ("full jitter"),
+    so that the writers throttled together do not retry together.
+
+    Args:
+        attempt (int): The number of attempts already failed, at least 1.
+        initial (float): The upper bound in seconds of the delay before the first retry.
+        maximum (float): The upper bound in seconds of the delay before any retry.
+        rand (Callable[[], float]): The uniform random number generator in [0, 1).
+
+    Returns:
+        float: The delay in seconds.
+    """
+    return rand() * min(maximum, initial * 2 ** (attempt - 1))
+
+
+class RateController(object):
+    """Pace the writes by an additive-increase/multiplicative-decrease rate.
+
+    The rate grows by ``increase`` rows per second after every write faster
+    than ``target_latency``, and is multiplied by ``decrease`` after a slower
+    or a throttled one. The writes in flight were sent at the former rate, so
+    the rate is decreased at most once per ``target_latency``. One controller
+    is shared by all the writer threads of a load.
+
+    Args:
+        options (FlowControl): The options of the flow-controlled writes.
+        clock (Callable[[], float]): The monotonic clock.
+        sleep (Callable[[float], object]): The function waiting for a number of seconds.
+
+    Attributes:
+        rate (float): The current rate in rows per second.
+        retried (int): The number of row mutations which failed with a retryable error.
+        decreases (int): The number of times the rate was decreased.
+    """
+
+    def __init__(self, options: FlowControl, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], object] = time.sleep):
+        self.options = options
+        self.clock = clock
+        self.sleep = sleep
+        self.rate = options.initial_rate
+        self.retried = 0
+        self.decreases = 0
+        self._lock = threading.Lock()
+        self._next = clock()
+        self._decreased = float("-inf")
+
+    def acquire(self, rows: int) -> None:
+        """Wait until ``rows`` row mutations may be sent at the current rate.
+
+        Args:
+            rows (int): The number of row mutations about to be sent.
+        """
+        with self._lock:
+            now = self.clock()
+            start = max(now, self._next)
+            self._next = start + rows / self.rate
+        if start > now:
+            self.sleep(start - now)
+
+    def observe(self, latency: float, throttled: int = 0) -> None:
+        """Adjust the rate to the outcome of a write.
+
+        Args:
+            latency (float): The number of seconds the write took.
+            throttled (int): The number of row mutations which failed with a retryable error.
+        """
+        options = self.options
+        with self._lock:
+            self.retried += throttled
+            if throttled or latency > options.target_latency:
+                now = self.clock()
+                if now - self._decreased >= options.target_latency:
+                    self.rate = max(options.min_rate, self.rate * options.decrease)
+                    self._decreased = now
+                    self.decreases += 1
+            else:
+                self.rate = min(options.max_rate, self.rate + options.increase)
+
+
+class FlowBatch(object):
+    """A replacement of ``happybase.Batch`` which paces and retries its sends.
+
+    Every cell is written with the client-side timestamp of the batch, so
+    that re-submitting a row mutation rewrites the same cell version rather
+    than adding one, i.e., the retries are idempotent.
+
+    Args:
+        table (happybase.Table): The target table instance.
+        controller (RateController): The rate controller shared by the writers.
+    """
+
+    def __init__(self, table, controller: RateController):
+        self._low_level_table = table._low_level_table
+        self._controller = controller
+        self._rows: Dict[str, object] = {}
+        self._timestamp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Unlike happybase, nothing is sent after an error, e.g., a failed send.
+        if exc_type is None:
+            self.send()
+
+    def put(self, row: str, data: dict) -> None:
+        """Insert data into a row.
+
+        Args:
+            row (str): The row key.
+            data (dict): The mapping from encoded column names to encoded values.
+        """
+        if self._timestamp is None:
+            self._timestamp = datetime.datetime.now(datetime.timezone.utc)
+        row_object = self._rows.get(row)
+        if row_object is None:
+            row_object = self._low_level_table.row(row)
+            self._rows[row] = row_object
+        for column, value in data.items():
+            family, qualifier = column.split(b":", 1)
+            row_object.set_cell(family.decode("utf-8"), qualifier, value, timestamp=self._timestamp)
+
+    def send(self) -> None:
+        """Send the pending row mutations, re-submitting the ones failed with a retryable error.
+
+        Raises:
+            WriteError: A row mutation failed with a non-retryable error, or still failed
+                after ``max_attempts`` attempts.
+        """
+        pending = list(self._rows.values())
+        self._rows = {}
+        self._timestamp = None
+        controller = self._controller
+        options = controller.options
+        attempt = 0
+        while pending:
+            controller.acquire(len(pending))
+            start = controller.clock()
+            try:
+                # The retries are ours, the client library must not retry on its own.
+                statuses = self._low_level_table.mutate_rows(pending, retry=None)
+            except RETRYABLE_ERRORS:
+                failed = pending
+            else:
+                failed = []
+                for row_object, status in zip(pending, statuses):
+                    if status.code == 0:
+                        continue
+                    if status.code not in RETRYABLE_CODES:
+                        raise WriteError(
+                            "Row mutation failed with status {}: {}".format(status.code, status.message),
+                            [row_object.row_key])
+                    failed.append(row_object)
+            controller.observe(controller.clock() - start, len(failed))
+            if not failed:
+                return
+            attempt += 1
+            if attempt >= options.max_attempts:
+                raise WriteError(
+                    "{} row mutations still failing after {} attempts".format(len(failed), attempt),
+                    [row_object.row_key for row_object in failed])
+            controller.sleep(backoff_delay(attempt, options.backoff_initial, options.backoff_max))
+            pending = failed
+
+
+class FlowWriter(object):
+    """Create the flow-controlled batches of a table.
+
+    Args:
+        table (happybase.Table): The target table instance.
+        controller (RateController): The rate controller shared by the writers.
+    """
+
+    def __init__(self, table, controller: RateController):
+        self.table = table
+        self.controller = controller
+
+    def batch(self) -> FlowBatch:
+        """Create a batch.
+
+        Returns:
+            FlowBatch: The batch, to be used as ``happybase.Batch``.
+        """
+        return FlowBatch(self.table, self.controller)
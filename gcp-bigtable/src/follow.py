@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+
+
+import decoder
+import keycodec
+import query
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from google.cloud import happybase
+from google.cloud.bigtable.row_filters import RowKeyRegexFilter
+from pydantic import BaseModel
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class FollowOptions(BaseModel):
+    """Options of following the rows of a query.
+
+    Args:
+        min_interval (float): The number of seconds between two polls while rows keep arriving.
+        max_interval (float): The maximum number of seconds between two polls.
+        backoff (float): The factor applied to the interval after a poll without new rows.
+        max_workers (int): The maximum number of concurrent scans of a poll.
+        columns (List[str], optional): The columns or column families to retrieve.
+        fast (bool): Yield unvalidated ``decoder.OddRow`` objects instead of ``RowModelOdd``.
+    """
+    min_interval: float = 0.5
+    max_interval: float = 10.0
+    backoff: float = 2.0
+    max_workers: int = 8
+    columns: Optional[List[str]] = None
+    fast: bool = False
+
+
+class PollInterval(object):
+    """Adapt the interval between two polls to the arrival of rows.
+
+    The interval is reset to ``min_interval`` after a poll with new rows,
+    and multiplied by ``backoff`` up to ``max_interval`` after an empty one,
+    so that a quiet match is polled less and less often.
+
+    Args:
+        min_interval (float): The minimum number of seconds between two polls.
+        max_interval (float): The maximum number of seconds between two polls.
+        backoff (float): The factor applied to the interval after an empty poll.
+
+    Attributes:
+        interval (float): The current number of seconds between two polls.
+    """
+
+    def __init__(self, min_interval: float = 0.5, max_interval: float = 10.0, backoff: float = 2.0):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.interval = min_interval
+
+    def next(self, rows: int) -> float:
+        """Get the interval before the next poll.
+
+        Args:
+            rows (int): The number of new rows found by the last poll.
+
+        Returns:
+            float: The number of seconds to wait.
+        """
+        if rows:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+        return self.interval
+
+
+def _series(rowkey: bytes, sep: bytes) -> bytes:
+    """Get the prefix of a row key before its timestamp field, i.e., the series of the row."""
+    return rowkey[:rowkey.rindex(sep) + 1]
+
+
+class Follower(object):
+    """Find the rows of a query written since the previous poll.
+
+    The follower keeps a high-water mark per series, i.e., per row key
+    prefix before the timestamp field: the newest timestamp seen. A poll
+    only scans the row ranges not covered by the marks, that is, the rows
+    of the known series newer than their mark and the series not seen
+    yet, so that its cost grows with the number of new rows and series
+    rather than with the history of the match. This holds for both row
+    key layouts of :mod:`keycodec`, the newer rows of a series sorting
+    after the older ones in the original layout and before them in the
+    latest-first one.
+
+    A row written with a timestamp not newer than the mark of its series
+    is not found, i.e., the rows of a series are expected to be written in
+    timestamp order.
+
+    Args:
+        table_instance (happybase.Table): The table instance to be polled.
+        odds_query (query.OddsQuery): The selection of rows to follow.
+        max_workers (int): The maximum number of concurrent scans of a poll.
+        columns (List[str], optional): The columns or column families to retrieve.
+
+    Attributes:
+        marks (Dict[bytes, int]): The newest timestamp seen per series.
+        scans (int): The number of scans issued.
+    """
+
+    def __init__(self, table_instance: happybase.Table, odds_query: query.OddsQuery,
+                 max_workers: int = 8, columns: Optional[List[str]] = None):
+        self.table_instance = table_instance
+        self.query = odds_query
+        self.max_workers = max_workers
+        self.columns = columns
+        self.codec = query.codec_of(odds_query)
+        self.compiled = query.compile_query(odds_query)
+        self.marks: Dict[bytes, int] = {}
+        self.scans = 0
+        self._sep = self.codec.sep.encode("utf-8")
+
+    def _seen(self, series: bytes, mark: int) -> Tuple[bytes, bytes]:
+        """Get the row range of the rows of ``series`` up to ``mark``."""
+        if isinstance(self.codec, keycodec.ReverseTsCodec):
+            # The newer rows sort first, the seen ones span up to the end of the series.
+            return (series + self.codec.ts_bound(mark).encode("utf-8"),
+                    query.successor(series.decode("utf-8")).encode("utf-8"))
+        return series, series + str(mark).encode("utf-8") + b"\x00"
+
+    def ranges(self) -> List[Tuple[bytes, bytes]]:
+        """Get the row ranges the next poll scans.
+
+        Returns:
+            List[Tuple[bytes, bytes]]: The sorted and disjoint row ranges, the stop being exclusive.
+        """
+        ranges = []
+        cursor, stop = self.compiled.row_start, self.compiled.row_stop
+        for series in sorted(self.marks):
+            seen_start, seen_stop = self._seen(series, self.marks[series])
+            if cursor < seen_start:
+                ranges.append((cursor, seen_start))
+            cursor = max(cursor, seen_stop)
+        if cursor < stop:
+            ranges.append((cursor, stop))
+        return ranges
+
+    def _scan(self, row_range: Tuple[bytes, bytes]) -> List[Tuple[bytes, dict]]:
+        kwargs: dict = {}
+        if self.compiled.key_regex is not None:
+            kwargs["filter"] = RowKeyRegexFilter(self.compiled.key_regex)
+        return list(self.table_instance.scan(
+            row_start=row_range[0], row_stop=row_range[1], columns=self.columns, **kwargs))
+
+    def poll(self) -> List[Tuple[bytes, dict]]:
+        """Find the rows written since the previous poll, and advance the marks past them.
+
+        Returns:
+            List[Tuple[bytes, dict]]: The new rows, ordered by timestamp then row key.
+        """
+        ranges = self.ranges()
+        self.scans += len(ranges)
+        if len(ranges) <= 1 or self.max_workers <= 1:
+            results = [self._scan(row_range) for row_range in ranges]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(ranges))) as executor:
+                results = list(executor.map(self._scan, ranges))
+
+        rows = []
+        for key, row in (row for result in results for row in result):
+            ts = self.codec.decode(key.decode("utf-8")).ts
+            series = _series(key, self._sep)
+            if ts > self.marks.get(series, -1):
+                self.marks[series] = ts
+            rows.append((ts, key, row))
+        rows.sort(key=lambda item: item[:2])
+        return [(key, row) for _, key, row in rows]
+
+
+def follow_rows(
+    table_instance: happybase.Table,
+    odds_query: query.OddsQuery,
+    options: Optional[FollowOptions] = None,
+    stop: Optional[threading.Event] = None,
+    sleep: Callable[[float], object] = time.sleep,
+) -> Iterator:
+    """Yield the rows of a query, then every row written afterwards as it arrives.
+
+    Every row is yielded once. The rows found by a poll are yielded in
+    timestamp order, see :class:`Follower`.
+
+    Args:
+        table_instance (happybase.Table): The table instance to be polled.
+        odds_query (query.OddsQuery): The selection of rows to follow.
+        options (FollowOptions, optional): The options of following. Defaults to ``FollowOptions()``.
+        stop (threading.Event, optional): Stop following once set. Forever if not given.
+        sleep (Callable[[float], object]): The function waiting for a number of seconds.
+
+    Yields:
+        models.RowModelOdd: The rows, or unvalidated ``decoder.OddRow`` objects if ``options.fast`` is set.
+    """
+    options = options or FollowOptions()
+    follower = Follower(table_instance, odds_query, options.max_workers, options.columns)
+    interval = PollInterval(options.min_interval, options.max_interval, options.backoff)
+    while stop is None or not stop.is_set():
+        rows = follower.poll()
+        for key, row in rows:
+            odd_row = decoder.decode_row(key, row, odds_query.sep)
+            yield odd_row if options.fast else odd_row.to_model()
+        delay = interval.next(len(rows))
+        if stop is not None:
+            stop.wait(delay)
+        else:
+            sleep(delay)
@@ -2,35 +2,51 @@
 
 
 import argparse
+import columnar
+import decoder
+import follow
+import heapq
+import index
+import itertools
+import keycodec
+import metrics
 import models
+import pool
+import query
+import queue
+import rollup
+import threading
 import time
-from google.cloud import bigtable
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from google.cloud import happybase
+from google.cloud.bigtable.row_filters import RowKeyRegexFilter
 from pydantic import BaseModel
-from typing import List
+from typing import Iterator, List, Optional, Tuple, Union
 
 
 def get_table_instance(
-    project_id: str, instance_id: str, table_name: str
+    project_id: str, instance_id: str, table_name: str, admin: bool = True
 ) -> happybase.Table:
-    """Create a table instance according to the given ``project_id``, ``instance_id``, and ``table_name``.
+    """Get a table instance according to the given ``project_id``, ``instance_id``, and ``table_name``.
 
-    This function create a table instance for reading/writing data.
+    This function gets a table instance for reading/writing data from the 
+    process-wide :class:`pool.TablePool`, so that the client and connection 
+    are created only once per process.
 
     Args:
         project_id (str): The project ID on GCP.
         instance_id (str): The Bigtable instance ID on GCP.
         table_name (str): The target table name in Bigtable on GCP.
+        admin (bool): Whether to use a client with admin access instead of a data-only client.
 
     Returns:
         happybase.Table: A table instance.
     """
-    start = time.time()
-    client = bigtable.Client(project=project_id, admin=True)
-    instance = client.instance(instance_id)
-    connection = happybase.Connection(instance=instance)
-    table = connection.table(table_name)
-    end = time.time()
+    start = time.perf_counter()
+    with metrics.get_metrics().stage("connect", "connect"):
+        table = pool.get_pool(admin).table(project_id, instance_id, table_name)
+    end = time.perf_counter()
     print("Elapsed time for getting table instance: {}s".format(end - start))
     return table
 
@@ -40,6 +56,9 @@ def _transform_row_model(
 ) -> models.RowModelOdd:
     """Generate a dictionary from the given ``row_obj``.
 
+    A column family may be absent when the row was read with a column 
+    projection, in which case the corresponding model is left as ``None``.
+
     Args:
         rowkey (str): A given row key.
         sep (str): The delimiter used in the given ``rowkey``.
@@ -47,38 +66,58 @@ def _transform_row_model(
     Returns:
         models.RowModelOdd: A ``RowModelOdd`` object initialized with the given ``rowkey``.
     """
-    keys = ["sid", "lid", "mid", "mkt", "seq", "per", "vendor", "ts"]
-    info_list: list = ["s", "per", "et"]
+    return decoder.decode_row(rowkey, row, sep).to_model()
 
-    row_dict = dict(zip(keys, rowkey.split(sep)))
-    row_dict["info"] = {}
-    row_dict["odds"] = {}
-    row_model = models.RowModelOdd(**row_dict)
-    
-    info_dict: dict = {}
-    for col in info_list:
-        col_name = ":".join(["info", col])
-        info_dict[col] = row[col_name.encode("utf-8")]
-    row_model.info = models.OddInfoModel(**info_dict)
-
-    target_cols = _get_target_column_list(row_model.mkt)
-    odds_dict: dict = {}
-    for col in target_cols:
-        col_name = ":".join(["odds", col])
-        odds_dict[col] = row[col_name.encode("utf-8")]
-
-    odd_model = None
-    mkt: str = row_model.mkt
-    if mkt.startswith("1x2"):
-        odd_model = models.ColumnModel1x2(**odds_dict)
-    elif mkt.startswith("ah"):
-        odd_model = models.ColumnModelAH(**odds_dict)
-    else:
-        odd_model = models.ColumnModelOU(**odds_dict)
 
-    row_model.odds = odd_model
+def _decode(rowkey: bytes, row: dict, sep: str, fast: bool, laps: Optional[metrics.Laps] = None):
+    odd_row = decoder.decode_row(rowkey, row, sep)
+    if laps is None:
+        return odd_row if fast else odd_row.to_model()
+    laps.lap("decode")
+    if fast:
+        return odd_row
+    model = odd_row.to_model()
+    laps.lap("model")
+    return model
 
-    return row_model
+
+def _timed_scan(rows: Iterator[Tuple[bytes, dict]], decode, operation: str = "scan") -> Iterator:
+    """Decode the rows of a scan while splitting its time into stages.
+
+    The wait for every row is attributed to the ``rpc`` stage, its decoding 
+    to the ``decode`` and ``model`` stages, and the time the consumer 
+    spends between two rows to the ``consumer`` stage. The latency of the 
+    first row and of the whole scan are recorded as the ``first_row`` and 
+    ``operation`` operations.
+
+    Args:
+        rows (Iterator[Tuple[bytes, dict]]): The rows of the scan.
+        decode (Callable[[bytes, dict, metrics.Laps], object]): The function decoding a row.
+        operation (str): The operation recording the latency of the whole scan.
+
+    Yields:
+        object: The decoded rows.
+    """
+    m = metrics.get_metrics()
+    laps = m.laps()
+    start = time.perf_counter()
+    num_rows = num_cells = num_bytes = 0
+    try:
+        for key, row in rows:
+            laps.lap("rpc")
+            if num_rows == 0:
+                m.observe("first_row", time.perf_counter() - start)
+            num_rows += 1
+            num_cells += len(row)
+            num_bytes += metrics.row_size(key, row)
+            yield decode(key, row, laps)
+            laps.lap("consumer")
+    finally:
+        laps.close()
+        m.observe(operation, time.perf_counter() - start)
+        m.count("read_rows", num_rows)
+        m.count("read_cells", num_cells)
+        m.count("read_bytes", num_bytes)
 
 
 def _get_target_column_list(market: str) -> list:
@@ -93,17 +132,7 @@ def _get_target_column_list(market: str) -> list:
     Returns:
         list: A list of column qualifiers.
     """
-    odds_1x2_cols = ["h", "a", "d"]
-    odds_ah_cols = ["k", "h", "a"]
-    odds_ou_cols = ["k", "ovr", "und"]
-    target_cols = []
-    if market.startswith("1x2"):
-        target_cols = odds_1x2_cols
-    elif market.startswith("ah"):
-        target_cols = odds_ah_cols
-    else:
-        target_cols = odds_ou_cols
-    return target_cols
+    return list(decoder.market_layout(market).qualifiers)
 
 
 def _get_single_row(
@@ -129,27 +158,130 @@ def _get_single_row(
     return row_model
 
 
+def _fetch_chunk(table_instance, rowkeys: List[str]) -> dict:
+    """Fetch the rows of ``rowkeys`` by means of a single ``rows()`` call.
+
+    Args:
+        table_instance (happybase.Table): The table instance to be queried.
+        rowkeys (List[str]): A chunk of row keys.
+
+    Returns:
+        dict: A mapping from the encoded row keys found to their columns.
+    """
+    keys = [rowkey.encode("utf-8") for rowkey in rowkeys]
+    m = metrics.get_metrics()
+    with m.stage("rpc", "rows"):
+        rows = dict(table_instance.rows(keys))
+    if m.enabled:
+        m.count("read_rows", len(rows))
+        m.count("read_cells", sum(len(row) for row in rows.values()))
+        m.count("read_bytes", sum(metrics.row_size(key, row) for key, row in rows.items()))
+    return rows
+
+
 def get_rowkeys(
-    table_instance, rowkeys: List[str], sep: str = "#",
+    table_instance,
+    rowkeys: List[str],
+    sep: str = ":",
+    chunk_size: int = 100,
+    max_workers: int = 8,
+    missing: Optional[List[str]] = None,
+    fast: bool = False,
 ) -> List[models.RowModelOdd]:
     """Query table with respect to given ``table_instance`` and ``rowkeys``.
 
     Given at least one element in `rowkeys`, this function queries the 
-    target table in Bigtable to retrieve the corresponding columns.
+    target table in Bigtable to retrieve the corresponding columns. The row 
+    keys are split into chunks of ``chunk_size`` keys, each of which is 
+    fetched by one ``rows()`` call, and the chunks are fetched concurrently.
 
     Args:
         table_instance (str): The table instance on GCP.
         rowkeys (List[str]): A list of rowkeys to query.
         sep (str): The delimiter in the given row keys.
+        chunk_size (int): The maximum number of row keys per request.
+        max_workers (int): The maximum number of concurrent requests.
+        missing (List[str], optional): If given, the row keys not found are appended to it.
+        fast (bool): Return unvalidated ``decoder.OddRow`` objects instead of ``RowModelOdd``.
 
     Returns:
-        List[models.RowModelOdd]: A list of data model corresponding to the query result.
+        List[models.RowModelOdd]: A list of data model corresponding to the query result, in the order of ``rowkeys``.
+
+    Raises:
+        ValueError: If ``chunk_size`` is not positive.
     """
-    row_model = [_get_single_row(table_instance, rowkey, sep=":") for rowkey in rowkeys]
+    if chunk_size < 1:
+        raise ValueError("Invalid chunk size: {}".format(chunk_size))
+    m = metrics.get_metrics()
+    start = time.perf_counter()
+    chunks = [rowkeys[i:i + chunk_size] for i in range(0, len(rowkeys), chunk_size)]
+    if len(chunks) <= 1 or max_workers <= 1:
+        results = [_fetch_chunk(table_instance, chunk) for chunk in chunks]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+            results = list(executor.map(lambda chunk: _fetch_chunk(table_instance, chunk), chunks))
+
+    found: dict = {}
+    for result in results:
+        found.update(result)
+
+    row_model = []
+    laps = m.laps() if m.enabled else None
+    for rowkey in rowkeys:
+        row = found.get(rowkey.encode("utf-8"))
+        if not row:
+            if missing is not None:
+                missing.append(rowkey)
+            continue
+        row_model.append(_decode(rowkey, row, sep, fast, laps))
+    if laps is not None:
+        laps.close()
+        m.observe("get_rows", time.perf_counter() - start)
 
     return row_model
 
     
+def iter_rows_range(
+    table_instance: happybase.Table,
+    start: str,
+    stop: str,
+    sep: str,
+    limit: Optional[int] = None,
+    columns: Optional[List[str]] = None,
+    raw: bool = False,
+    fast: bool = False,
+) -> Iterator:
+    """Scan a row key range lazily.
+
+    Unlike :func:`scan_rows_range`, rows are decoded one at a time while the 
+    scan is consumed, so that memory usage does not grow with the range.
+
+    Args:
+        table_instance(happybase.Table): The table instance to be scanned.
+        start (str): A row key indicates the start of a row key range to scan.
+        stop (str): A row key indicates the stop of a row key range to scan.
+        sep (str): The delimiter in the given row keys.
+        limit (int, optional): The maximum number of rows to return.
+        columns (List[str], optional): The columns or column families to retrieve, e.g., ``["odds"]``.
+        raw (bool): Yield ``(rowkey, row)`` pairs instead of ``RowModelOdd`` objects.
+        fast (bool): Yield unvalidated ``decoder.OddRow`` objects instead of ``RowModelOdd``.
+
+    Yields:
+        models.RowModelOdd: The scanning results, or the raw rows if ``raw`` is set.
+    """
+    # No batch_size: Cloud Bigtable streams the rows of a scan, and happybase ignores it with a warning.
+    rows = table_instance.scan(row_start=start, row_stop=stop, columns=columns, limit=limit)
+    if metrics.get_metrics().enabled:
+        yield from _timed_scan(
+            rows, lambda key, row, laps: (key, row) if raw else _decode(key, row, sep, fast, laps))
+        return
+    for key, row in rows:
+        if raw:
+            yield key, row
+        else:
+            yield _decode(key, row, sep, fast)
+
+
 def scan_rows_range(
     table_instance: happybase.Table, start: str, stop: str, sep: str
 ) -> List[models.RowModelOdd]:
@@ -167,9 +299,350 @@ def scan_rows_range(
     Returns:
         List[models.RowModelOdd]: A list of scanning results.
     """
-    rows = table_instance.scan(row_start=start, row_stop=stop)
-    row_model = [_transform_row_model(key.decode("utf-8"), row, sep) for key, row in rows]
-    return row_model
+    return list(iter_rows_range(table_instance, start, stop, sep))
+
+
+def get_latest_rows(
+    table_instance: happybase.Table,
+    sid, lid, mid, mkt: str, seq, per: str, vendor: str,
+    n: int = 1,
+    version: int = 2,
+    sep: str = ":",
+    fast: bool = False,
+) -> list:
+    """Get the latest ``n`` rows of a series, newest first.
+
+    With the latest-first layout (``version`` 2) this is a prefix scan 
+    limited to ``n`` rows. With the original layout (``version`` 1) the 
+    whole history of the series has to be scanned.
+
+    Args:
+        table_instance(happybase.Table): The table instance to be scanned.
+        sid: The sport ID.
+        lid: The league ID.
+        mid: The match ID.
+        mkt (str): The market.
+        seq: The sequence of the odd pair within the market.
+        per (str): The period.
+        vendor (str): The vendor.
+        n (int): The number of rows to return.
+        version (int): The version of the row key layout in :mod:`keycodec`.
+        sep (str): The delimiter used in the row keys of the original layout.
+        fast (bool): Return unvalidated ``decoder.OddRow`` objects instead of ``RowModelOdd``.
+
+    Returns:
+        list: The latest rows of the series, from the newest to the oldest.
+    """
+    codec = keycodec.get_codec(version)
+    if version == 1 and sep != codec.sep:
+        codec = keycodec.AscendingTsCodec(sep)
+    prefix = codec.prefix(sid, lid, mid, mkt, seq, per, vendor)
+    if version == 1:
+        rows = list(deque(table_instance.scan(row_prefix=prefix.encode("utf-8")), maxlen=n))
+        rows.reverse()
+    else:
+        rows = table_instance.scan(row_prefix=prefix.encode("utf-8"), limit=n)
+    return [_decode(key, row, sep, fast) for key, row in rows]
+
+
+def _to_bytes(rowkey: Union[str, bytes]) -> bytes:
+    return rowkey.encode("utf-8") if isinstance(rowkey, str) else rowkey
+
+
+def _split_evenly(start: bytes, stop: bytes, splits: int) -> List[bytes]:
+    """Generate ``splits - 1`` boundaries evenly distributed between ``start`` and ``stop``.
+
+    The boundaries share the longest common prefix of ``start`` and ``stop``, 
+    and the two bytes following the prefix are interpolated. Since row keys 
+    are ASCII strings, the interpolation never goes beyond ``0x7f``.
+
+    Args:
+        start (bytes): The start of the row key range. Empty means the start of the table.
+        stop (bytes): The stop of the row key range. Empty means the end of the table.
+        splits (int): The number of sub-ranges wanted.
+
+    Returns:
+        List[bytes]: The sorted boundaries strictly between ``start`` and ``stop``.
+    """
+    i = 0
+    while i < len(start) and i < len(stop) and start[i] == stop[i]:
+        i += 1
+    prefix = start[:i]
+    lo = int.from_bytes(start[i:i + 2].ljust(2, b"\x00"), "big")
+    hi = int.from_bytes(stop[i:i + 2].ljust(2, b"\x00"), "big") if stop else 0x10000
+    hi = max(lo, min(hi, 0x7f00))
+    boundaries = []
+    for k in range(1, splits):
+        point = lo + (hi - lo) * k // splits
+        boundary = prefix + point.to_bytes(2, "big").rstrip(b"\x00")
+        if boundary > start and (not stop or boundary < stop) and \
+                (not boundaries or boundary > boundaries[-1]):
+            boundaries.append(boundary)
+    return boundaries
+
+
+def split_row_range(
+    table_instance: happybase.Table,
+    start: str,
+    stop: str,
+    splits: int,
+    use_samples: bool = True,
+) -> List[Tuple[bytes, bytes]]:
+    """Split the row key range ``[start, stop)`` into at most ``splits`` sub-ranges.
+
+    The row keys sampled by Bigtable, which follow the tablet boundaries, are 
+    used when ``use_samples`` is set and enough of them fall into the range. 
+    Otherwise the range is split evenly on the row key prefix.
+
+    Args:
+        table_instance(happybase.Table): The table instance to be scanned.
+        start (str): A row key indicates the start of a row key range to scan.
+        stop (str): A row key indicates the stop of a row key range to scan.
+        splits (int): The maximum number of sub-ranges.
+        use_samples (bool): Whether to split on the sampled row keys of the table.
+
+    Returns:
+        List[Tuple[bytes, bytes]]: The sorted and contiguous sub-ranges.
+    """
+    start_key = _to_bytes(start or b"")
+    stop_key = _to_bytes(stop or b"")
+    boundaries: List[bytes] = []
+    if use_samples and splits > 1:
+        low_level_table = getattr(table_instance, "_low_level_table", None)
+        if low_level_table is not None:
+            samples = sorted({
+                sample.row_key for sample in low_level_table.sample_row_keys()
+                if sample.row_key > start_key and (not stop_key or sample.row_key < stop_key)
+            })
+            if len(samples) >= splits - 1:
+                step = len(samples) / splits
+                boundaries = sorted({samples[int(step * k)] for k in range(1, splits)})
+            elif samples:
+                boundaries = samples
+    if not boundaries and splits > 1:
+        boundaries = _split_evenly(start_key, stop_key, splits)
+    edges = [start_key] + boundaries + [stop_key]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+class _ScanFailed(object):
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_SCAN_DONE = object()
+
+
+def _scan_worker(
+    table_instance, start: bytes, stop: bytes, columns, out: queue.Queue, cancelled: threading.Event
+) -> None:
+    """Scan a single sub-range and feed the rows into ``out``."""
+
+    def _put(item) -> bool:
+        while not cancelled.is_set():
+            try:
+                out.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        for key, row in table_instance.scan(
+                row_start=start or None, row_stop=stop or None, columns=columns):
+            if not _put((key, row)):
+                return
+    except Exception as e:
+        _put(_ScanFailed(e))
+    _put(_SCAN_DONE)
+
+
+def _drain(out: queue.Queue, producers: int) -> Iterator[Tuple[bytes, dict]]:
+    done = 0
+    while done < producers:
+        item = out.get()
+        if item is _SCAN_DONE:
+            done += 1
+        elif isinstance(item, _ScanFailed):
+            raise item.error
+        else:
+            yield item
+
+
+def parallel_scan_rows_range(
+    table_instance: happybase.Table,
+    start: str,
+    stop: str,
+    sep: str,
+    splits: int = 8,
+    ordered: bool = True,
+    use_samples: bool = True,
+    columns: Optional[List[str]] = None,
+    raw: bool = False,
+    queue_size: int = 1000,
+    limit: Optional[int] = None,
+    fast: bool = False,
+) -> Iterator:
+    """Scan a row key range by means of concurrent scans over its sub-ranges.
+
+    The range is split by :func:`split_row_range` and every sub-range is 
+    scanned on its own thread. With ``ordered`` set, the sub-range streams 
+    are k-way merged so that rows come out in row key order. Otherwise 
+    rows are yielded as soon as any scan delivers them.
+
+    Args:
+        table_instance(happybase.Table): The table instance to be scanned.
+        start (str): A row key indicates the start of a row key range to scan.
+        stop (str): A row key indicates the stop of a row key range to scan.
+        sep (str): The delimiter in the given row keys.
+        splits (int): The maximum number of concurrent scans.
+        ordered (bool): Whether to yield the rows in row key order.
+        use_samples (bool): Whether to split on the sampled row keys of the table.
+        columns (List[str], optional): The columns or column families to retrieve.
+        raw (bool): Yield ``(rowkey, row)`` pairs instead of ``RowModelOdd`` objects.
+        queue_size (int): The maximum number of rows buffered per scan.
+        limit (int, optional): The maximum number of rows to return.
+        fast (bool): Yield unvalidated ``decoder.OddRow`` objects instead of ``RowModelOdd``.
+
+    Yields:
+        models.RowModelOdd: The scanning results, or the raw rows if ``raw`` is set.
+    """
+    ranges = split_row_range(table_instance, start, stop, splits, use_samples)
+    cancelled = threading.Event()
+    if ordered:
+        queues = [queue.Queue(maxsize=queue_size) for _ in ranges]
+        streams = [_drain(q, 1) for q in queues]
+        rows = heapq.merge(*streams, key=lambda item: item[0])
+    else:
+        shared: queue.Queue = queue.Queue(maxsize=queue_size * len(ranges))
+        queues = [shared] * len(ranges)
+        rows = _drain(shared, len(ranges))
+
+    threads = [
+        threading.Thread(
+            target=_scan_worker,
+            args=(table_instance, sub_start, sub_stop, columns, q, cancelled),
+            daemon=True)
+        for (sub_start, sub_stop), q in zip(ranges, queues)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        for count, (key, row) in enumerate(rows):
+            if limit is not None and count >= limit:
+                break
+            if raw:
+                yield key, row
+            else:
+                yield _decode(key, row, sep, fast)
+    finally:
+        cancelled.set()
+
+
+def plan_query(index_query: index.IndexQuery, indexes: List[str] = ()) -> str:
+    """Choose how to execute the given query.
+
+    * ``prefix``: the match is given, so that the rows are scanned by their row key prefix.
+    * ``vendor``: the rows are looked up through the vendor index.
+    * ``time``: the rows are looked up through the time index.
+    * ``scan``: the whole table is scanned with a row key filter.
+
+    Args:
+        index_query (index.IndexQuery): The query.
+        indexes (List[str]): The kinds of index available.
+
+    Returns:
+        str: The plan.
+    """
+    if index_query.sid is not None and index_query.lid is not None and index_query.mid is not None:
+        return "prefix"
+    if index_query.vendor is not None and "vendor" in indexes:
+        return "vendor"
+    if (index_query.ts_from is not None or index_query.ts_to is not None) and "time" in indexes:
+        return "time"
+    return "scan"
+
+
+def _scan_table(table_instance, index_query: index.IndexQuery, columns, limit, fast) -> Iterator:
+    codec = query.codec_of(index_query)
+    values = [getattr(index_query, field) for field in query.FIELDS]
+    key_regex = query.fields_regex(codec, [], values, index_query.ts_from, index_query.ts_to)
+    prefix = codec.prefix()
+    rows = table_instance.scan(
+        row_start=prefix.encode("utf-8") if prefix else None,
+        row_stop=query.successor(prefix).encode("utf-8") if prefix else None,
+        columns=columns, limit=limit, filter=RowKeyRegexFilter(key_regex))
+    if metrics.get_metrics().enabled:
+        yield from _timed_scan(rows, lambda key, row, laps: _decode(key, row, index_query.sep, fast, laps))
+        return
+    for key, row in rows:
+        yield _decode(key, row, index_query.sep, fast)
+
+
+def query_rows(
+    table_instance: happybase.Table,
+    index_query: index.IndexQuery,
+    index_table: Optional[happybase.Table] = None,
+    indexes: List[str] = (),
+    index_bucket: int = 60,
+    max_index_rows: int = 10000,
+    chunk_size: int = 100,
+    max_workers: int = 8,
+    columns: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    fast: bool = False,
+    plans: Optional[List[str]] = None,
+) -> Iterator:
+    """Execute the given query with the plan chosen by :func:`plan_query`.
+
+    An index plan reads the index entries, drops those not selected by the
+    query, and fetches the remaining rows from the main table by
+    :func:`get_rowkeys`, a page of at most ``max_index_rows`` entries at a
+    time, so that neither the memory nor the latency of the first rows
+    grows with the number of entries.
+
+    Args:
+        table_instance (happybase.Table): The main table instance.
+        index_query (index.IndexQuery): The query.
+        index_table (happybase.Table, optional): The index table instance.
+        indexes (List[str]): The kinds of index available in ``index_table``.
+        index_bucket (int): The number of seconds of a time bucket of the ``time`` index.
+        max_index_rows (int): The maximum number of index entries looked up at once.
+        chunk_size (int): The maximum number of row keys per request.
+        max_workers (int): The maximum number of concurrent requests.
+        columns (List[str], optional): The columns or column families to retrieve when scanning.
+        limit (int, optional): The maximum number of rows to return.
+        fast (bool): Yield unvalidated ``decoder.OddRow`` objects instead of ``RowModelOdd``.
+        plans (List[str], optional): If given, the plan executed is appended to it.
+
+    Yields:
+        models.RowModelOdd: The rows selected by the query, in index order for the index plans.
+    """
+    plan = plan_query(index_query, list(indexes) if index_table is not None else [])
+    if plans is not None:
+        plans.append(plan)
+
+    if plan == "prefix":
+        odds_query = query.OddsQuery(**index_query.dict())
+        yield from query.scan_query(table_instance, odds_query, columns, limit, fast)
+    elif plan == "scan":
+        yield from _scan_table(table_instance, index_query, columns, limit, fast)
+    else:
+        entries = index.scan_index(index_table, index_query, plan, index_bucket)
+        remaining = limit
+        while remaining is None or remaining > 0:
+            page = list(itertools.islice(entries, max_index_rows))
+            if not page:
+                break
+            # A row has a single entry per kind of index, so the entries need no deduplication.
+            rowkeys = [
+                rowkey for rowkey in (entry.decode("utf-8") for entry in page)
+                if index_query.matches(keycodec.decode(rowkey, index_query.sep))]
+            rows = get_rowkeys(
+                table_instance, rowkeys[:remaining], index_query.sep, chunk_size, max_workers, fast=fast)
+            if remaining is not None:
+                remaining -= len(rows)
+            yield from rows
 
 
 def main(
@@ -180,6 +653,22 @@ def main(
     start_rowkey: str, 
     stop_rowkey: str, 
     rowkey_sep: str,
+    chunk_size: int = 100,
+    max_workers: int = 8,
+    limit: Optional[int] = None,
+    columns: Optional[List[str]] = None,
+    parallel: int = 1,
+    unordered: bool = False,
+    admin: bool = True,
+    fast: bool = False,
+    odds_query: Optional[query.OddsQuery] = None,
+    rollup_bucket: Optional[str] = None,
+    index_query: Optional[index.IndexQuery] = None,
+    index_table_name: Optional[str] = None,
+    indexes: List[str] = (),
+    follow_options: Optional[follow.FollowOptions] = None,
+    columnar_path: Optional[str] = None,
+    warm_up: bool = False,
 ) -> None:
     """The main function of ``getrows.py`` program.
 
@@ -193,22 +682,92 @@ def main(
         rowkey (List[str]): A list of specified row keys.
         start_rowkey (str): A row key indicates the start of a row key range to scan.
         end_rowkey (str): A row key indicates the stop of a row key range to scan.
+        rowkey_sep (str): The delimiter used in the row key.
+        chunk_size (int): The maximum number of row keys per request.
+        max_workers (int): The maximum number of concurrent requests.
+        limit (int, optional): The maximum number of rows to scan.
+        columns (List[str], optional): The columns or column families to retrieve when scanning.
+        parallel (int): The number of concurrent scans over sub-ranges of the range.
+        unordered (bool): Print rows of a parallel scan as they arrive instead of in row key order.
+        admin (bool): Whether to use a client with admin access instead of a data-only client.
+        fast (bool): Decode rows into unvalidated ``decoder.OddRow`` objects.
+        odds_query (query.OddsQuery, optional): Select rows by row key prefix and time window instead of a row key range.
+        rollup_bucket (str, optional): Read the OHLC rollups of ``odds_query`` at this bucket size from ``table_name`` instead of rows.
+        index_query (index.IndexQuery, optional): Select rows by fields without the match, through :func:`query_rows`.
+        index_table_name (str, optional): The index table used for ``index_query``.
+        indexes (List[str]): The kinds of index available in ``index_table_name``.
+        follow_options (follow.FollowOptions, optional): Keep printing the rows of ``odds_query`` as they are written, until interrupted.
+        columnar_path (str, optional): Scan the row key range into the arrays of :mod:`columnar` saved to this ``.npz`` file instead of printing the rows.
+        warm_up (bool): Open the channels of the tables before the query, so that its latency excludes them.
     """
-    table = get_table_instance(project_id, instance_id, table_name)
+    if warm_up:
+        start = time.perf_counter()
+        table_names = [table_name]
+        if index_query is not None and indexes and index_table_name:
+            table_names.append(index_table_name)
+        pool.get_pool(admin).warm_up(project_id, instance_id, table_names)
+        print("Elapsed time for warming up: {}s".format(time.perf_counter() - start))
+    table = get_table_instance(project_id, instance_id, table_name, admin)
     if rowkeys and len(rowkeys) >= 1:
-        start = time.process_time()
-        model_list = get_rowkeys(table, rowkeys, rowkey_sep)
-        end = time.process_time()
+        missing: List[str] = []
+        start = time.perf_counter()
+        model_list = get_rowkeys(
+            table, rowkeys, rowkey_sep, chunk_size, max_workers, missing, fast)
+        end = time.perf_counter()
         print("Elapsed time for getting single row: {}s".format(end - start))
         for model in model_list:
-            print(model.dict())
+            print(model._asdict() if fast else model.dict())
+        if missing:
+            print("Row keys not found: {}".format(missing))
+    elif columnar_path is not None:
+        start = time.perf_counter()
+        odds_columns = columnar.scan_columnar(table, start_rowkey, stop_rowkey, rowkey_sep, limit)
+        columnar.save_columnar(odds_columns, columnar_path)
+        end = time.perf_counter()
+        print("Elapsed time for scanning {} rows into {}: {}s".format(len(odds_columns.ts), columnar_path, end - start))
     else:
-        start = time.process_time()
-        model_list = scan_rows_range(table, start_rowkey, stop_rowkey, rowkey_sep)
-        end = time.process_time()
-        print("Elapsed time for scanning row range: {}s".format(end - start))
-        for model in model_list:
-            print(model.dict())
+        start = time.perf_counter()
+        count = 0
+        if odds_query is not None and rollup_bucket is not None:
+            results = rollup.scan_rollups(table, rollup_bucket, odds_query, limit)
+            # Rollups are printed as plain named tuples like ``decoder.OddRow``.
+            fast = True
+        elif odds_query is not None and follow_options is not None:
+            results = follow.follow_rows(table, odds_query, follow_options.copy(update={"fast": fast}))
+        elif odds_query is not None:
+            results = query.scan_query(table, odds_query, columns, limit, fast)
+        elif index_query is not None:
+            index_table = None
+            if indexes and index_table_name:
+                index_table = get_table_instance(project_id, instance_id, index_table_name, admin)
+            plans: List[str] = []
+            results = query_rows(
+                table, index_query, index_table, indexes,
+                chunk_size=chunk_size, max_workers=max_workers, columns=columns,
+                limit=limit, fast=fast, plans=plans)
+        elif parallel > 1:
+            results = parallel_scan_rows_range(
+                table, start_rowkey, stop_rowkey, rowkey_sep,
+                parallel, not unordered, columns=columns, limit=limit, fast=fast)
+        else:
+            results = iter_rows_range(
+                table, start_rowkey, stop_rowkey, rowkey_sep,
+                limit, columns, fast=fast)
+        try:
+            for model in results:
+                if count == 0:
+                    print("Elapsed time for the first row: {}s".format(
+                        time.perf_counter() - start))
+                print(model._asdict() if fast else model.dict(), flush=True)
+                count += 1
+        except KeyboardInterrupt:
+            # Following only ends when interrupted.
+            if follow_options is None:
+                raise
+        end = time.perf_counter()
+        print("Elapsed time for scanning {} rows: {}s".format(count, end - start))
+        if odds_query is None and index_query is not None:
+            print("Query plan: {}".format(plans[0] if plans else plan_query(index_query, indexes)))
 
 
 if __name__ == "__main__":
@@ -232,14 +791,14 @@ if __name__ == "__main__":
     parser.add_argument(
         '--rowkey',
         action="append",
-        help=("A given row key with \"#\" as seperator. Once specified, "
+        help=("A given row key with \"--rowkey-sep\" as seperator. Once specified, "
               "\'--start-rowkey\' and \'--end-rowkey\' will have no effect."),
     )
     parser.add_argument(
         "--rowkey-sep",
         type=str,
-        default="#",
-        help="The delimiter used in the row key. Defaults to \"#\""
+        default=":",
+        help="The delimiter used in the row key."
     )
     parser.add_argument(
         "--start-rowkey",
@@ -255,7 +814,172 @@ if __name__ == "__main__":
               "parameter must be used against \'--start-rowkey\'."),
         default=""
     )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=100,
+        help="The maximum number of row keys fetched per request."
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=8,
+        help="The maximum number of concurrent requests for row keys."
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        help="The maximum number of rows to scan."
+    )
+    parser.add_argument(
+        "--column",
+        action="append",
+        dest="columns",
+        help=("A column family (e.g. \"odds\") or column (e.g. \"info:s\") "
+              "to retrieve when scanning. Defaults to all columns.")
+    )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=1,
+        help="The number of concurrent scans over sub-ranges of the row key range."
+    )
+    parser.add_argument(
+        "--unordered",
+        action="store_true",
+        help="Print rows of a parallel scan as they arrive instead of in row key order."
+    )
+    parser.add_argument(
+        "--columnar",
+        type=str,
+        metavar="PATH",
+        help="Scan the row key range into NumPy arrays saved to the given .npz file instead of printing the rows."
+    )
+    parser.add_argument(
+        "--data-only",
+        action="store_true",
+        help="Use a data-only client instead of a client with admin access."
+    )
+    parser.add_argument(
+        "--warm-up",
+        action="store_true",
+        help="Open the channels of the tables before the query, so that its timings exclude them."
+    )
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="Decode rows without pydantic validation."
+    )
+
+    for field in query.FIELDS:
+        parser.add_argument(
+            "--{}".format(field),
+            type=str,
+            help=("Select rows by the row key field \'{}\'. Once \'--sid\', "
+                  "\'--lid\' and \'--mid\' are given, \'--start-rowkey\' and "
+                  "\'--stop-rowkey\' have no effect.").format(field)
+        )
+    parser.add_argument(
+        "--ts-from",
+        type=int,
+        help="Select rows created at or after this epoch timestamp."
+    )
+    parser.add_argument(
+        "--ts-to",
+        type=int,
+        help="Select rows created at or before this epoch timestamp."
+    )
+    parser.add_argument(
+        "--rowkey-version",
+        type=int,
+        choices=[1, 2],
+        default=1,
+        help="The row key layout selected rows are stored with."
+    )
+    parser.add_argument(
+        "--rollup",
+        type=str,
+        choices=sorted(rollup.BUCKETS),
+        help=("Read the OHLC rollups of the rows selected by '--sid', "
+              "'--lid', '--mid', ... at the given bucket size. '--table' "
+              "must then be the rollup table.")
+    )
+    parser.add_argument(
+        "--index",
+        action="append",
+        choices=list(index.KINDS),
+        default=[],
+        help=("A secondary index available to select rows without '--sid', "
+              "'--lid' and '--mid', e.g. by '--vendor' or '--ts-from'.")
+    )
+    parser.add_argument(
+        "--index-table",
+        type=str,
+        help="Table of the secondary indexes. Defaults to \"<table>_index\"."
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help=("Keep polling for the rows selected by '--sid', '--lid', "
+              "'--mid', ... and print them as they are written, until "
+              "interrupted.")
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=0.5,
+        help="The number of seconds between two polls of '--follow' while rows keep arriving."
+    )
+    parser.add_argument(
+        "--max-poll-interval",
+        type=float,
+        default=10.0,
+        help="The maximum number of seconds between two polls of '--follow' without new rows."
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=str,
+        help=("Write the time per stage, the latency per operation and the "
+              "counts of rows, cells and bytes read to this file on exit, "
+              "as JSON if it ends with \".json\", otherwise in the "
+              "Prometheus text format.")
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        help="Also write '--metrics-file' every given number of seconds."
+    )
 
     args = parser.parse_args()
+    if args.metrics_file:
+        metrics.export(args.metrics_file, args.metrics_interval)
+    odds_query = None
+    index_query = None
+    fields = {field: getattr(args, field) for field in query.FIELDS}
+    if args.sid and args.lid and args.mid:
+        odds_query = query.OddsQuery(
+            **fields, ts_from=args.ts_from, ts_to=args.ts_to,
+            version=args.rowkey_version, sep=args.rowkey_sep)
+    elif any(fields.values()) or args.ts_from is not None or args.ts_to is not None:
+        index_query = index.IndexQuery(
+            **fields, ts_from=args.ts_from, ts_to=args.ts_to,
+            version=args.rowkey_version, sep=args.rowkey_sep)
+    if args.chunk_size < 1:
+        parser.error("'--chunk-size' must be positive")
+    if args.rollup and odds_query is None:
+        parser.error("'--rollup' requires '--sid', '--lid' and '--mid'")
+    if args.follow and (odds_query is None or args.rollup):
+        parser.error("'--follow' requires '--sid', '--lid' and '--mid', without '--rollup'")
+    if args.columnar and (args.rowkey or odds_query is not None or index_query is not None):
+        parser.error("'--columnar' only applies to a row key range scan")
     main(args.project_id, args.instance_id, args.table,
-         args.rowkey, args.start_rowkey, args.stop_rowkey, args.rowkey_sep)
+         args.rowkey, args.start_rowkey, args.stop_rowkey, args.rowkey_sep,
+         args.chunk_size, args.max_workers,
+         args.limit, args.columns,
+         args.parallel, args.unordered, not args.data_only, args.fast,
+         odds_query, args.rollup, index_query,
+         args.index_table or "{}_index".format(args.table), args.index,
+         follow.FollowOptions(
+             min_interval=args.poll_interval, max_interval=args.max_poll_interval,
+             columns=args.columns) if args.follow else None,
+         args.columnar, args.warm_up)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+
+
+import keycodec
+from google.cloud import happybase
+from pydantic import BaseModel
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+KINDS = ("vendor", "time")
+COLUMN = b"idx:k"
+SEP = "#"
+
+
+class IndexQuery(BaseModel):
+    """A selection of rows which does not necessarily start with the match.
+
+    Args:
+        sid (str, optional): The sport ID.
+        lid (str, optional): The league ID.
+        mid (str, optional): The match ID.
+        mkt (str, optional): The market.
+        seq (str, optional): The sequence of the odd pair within the market.
+        per (str, optional): The period.
+        vendor (str, optional): The vendor.
+        ts_from (int, optional): The lower bound of the epoch timestamps, inclusive.
+        ts_to (int, optional): The upper bound of the epoch timestamps, inclusive.
+        version (int): The version of the row key layout in :mod:`keycodec`.
+        sep (str): The delimiter used in the row keys of the original layout.
+    """
+    sid: Optional[str] = None
+    lid: Optional[str] = None
+    mid: Optional[str] = None
+    mkt: Optional[str] = None
+    seq: Optional[str] = None
+    per: Optional[str] = None
+    vendor: Optional[str] = None
+    ts_from: Optional[int] = None
+    ts_to: Optional[int] = None
+    version: int = 1
+    sep: str = ":"
+
+    def matches(self, key: keycodec.RowKey) -> bool:
+        """Check whether the given row key fields are selected by this query.
+
+        Args:
+            key (keycodec.RowKey): The fields of a row key.
+
+        Returns:
+            bool: Whether the row is selected.
+        """
+        for field, value in zip(keycodec.RowKey._fields[:7], key):
+            wanted = getattr(self, field)
+            if wanted is not None and wanted != value:
+                return False
+        if self.ts_from is not None and key.ts < self.ts_from:
+            return False
+        if self.ts_to is not None and key.ts > self.ts_to:
+            return False
+        return True
+
+
+def _ts(ts: int) -> str:
+    return str(int(ts)).zfill(len(str(keycodec.MAX_TS)))
+
+
+def vendor_entry(vendor: str, ts: int, rowkey: str) -> str:
+    """Generate the index row key ``vendor#<vendor>#<ts>#<rowkey>``.
+
+    Args:
+        vendor (str): The vendor.
+        ts (int): The epoch timestamp of the row.
+        rowkey (str): The row key in the main table.
+
+    Returns:
+        str: The index row key.
+    """
+    return SEP.join(("vendor", vendor, _ts(ts), rowkey))
+
+
+def time_entry(ts: int, rowkey: str, bucket: int = 60) -> str:
+    """Generate the index row key ``time#<bucket start>#<rowkey>``.
+
+    Args:
+        ts (int): The epoch timestamp of the row.
+        rowkey (str): The row key in the main table.
+        bucket (int): The number of seconds of a time bucket.
+
+    Returns:
+        str: The index row key.
+    """
+    return SEP.join(("time", _ts(ts - ts % bucket), rowkey))
+
+
+def entry_rowkey(entry: bytes) -> bytes:
+    """Get the main table row key an index row key points to.
+
+    Args:
+        entry (bytes): The index row key.
+
+    Returns:
+        bytes: The row key in the main table.
+    """
+    kind = entry.split(SEP.encode("utf-8"), 1)[0]
+    return entry.split(SEP.encode("utf-8"), 3 if kind == b"vendor" else 2)[-1]
+
+
+class Indexer(object):
+    """Write the index entries of rows written into the main table.
+
+    Args:
+        table (happybase.Table): The index table instance, with the column family ``idx``.
+        kinds (Sequence[str]): The kinds of index among :data:`KINDS`.
+        bucket (int): The number of seconds of a time bucket of the ``time`` index.
+        sep (str): The delimiter used in the row keys of the original layout.
+    """
+
+    def __init__(self, table, kinds: Sequence[str] = KINDS, bucket: int = 60, sep: str = ":"):
+        unknown = set(kinds) - set(KINDS)
+        if unknown:
+            raise ValueError("Unknown index kinds: {}".format(sorted(unknown)))
+        self.table = table
+        self.kinds = tuple(kinds)
+        self.bucket = bucket
+        self._sep = sep
+
+    def entries(self, rowkey: str) -> List[str]:
+        """Generate the index row keys of a row.
+
+        Args:
+            rowkey (str): The row key in the main table.
+
+        Returns:
+            List[str]: The index row keys.
+        """
+        key = keycodec.decode(rowkey, self._sep)
+        entries = []
+        if "vendor" in self.kinds:
+            entries.append(vendor_entry(key.vendor, key.ts, rowkey))
+        if "time" in self.kinds:
+            entries.append(time_entry(key.ts, rowkey, self.bucket))
+        return entries
+
+    def write(self, rowkeys: Iterable[str]) -> int:
+        """Write the index entries of rows by means of one batch.
+
+        Args:
+            rowkeys (Iterable[str]): The row keys in the main table, already written.
+
+        Returns:
+            int: The number of index entries written.
+        """
+        count = 0
+        with self.table.batch() as batch:
+            for rowkey in rowkeys:
+                for entry in self.entries(rowkey):
+                    batch.put(entry, {COLUMN: b""})
+                    count += 1
+        return count
+
+
+def index_range(query: IndexQuery, kind: str, bucket: int = 60) -> Tuple[bytes, bytes]:
+    """Get the range of the index entries possibly selected by the given query.
+
+    Args:
+        query (IndexQuery): The query.
+        kind (str): The kind of index among :data:`KINDS`.
+        bucket (int): The number of seconds of a time bucket of the ``time`` index.
+
+    Returns:
+        Tuple[bytes, bytes]: The start and the stop of the range.
+    """
+    ts_from = query.ts_from if query.ts_from is not None else 0
+    ts_to = query.ts_to if query.ts_to is not None else keycodec.MAX_TS
+    if kind == "vendor":
+        if query.vendor is None:
+            raise ValueError("The vendor index needs a vendor")
+        prefix = SEP.join(("vendor", query.vendor, ""))
+        start, stop = prefix + _ts(ts_from), prefix + _ts(ts_to) + "$"
+    elif kind == "time":
+        start = SEP.join(("time", _ts(ts_from - ts_from % bucket)))
+        stop = SEP.join(("time", _ts(ts_to - ts_to % bucket))) + "$"
+    else:
+        raise ValueError("Unknown index kind: {}".format(kind))
+    # "$" is the character right after the delimiter "#".
+    return start.encode("utf-8"), stop.encode("utf-8")
+
+
+def scan_index(
+    index_table: happybase.Table,
+    query: IndexQuery,
+    kind: str,
+    bucket: int = 60,
+    limit: Optional[int] = None,
+) -> Iterator[bytes]:
+    """Scan an index for the main table row keys possibly selected by the given query.
+
+    The entries are only bounded by the vendor and the time window. The
+    other fields, and the exact time window of the ``time`` index, have to
+    be checked by :meth:`IndexQuery.matches`.
+
+    Args:
+        index_table (happybase.Table): The index table instance.
+        query (IndexQuery): The query.
+        kind (str): The kind of index among :data:`KINDS`.
+        bucket (int): The number of seconds of a time bucket of the ``time`` index.
+        limit (int, optional): The maximum number of index entries to read.
+
+    Yields:
+        bytes: The row keys in the main table, in index order.
+    """
+    start, stop = index_range(query, kind, bucket)
+    for entry, _ in index_table.scan(row_start=start, row_stop=stop, limit=limit):
+        yield entry_rowkey(entry)
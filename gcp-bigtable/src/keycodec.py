@@ -0,0 +1,312 @@
+#!/usr/bin/env python
+
+
+import abc
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+
+MAX_TS = 9999999999
+
+
+def _group(alternatives: List[str]) -> str:
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return "(?:" + "|".join(alternatives) + ")"
+
+
+def _same_length_range(lo: str, hi: str) -> List[str]:
+    if lo == hi:
+        return [lo]
+    rest = len(lo) - 1
+    if rest == 0:
+        return ["[{}-{}]".format(lo, hi)]
+    if lo[0] == hi[0]:
+        return [lo[0] + _group(_same_length_range(lo[1:], hi[1:]))]
+    if lo[1:] == "0" * rest and hi[1:] == "9" * rest:
+        return ["[{}-{}][0-9]{{{}}}".format(lo[0], hi[0], rest)]
+    alternatives = [lo[0] + _group(_same_length_range(lo[1:], "9" * rest))]
+    if int(hi[0]) - int(lo[0]) > 1:
+        alternatives.append("[{}-{}][0-9]{{{}}}".format(int(lo[0]) + 1, int(hi[0]) - 1, rest))
+    alternatives.append(hi[0] + _group(_same_length_range("0" * rest, hi[1:])))
+    return alternatives
+
+
+def numeric_range_regex(lo: int, hi: int, width: Optional[int] = None) -> str:
+    """Generate a regular expression matching the integers in ``[lo, hi]``.
+
+    Args:
+        lo (int): The lower bound, inclusive.
+        hi (int): The upper bound, inclusive.
+        width (int, optional): The width the integers are zero-padded to. Unpadded if not given.
+
+    Returns:
+        str: The regular expression, without anchors.
+    """
+    if lo > hi or lo < 0:
+        raise ValueError("Invalid range: [{}, {}]".format(lo, hi))
+    if width is not None:
+        return _group(_same_length_range(str(lo).zfill(width), str(hi).zfill(width)))
+    alternatives: List[str] = []
+    while lo <= hi:
+        upper = min(hi, 10 ** len(str(lo)) - 1)
+        alternatives.extend(_same_length_range(str(lo), str(upper)))
+        lo = upper + 1
+    return _group(alternatives)
+
+
+class RowKey(NamedTuple):
+    """The fields of a row key.
+
+    Attributes:
+        sid (str): The sport ID.
+        lid (str): The league ID.
+        mid (str): The match ID.
+        mkt (str): The abbriviated market name, e.g., `1x2`, `ah`, `ou`, `ah_1st`, `ou_1st`, etc.
+        seq (str): The sequence of the odd pair within the market.
+        per (str): The abbriviated period, e.g., `pre`, `1h`, `2h`.
+        vendor (str): The vendor from which the odd messages originate.
+        ts (int): The epoch timestamp of the creation time of the odd message.
+    """
+    sid: str
+    lid: str
+    mid: str
+    mkt: str
+    seq: str
+    per: str
+    vendor: str
+    ts: int
+
+
+class RowKeyCodec(abc.ABC):
+    """Base class of the row key layouts.
+
+    Attributes:
+        version (int): The version of the layout.
+        sep (str): The delimiter of the fields.
+    """
+    version: int = 0
+    sep: str = ":"
+
+    @abc.abstractmethod
+    def encode(self, key: RowKey) -> str:
+        """Encode the given fields into a row key.
+
+        Args:
+            key (RowKey): The fields of the row key.
+
+        Returns:
+            str: The row key.
+        """
+
+    @abc.abstractmethod
+    def decode(self, rowkey: str) -> RowKey:
+        """Decode the given row key into its fields.
+
+        Args:
+            rowkey (str): The row key.
+
+        Returns:
+            RowKey: The fields of the row key.
+        """
+
+    @abc.abstractmethod
+    def ts_range(self, ts_from: int, ts_to: int) -> Optional[Tuple[str, str]]:
+        """Encode the bounds of the timestamp field for ``ts`` in ``[ts_from, ts_to]``.
+
+        Args:
+            ts_from (int): The lower bound of the timestamps, inclusive.
+            ts_to (int): The upper bound of the timestamps, inclusive.
+
+        Returns:
+            Optional[Tuple[str, str]]: The inclusive lower bound and the
+            exclusive upper bound of the timestamp field, or ``None`` if the
+            timestamps in the range do not sort lexicographically.
+        """
+
+    @abc.abstractmethod
+    def ts_regex(self, ts_from: int, ts_to: int) -> str:
+        """Generate a regular expression matching the timestamp field for ``ts`` in ``[ts_from, ts_to]``.
+
+        Args:
+            ts_from (int): The lower bound of the timestamps, inclusive.
+            ts_to (int): The upper bound of the timestamps, inclusive.
+
+        Returns:
+            str: The regular expression, without anchors.
+        """
+
+    def field_regex(self, index: int, value) -> str:
+        """Generate a regular expression matching the field ``index`` equal to ``value``.
+
+        Args:
+            index (int): The index of the field in :class:`RowKey`.
+            value: The value of the field.
+
+        Returns:
+            str: The regular expression, without anchors.
+        """
+        return re.escape(str(value))
+
+    @abc.abstractmethod
+    def prefix(self, *fields) -> str:
+        """Encode the leading fields ``sid``, ``lid``, ``mid``, ``mkt``, ... into a row key prefix.
+
+        The prefix ends with the delimiter, so that ``1:2:3`` never matches
+        the match ``33``.
+
+        Args:
+            *fields: The leading fields of the row key, at most the first seven.
+
+        Returns:
+            str: The row key prefix.
+        """
+
+
+class AscendingTsCodec(RowKeyCodec):
+    """The original layout ``<sid>:<lid>:<mid>:<mkt>:<seq>:<per>:<vendor>:<ts>``.
+
+    Rows of a series are sorted from the oldest to the newest.
+
+    Args:
+        sep (str): The delimiter of the fields.
+    """
+    version = 1
+
+    def __init__(self, sep: str = ":"):
+        self.sep = sep
+
+    def encode(self, key: RowKey) -> str:
+        return self.sep.join(str(field) for field in key)
+
+    def decode(self, rowkey: str) -> RowKey:
+        sid, lid, mid, mkt, seq, per, vendor, ts = rowkey.split(self.sep)
+        return RowKey(sid, lid, mid, mkt, seq, per, vendor, int(ts))
+
+    def prefix(self, *fields) -> str:
+        return "".join(str(field) + self.sep for field in fields)
+
+    def ts_range(self, ts_from: int, ts_to: int) -> Optional[Tuple[str, str]]:
+        # Unpadded timestamps only sort numerically if they have the same number of digits.
+        lo, hi = str(ts_from), str(ts_to)
+        if len(lo) != len(hi):
+            return None
+        # The timestamp is the last field, so nothing but ``hi`` itself sorts before ``hi + "\x00"``.
+        return lo, hi + "\x00"
+
+    def ts_regex(self, ts_from: int, ts_to: int) -> str:
+        return numeric_range_regex(ts_from, ts_to)
+
+
+class ReverseTsCodec(RowKeyCodec):
+    """The layout ``v2:<sid>:<lid>:<mid>:<mkt>:<seq>:<per>:<vendor>:<MAX_TS - ts>``.
+
+    The numeric fields are zero-padded so that they sort numerically, and
+    the timestamp is reversed so that the rows of a series are sorted from
+    the newest to the oldest. The latest N rows of a series are thus the
+    first N rows of its prefix.
+    """
+    version = 2
+    tag = "v2"
+    widths: Dict[int, int] = {0: 3, 1: 6, 2: 10, 4: 3}
+    ts_width = len(str(MAX_TS))
+
+    def _field(self, index: int, value) -> str:
+        width = self.widths.get(index)
+        if width is None:
+            return str(value)
+        text = str(int(value)).zfill(width)
+        if len(text) > width:
+            raise ValueError("Field {} of the row key exceeds {} digits: {}".format(index, width, value))
+        return text
+
+    def encode(self, key: RowKey) -> str:
+        fields = [self._field(i, value) for i, value in enumerate(key[:7])]
+        fields.append(str(MAX_TS - int(key.ts)).zfill(self.ts_width))
+        return self.sep.join([self.tag] + fields)
+
+    def decode(self, rowkey: str) -> RowKey:
+        _, sid, lid, mid, mkt, seq, per, vendor, rts = rowkey.split(self.sep)
+        return RowKey(
+            str(int(sid)), str(int(lid)), str(int(mid)), mkt, str(int(seq)),
+            per, vendor, MAX_TS - int(rts))
+
+    def prefix(self, *fields) -> str:
+        return "".join(
+            text + self.sep for text in
+            [self.tag] + [self._field(i, value) for i, value in enumerate(fields)])
+
+    def field_regex(self, index: int, value) -> str:
+        return re.escape(self._field(index, value))
+
+    def ts_range(self, ts_from: int, ts_to: int) -> Optional[Tuple[str, str]]:
+        return self.ts_bound(ts_to), self.ts_bound(ts_from) + "\x00"
+
+    def ts_regex(self, ts_from: int, ts_to: int) -> str:
+        return numeric_range_regex(MAX_TS - ts_to, MAX_TS - ts_from, self.ts_width)
+
+    def ts_bound(self, ts: int) -> str:
+        """Encode the timestamp field of the row key.
+
+        Args:
+            ts (int): The epoch timestamp.
+
+        Returns:
+            str: The reversed and zero-padded timestamp.
+        """
+        return str(MAX_TS - int(ts)).zfill(self.ts_width)
+
+
+LEGACY = AscendingTsCodec()
+LATEST_FIRST = ReverseTsCodec()
+_CODECS: Dict[int, RowKeyCodec] = {LEGACY.version: LEGACY, LATEST_FIRST.version: LATEST_FIRST}
+
+
+def get_codec(version: int) -> RowKeyCodec:
+    """Get the codec of the given layout ``version``.
+
+    Args:
+        version (int): The version of the row key layout, i.e., 1 or 2.
+
+    Returns:
+        RowKeyCodec: The codec.
+    """
+    try:
+        return _CODECS[version]
+    except KeyError:
+        raise ValueError("Unknown row key version: {}".format(version))
+
+
+def detect_codec(rowkey: Union[str, bytes], sep: Optional[str] = None) -> RowKeyCodec:
+    """Detect the codec of the given row key.
+
+    Args:
+        rowkey (Union[str, bytes]): The row key.
+        sep (str, optional): The delimiter of a row key in the original layout. Defaults to ``":"``.
+
+    Returns:
+        RowKeyCodec: The codec the row key was encoded with.
+    """
+    tag = LATEST_FIRST.tag + LATEST_FIRST.sep
+    if isinstance(rowkey, bytes):
+        tag = tag.encode("utf-8")
+    if rowkey.startswith(tag):
+        return LATEST_FIRST
+    if sep is None or sep == LEGACY.sep:
+        return LEGACY
+    return AscendingTsCodec(sep)
+
+
+def decode(rowkey: Union[str, bytes], sep: Optional[str] = None) -> RowKey:
+    """Decode a row key of any layout into its fields.
+
+    Args:
+        rowkey (Union[str, bytes]): The row key.
+        sep (str, optional): The delimiter of a row key in the original layout. Defaults to ``":"``.
+
+    Returns:
+        RowKey: The fields of the row key.
+    """
+    if isinstance(rowkey, bytes):
+        rowkey = rowkey.decode("utf-8")
+    return detect_codec(rowkey, sep).decode(rowkey)
@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+
+
+import re
+import threading
+import time
+from bisect import bisect_left
+from google.cloud.bigtable.row_filters import CellsRowLimitFilter
+from google.cloud.bigtable.row_filters import RowFilterChain
+from google.cloud.bigtable.row_filters import RowKeyRegexFilter
+from google.cloud.bigtable.row_filters import StripValueTransformerFilter
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+
+Key = Union[str, bytes]
+
+
+def _to_bytes(value: Key) -> bytes:
+    return value.encode("utf-8") if isinstance(value, str) else value
+
+
+def _prefix_stop(prefix: bytes) -> Optional[bytes]:
+    stripped = prefix.rstrip(b"\xff")
+    return stripped[:-1] + bytes([stripped[-1] + 1]) if stripped else None
+
+
+class _Status(NamedTuple):
+    code: int = 0
+    message: str = ""
+
+
+class _Sample(NamedTuple):
+    row_key: bytes
+    offset_bytes: int
+
+
+class _Row(object):
+    """A row mutation as built by ``google.cloud.bigtable.table.Table.row``."""
+
+    def __init__(self, row_key: Key):
+        self.row_key = _to_bytes(row_key)
+        self.cells: Dict[bytes, bytes] = {}
+
+    def set_cell(self, column_family_id: str, column: Key, value: bytes, timestamp=None) -> None:
+        self.cells[column_family_id.encode("utf-8") + b":" + _to_bytes(column)] = value
+
+
+class _LowLevelTable(object):
+    """The subset of ``google.cloud.bigtable.table.Table`` used through ``_low_level_table``."""
+
+    def __init__(self, table: "MemoryTable"):
+        self._table = table
+
+    def row(self, row_key: Key) -> _Row:
+        return _Row(row_key)
+
+    def mutate_rows(self, rows: List[_Row], retry=None) -> List[_Status]:
+        self._table._rpc("mutate_rows", [row.row_key for row in rows])
+        with self._table._lock:
+            for row in rows:
+                self._table._put(row.row_key, row.cells)
+                row.cells = {}
+        return [_Status() for _ in rows]
+
+    def sample_row_keys(self) -> List[_Sample]:
+        keys = self._table._sorted_keys()
+        step = max(1, len(keys) // self._table.samples)
+        return [_Sample(key, i) for i, key in enumerate(keys[step - 1::step])]
+
+
+class MemoryBatch(object):
+    """A stand-in of ``happybase.Batch`` writing into a :class:`MemoryTable`.
+
+    As ``happybase.Batch``, the pending mutations are sent on exit, and
+    after every ``batch_size`` mutations if given. Every send is one RPC.
+
+    Args:
+        table (MemoryTable): The target table.
+        batch_size (int, optional): The number of mutations sent at once.
+    """
+
+    def __init__(self, table: "MemoryTable", batch_size: Optional[int] = None):
+        self._table = table
+        self._batch_size = batch_size
+        self._puts: Dict[bytes, Dict[bytes, bytes]] = {}
+        self._deletes: Dict[bytes, Optional[List[bytes]]] = {}
+        self._count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.send()
+
+    def put(self, row: Key, data: Dict[bytes, bytes], wal=None) -> None:
+        """Insert data into a row, as ``happybase.Batch.put``."""
+        self._puts.setdefault(_to_bytes(row), {}).update(data)
+        self._count += len(data)
+        if self._batch_size and self._count >= self._batch_size:
+            self.send()
+
+    def delete(self, row: Key, columns: Optional[Iterable[Key]] = None, wal=None) -> None:
+        """Delete a row or some of its columns, as ``happybase.Batch.delete``."""
+        key = _to_bytes(row)
+        self._puts.pop(key, None)
+        self._deletes[key] = [_to_bytes(c) for c in columns] if columns is not None else None
+        self._count += 1
+
+    def send(self) -> None:
+        """Send the pending mutations by means of one RPC."""
+        if not self._puts and not self._deletes:
+            return
+        self._table._rpc("send", list(self._deletes) + list(self._puts))
+        with self._table._lock:
+            for key, columns in self._deletes.items():
+                self._table._delete(key, columns)
+            for key, data in self._puts.items():
+                self._table._put(key, data)
+        self._puts = {}
+        self._deletes = {}
+        self._count = 0
+
+
+class MemoryTable(object):
+    """A sorted in-memory stand-in of ``happybase.Table``.
+
+    The rows are kept in a dictionary and sorted lazily, on the first scan
+    after new rows are written. Every call standing for an RPC, i.e.,
+    ``put``, ``delete``, a batch send, ``row``, ``rows`` and ``scan``,
+    waits for ``latency`` seconds and is counted in ``rpcs``. A scan is a
+    single streamed RPC, as in Cloud Bigtable, whose ``happybase.Table.scan``
+    ignores ``batch_size``. The ``RowKeyRegexFilter``, ``CellsRowLimitFilter`` and
+    ``StripValueTransformerFilter`` filters, possibly in a
+    ``RowFilterChain``, are honoured. A ``hook`` sees every RPC before it is
+    served, e.g., to record the calls or to fail one by raising.
+
+    Args:
+        name (str): The table name.
+        latency (float): The number of seconds injected per RPC.
+        sleep (Callable[[float], object]): The function waiting for a number of seconds.
+        samples (int): The number of row keys returned by ``sample_row_keys``.
+        hook (Callable[[str, str, List[bytes]], object], optional): Called with the table name, the
+            operation, i.e., ``put``, ``delete``, ``send``, ``mutate_rows``, ``row``, ``rows`` or ``scan``,
+            and the row keys of every RPC.
+
+    Attributes:
+        rpcs (int): The number of RPCs served.
+    """
+
+    def __init__(self, name: str = "odds", latency: float = 0.0,
+                 sleep: Callable[[float], object] = time.sleep, samples: int = 16,
+                 hook: Optional[Callable[[str, str, List[bytes]], object]] = None):
+        self.name = name
+        self.latency = latency
+        self.samples = samples
+        self.hook = hook
+        self.rpcs = 0
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._data: Dict[bytes, Dict[bytes, bytes]] = {}
+        self._keys: Optional[List[bytes]] = []
+        self._low_level_table = _LowLevelTable(self)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _rpc(self, operation: str, keys: List[bytes]) -> None:
+        if self.hook is not None:
+            self.hook(self.name, operation, keys)
+        with self._lock:
+            self.rpcs += 1
+        if self.latency > 0:
+            self._sleep(self.latency)
+
+    def _put(self, key: bytes, data: Dict[bytes, bytes]) -> None:
+        row = self._data.get(key)
+        if row is None:
+            self._data[key] = dict(data)
+            self._keys = None
+        else:
+            row.update(data)
+
+    def _delete(self, key: bytes, columns: Optional[List[bytes]]) -> None:
+        if columns is None:
+            if self._data.pop(key, None) is not None:
+                self._keys = None
+            return
+        row = self._data.get(key, {})
+        for column in columns:
+            if column.endswith(b":") or b":" not in column:
+                family = column.rstrip(b":") + b":"
+                for name in [name for name in row if name.startswith(family)]:
+                    del row[name]
+            else:
+                row.pop(column, None)
+        if key in self._data and not row:
+            del self._data[key]
+            self._keys = None
+
+    def _sorted_keys(self) -> List[bytes]:
+        with self._lock:
+            if self._keys is None:
+                self._keys = sorted(self._data)
+            return self._keys
+
+    @staticmethod
+    def _project(row: Dict[bytes, bytes], columns: Optional[Iterable[Key]]) -> Dict[bytes, bytes]:
+        if columns is None:
+            return dict(row)
+        wanted = [_to_bytes(column) for column in columns]
+        families = tuple(c.rstrip(b":") + b":" for c in wanted if b":" not in c or c.endswith(b":"))
+        exact = {c for c in wanted if b":" in c and not c.endswith(b":")}
+        return {name: value for name, value in row.items() if name in exact or name.startswith(families)}
+
+    def put(self, row: Key, data: Dict[bytes, bytes], timestamp=None, wal=None) -> None:
+        """Insert data into a row, as ``happybase.Table.put``."""
+        self._rpc("put", [_to_bytes(row)])
+        with self._lock:
+            self._put(_to_bytes(row), data)
+
+    def delete(self, row: Key, columns: Optional[Iterable[Key]] = None, timestamp=None, wal=None) -> None:
+        """Delete a row or some of its columns, as ``happybase.Table.delete``."""
+        self._rpc("delete", [_to_bytes(row)])
+        with self._lock:
+            self._delete(_to_bytes(row), [_to_bytes(c) for c in columns] if columns is not None else None)
+
+    def batch(self, timestamp=None, batch_size: Optional[int] = None, transaction: bool = False,
+              wal=None) -> MemoryBatch:
+        """Create a batch, as ``happybase.Table.batch``."""
+        return MemoryBatch(self, batch_size)
+
+    def row(self, row: Key, columns: Optional[Iterable[Key]] = None, timestamp=None,
+            include_timestamp: bool = False) -> Dict[bytes, bytes]:
+        """Get a row, as ``happybase.Table.row``. A missing row is an empty dictionary."""
+        self._rpc("row", [_to_bytes(row)])
+        data = self._data.get(_to_bytes(row))
+        return self._project(data, columns) if data else {}
+
+    def rows(self, rows: Iterable[Key], columns: Optional[Iterable[Key]] = None, timestamp=None,
+             include_timestamp: bool = False) -> List[Tuple[bytes, Dict[bytes, bytes]]]:
+        """Get the rows found among the given row keys, as ``happybase.Table.rows``."""
+        keys = [_to_bytes(row) for row in rows]
+        self._rpc("rows", keys)
+        result = []
+        for key in keys:
+            data = self._data.get(key)
+            if data:
+                result.append((key, self._project(data, columns)))
+        return result
+
+    def scan(self, row_start: Optional[Key] = None, row_stop: Optional[Key] = None,
+             row_prefix: Optional[Key] = None, columns: Optional[Iterable[Key]] = None,
+             timestamp=None, include_timestamp: bool = False, batch_size: int = 1000,
+             scan_batching=None, limit: Optional[int] = None, sorted_columns: bool = False,
+             filter=None) -> Iterator[Tuple[bytes, Dict[bytes, bytes]]]:
+        """Scan the rows in row key order, as ``happybase.Table.scan``."""
+        if row_prefix is not None:
+            if row_start is not None or row_stop is not None:
+                raise ValueError("row_prefix cannot be combined with row_start or row_stop")
+            prefix = _to_bytes(row_prefix)
+            start, stop = prefix, _prefix_stop(prefix)
+        else:
+            start, stop = _to_bytes(row_start or b""), _to_bytes(row_stop) if row_stop else None
+        key_regex, cells, strip = None, None, False
+        for row_filter in (filter.filters if isinstance(filter, RowFilterChain) else [filter] if filter else []):
+            if isinstance(row_filter, RowKeyRegexFilter):
+                key_regex = re.compile(row_filter.regex, re.DOTALL)
+            elif isinstance(row_filter, CellsRowLimitFilter):
+                cells = row_filter.num_cells
+            elif isinstance(row_filter, StripValueTransformerFilter):
+                strip = row_filter.flag
+            else:
+                raise NotImplementedError("Unsupported row filter: {!r}".format(row_filter))
+
+        keys = self._sorted_keys()
+        index = bisect_left(keys, start)
+        self._rpc("scan", [])
+        count = 0
+        while index < len(keys) and (limit is None or count < limit):
+            key = keys[index]
+            index += 1
+            if stop is not None and key >= stop:
+                break
+            if key_regex is not None and not key_regex.fullmatch(key):
+                continue
+            data = self._data.get(key)
+            if not data:
+                continue
+            data = self._project(data, columns)
+            if cells is not None:
+                data = dict(sorted(data.items())[:cells])
+            if strip:
+                data = dict.fromkeys(data, b"")
+            count += 1
+            yield key, data
@@ -0,0 +1,321 @@
+#!/usr/bin/env python
+
+
+import atexit
+import bisect
+import contextlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Sequence
+
+
+# Upper bounds in seconds of the latency histogram buckets, from 100us to 30s.
+BUCKETS: Sequence[float] = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+PREFIX = "odds"
+
+
+def _label(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+def _finite(value: Optional[float]) -> Optional[float]:
+    return None if value is None or value == float("inf") else value
+
+
+class Histogram(object):
+    """A latency histogram with fixed buckets, as a Prometheus histogram.
+
+    Args:
+        buckets (Sequence[float]): The upper bounds in seconds of the buckets.
+
+    Attributes:
+        counts (List[int]): The number of observations per bucket, the last one being ``+Inf``.
+        sum (float): The sum of the observations in seconds.
+        count (int): The number of observations.
+    """
+
+    def __init__(self, buckets: Sequence[float] = BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        """Record an observation.
+
+        Args:
+            seconds (float): The latency in seconds.
+        """
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile by the upper bound of the bucket it falls into.
+
+        Args:
+            q (float): The quantile in ``[0, 1]``.
+
+        Returns:
+            float: The estimate in seconds, ``inf`` beyond the last bucket and None without observation.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+
+class Laps(object):
+    """Split the wall-clock and CPU time of a thread into consecutive stages.
+
+    Every call to :meth:`lap` attributes the time elapsed since the previous
+    lap to a stage, e.g., the wait for the next row of a scan to ``rpc`` and
+    its decoding to ``decode``. The totals are added to the metrics by
+    :meth:`close`, so that laps take no lock.
+
+    Args:
+        metrics (Metrics): The metrics the totals are added to.
+    """
+
+    def __init__(self, metrics: "Metrics"):
+        self._metrics = metrics
+        self._totals: Dict[str, List[float]] = {}
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+
+    def lap(self, stage: str) -> None:
+        """Attribute the time elapsed since the previous lap to ``stage``.
+
+        Args:
+            stage (str): The stage.
+        """
+        wall, cpu = time.perf_counter(), time.thread_time()
+        totals = self._totals.get(stage)
+        if totals is None:
+            totals = self._totals[stage] = [0.0, 0.0, 0]
+        totals[0] += wall - self._wall
+        totals[1] += cpu - self._cpu
+        totals[2] += 1
+        self._wall, self._cpu = wall, cpu
+
+    def close(self) -> None:
+        """Add the totals of the stages to the metrics."""
+        self._metrics.merge(self._totals)
+        self._totals = {}
+
+
+class Metrics(object):
+    """Collect the time per stage, the latency per operation and the counts of a process.
+
+    A stage, e.g., ``connect``, ``rpc``, ``decode`` or ``model``, accumulates
+    wall-clock and CPU time. An operation, e.g., ``get_rows`` or
+    ``write_batch``, has a latency histogram. A counter, e.g., ``read_rows``,
+    ``read_cells`` or ``read_bytes``, accumulates a quantity. Nothing is
+    collected unless ``enabled`` is set, so that the hot paths only pay a
+    test of this flag.
+
+    Args:
+        enabled (bool): Whether to collect.
+
+    Attributes:
+        enabled (bool): Whether to collect.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stages: Dict[str, List[float]] = {}
+        self._histograms: Dict[str, Histogram] = {}
+        self._counters: Dict[str, float] = {}
+
+    def merge(self, totals: Dict[str, List[float]]) -> None:
+        """Add wall-clock time, CPU time and number of calls per stage.
+
+        Args:
+            totals (Dict[str, List[float]]): The wall-clock seconds, CPU seconds and calls per stage.
+        """
+        with self._lock:
+            for stage, (wall, cpu, calls) in totals.items():
+                current = self._stages.setdefault(stage, [0.0, 0.0, 0])
+                current[0] += wall
+                current[1] += cpu
+                current[2] += calls
+
+    def observe(self, operation: str, seconds: float) -> None:
+        """Record the latency of an operation.
+
+        Args:
+            operation (str): The operation.
+            seconds (float): The latency in seconds.
+        """
+        with self._lock:
+            histogram = self._histograms.get(operation)
+            if histogram is None:
+                histogram = self._histograms[operation] = Histogram()
+            histogram.observe(seconds)
+
+    def count(self, name: str, value: float = 1) -> None:
+        """Increase a counter.
+
+        Args:
+            name (str): The counter, e.g., ``read_rows``.
+            value (float): The increment.
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def laps(self) -> Laps:
+        """Start splitting the time of the calling thread into stages.
+
+        Returns:
+            Laps: The laps, to be closed once done.
+        """
+        return Laps(self)
+
+    @contextlib.contextmanager
+    def stage(self, stage: str, operation: Optional[str] = None) -> Iterator[None]:
+        """Time a block of the calling thread as one call of a stage.
+
+        Args:
+            stage (str): The stage.
+            operation (str, optional): The operation whose latency histogram records the block.
+        """
+        if not self.enabled:
+            yield
+            return
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - wall
+            self.merge({stage: [elapsed, time.thread_time() - cpu, 1]})
+            if operation is not None:
+                self.observe(operation, elapsed)
+
+    def snapshot(self) -> dict:
+        """Get a copy of the metrics.
+
+        Returns:
+            dict: The stages, the operations with their histogram and quantile estimates, and the counters.
+        """
+        with self._lock:
+            return {
+                "stages": {
+                    stage: {"wall_seconds": wall, "cpu_seconds": cpu, "calls": calls}
+                    for stage, (wall, cpu, calls) in self._stages.items()},
+                "operations": {
+                    operation: {
+                        "buckets": [[_label(bound), count] for bound, count in zip(
+                            histogram.buckets + (float("inf"),), histogram.counts)],
+                        "sum_seconds": histogram.sum,
+                        "count": histogram.count,
+                        "p50_seconds": _finite(histogram.quantile(0.5)),
+                        "p99_seconds": _finite(histogram.quantile(0.99))}
+                    for operation, histogram in self._histograms.items()},
+                "counters": dict(self._counters),
+            }
+
+    def to_json(self) -> str:
+        """Format the metrics as JSON.
+
+        Returns:
+            str: The JSON document, the bucket bounds being labelled as in Prometheus, e.g., ``"+Inf"``.
+        """
+        return json.dumps(self.snapshot(), indent=2, sort_keys=True)
+
+    def to_prometheus(self) -> str:
+        """Format the metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics, prefixed with :data:`PREFIX`.
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for name in ("wall_seconds", "cpu_seconds", "calls"):
+            lines.append("# TYPE {}_stage_{}_total counter".format(PREFIX, name))
+            for stage, values in sorted(snapshot["stages"].items()):
+                lines.append('{}_stage_{}_total{{stage="{}"}} {!r}'.format(PREFIX, name, stage, values[name]))
+        lines.append("# TYPE {}_latency_seconds histogram".format(PREFIX))
+        for operation, histogram in sorted(snapshot["operations"].items()):
+            cumulative = 0
+            for le, count in histogram["buckets"]:
+                cumulative += count
+                lines.append('{}_latency_seconds_bucket{{op="{}",le="{}"}} {}'.format(
+                    PREFIX, operation, le, cumulative))
+            lines.append('{}_latency_seconds_sum{{op="{}"}} {!r}'.format(PREFIX, operation, histogram["sum_seconds"]))
+            lines.append('{}_latency_seconds_count{{op="{}"}} {}'.format(PREFIX, operation, histogram["count"]))
+        for name, value in sorted(snapshot["counters"].items()):
+            lines.append("# TYPE {}_{}_total counter".format(PREFIX, name))
+            lines.append("{}_{}_total {!r}".format(PREFIX, name, value))
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """Write the metrics atomically, as JSON if ``path`` ends with ``.json``, otherwise as Prometheus text.
+
+        The writes are serialized, so that the periodic and the final writes
+        of :func:`export` never share the temporary file.
+
+        Args:
+            path (str): The output file, e.g., in the directory of the node exporter textfile collector.
+        """
+        with self._write_lock:
+            text = self.to_json() if path.endswith(".json") else self.to_prometheus()
+            tmp = path + ".tmp"
+            with open(tmp, "w") as metrics_file:
+                metrics_file.write(text)
+            os.replace(tmp, path)
+
+
+def row_size(rowkey, row: dict) -> int:
+    """Get the size of a row as counted by the ``read_bytes`` and ``written_bytes`` counters.
+
+    Args:
+        rowkey (Union[str, bytes]): The row key.
+        row (dict): The mapping from column names to values.
+
+    Returns:
+        int: The length of the row key, column names and values.
+    """
+    return len(rowkey) + sum(len(column) + len(value) for column, value in row.items())
+
+
+_METRICS = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """Get the metrics of the process, disabled until :func:`export` is called.
+
+    Returns:
+        Metrics: The process-wide metrics.
+    """
+    return _METRICS
+
+
+def export(path: str, interval: Optional[float] = None) -> None:
+    """Enable the metrics of the process and write them to ``path`` on exit, and every ``interval`` seconds if given.
+
+    Args:
+        path (str): The output file, see :meth:`Metrics.write`.
+        interval (float, optional): The number of seconds between two periodic writes.
+    """
+    metrics = get_metrics()
+    metrics.enabled = True
+    atexit.register(metrics.write, path)
+    if interval:
+        def _export():
+            while True:
+                time.sleep(interval)
+                metrics.write(path)
+
+        threading.Thread(target=_export, daemon=True).start()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+"""Rewrite the rows of a table into the latest-first row key layout."""
+
+
+import argparse
+import getrows
+import itertools
+import keycodec
+import pool
+import time
+import typing
+import writerows
+from concurrent.futures import ThreadPoolExecutor
+
+
+def rewrite_rows(
+        rows: typing.Iterable[typing.Tuple[bytes, dict]],
+        sep: str = ":",
+        version: int = 2) -> typing.Iterator[typing.Tuple[bytes, str, dict]]:
+    """Re-encode the row keys of the given rows into the layout ``version``.
+
+    Rows whose key is already in the target layout are skipped.
+
+    Args:
+        rows (typing.Iterable[typing.Tuple[bytes, dict]]): The rows as returned by ``happybase``.
+        sep (str): The delimiter used in the row keys of the original layout.
+        version (int): The version of the target row key layout in :mod:`keycodec`.
+
+    Yields:
+        typing.Tuple[bytes, str, dict]: The old row key, the new row key and the columns.
+    """
+    codec = keycodec.get_codec(version)
+    for key, row in rows:
+        if keycodec.detect_codec(key, sep).version == version:
+            continue
+        yield key, codec.encode(keycodec.decode(key, sep)), row
+
+
+def migrate_range(
+        source,
+        target,
+        start: bytes,
+        stop: bytes,
+        sep: str = ":",
+        version: int = 2,
+        batch_size: int = 1000,
+        batch_bytes: int = 4 * 1024 * 1024,
+        delete_source: bool = False) -> typing.Tuple[int, int]:
+    """Migrate the rows in ``[start, stop)`` of ``source`` into ``target``.
+
+    The rows are written ``batch_size`` at a time. With ``delete_source``,
+    the source rows of a batch are deleted right after the batch is written,
+    so that no more than a batch of row keys is held and a failure leaves
+    every row in at least one of the tables.
+
+    Args:
+        source (happybase.Table): The table to read from.
+        target (happybase.Table): The table to write to. May be ``source`` itself.
+        start (bytes): The start of the row key range. Empty means the start of the table.
+        stop (bytes): The stop of the row key range. Empty means the end of the table.
+        sep (str): The delimiter used in the row keys of the original layout.
+        version (int): The version of the target row key layout in :mod:`keycodec`.
+        batch_size (int): The maximum number of rows per batch.
+        batch_bytes (int): The maximum number of bytes per batch.
+        delete_source (bool): Delete the migrated rows from ``source``.
+
+    Returns:
+        typing.Tuple[int, int]: The number of rows and cells written.
+    """
+    num_rows = 0
+    num_cells = 0
+    rows = source.scan(row_start=start or None, row_stop=stop or None)
+    rewritten = rewrite_rows(rows, sep, version)
+    while True:
+        chunk = list(itertools.islice(rewritten, batch_size))
+        if not chunk:
+            break
+        rows_written, cells = writerows.write_mutations(
+            target, [(new_key, row) for _, new_key, row in chunk], batch_size, batch_bytes)
+        num_rows += rows_written
+        num_cells += cells
+        if delete_source:
+            with source.batch(batch_size=batch_size) as batch:
+                for old_key, _, _ in chunk:
+                    batch.delete(old_key)
+    return num_rows, num_cells
+
+
+def migrate(
+        project_id: str,
+        instance_id: str,
+        source_table: str,
+        target_table: str,
+        start: str = "",
+        stop: str = "",
+        sep: str = ":",
+        version: int = 2,
+        workers: int = 8,
+        batch_size: int = 1000,
+        batch_bytes: int = 4 * 1024 * 1024,
+        delete_source: bool = False,
+        admin: bool = True) -> typing.Tuple[int, int]:
+    """Migrate a table into the row key layout ``version`` in parallel.
+
+    The row key range is split by :func:`getrows.split_row_range` and every
+    sub-range is migrated by its own worker with dedicated connections.
+
+    Args:
+        project_id (str): The project ID on GCP.
+        instance_id (str): The Bigtable instance ID on GCP.
+        source_table (str): The table to read from.
+        target_table (str): The table to write to. May equal ``source_table``.
+        start (str): The start of the row key range. Empty means the start of the table.
+        stop (str): The stop of the row key range. Empty means the end of the table.
+        sep (str): The delimiter used in the row keys of the original layout.
+        version (int): The version of the target row key layout in :mod:`keycodec`.
+        workers (int): The number of concurrent workers.
+        batch_size (int): The maximum number of rows per batch.
+        batch_bytes (int): The maximum number of bytes per batch.
+        delete_source (bool): Delete the migrated rows from the source table.
+        admin (bool): Whether to use a client with admin access instead of a data-only client.
+
+    Returns:
+        typing.Tuple[int, int]: The number of rows and cells written.
+    """
+    table_pool = pool.get_pool(admin)
+    source = table_pool.table(project_id, instance_id, source_table)
+    ranges = getrows.split_row_range(source, start, stop, workers)
+
+    def _migrate(sub_range):
+        sub_source = table_pool.new_table(project_id, instance_id, source_table)
+        sub_target = table_pool.new_table(project_id, instance_id, target_table)
+        return migrate_range(
+            sub_source, sub_target, sub_range[0], sub_range[1], sep, version,
+            batch_size, batch_bytes, delete_source)
+
+    with ThreadPoolExecutor(max_workers=max(1, len(ranges))) as executor:
+        results = list(executor.map(_migrate, ranges))
+    return sum(r[0] for r in results), sum(r[1] for r in results)
+
+
+def main(
+        project_id: str,
+        instance_id: str,
+        source_table: str,
+        target_table: str,
+        start: str,
+        stop: str,
+        sep: str,
+        workers: int,
+        batch_size: int,
+        delete_source: bool,
+        admin: bool = True):
+    """The main function of ``migrate.py`` program.
+
+    Args:
+        project_id (str): The project ID on GCP.
+        instance_id (str): The Bigtable instance ID on GCP.
+        source_table (str): The table to read from.
+        target_table (str): The table to write to.
+        start (str): The start of the row key range.
+        stop (str): The stop of the row key range.
+        sep (str): The delimiter used in the row keys of the original layout.
+        workers (int): The number of concurrent workers.
+        batch_size (int): The maximum number of rows per batch.
+        delete_source (bool): Delete the migrated rows from the source table.
+        admin (bool): Whether to use a client with admin access instead of a data-only client.
+    """
+    begin = time.time()
+    num_rows, num_cells = migrate(
+        project_id, instance_id, source_table, target_table, start, stop, sep,
+        workers=workers, batch_size=batch_size, delete_source=delete_source, admin=admin)
+    print("Elapsed time for migrating {} rows ({} cells): {}s".format(
+        num_rows, num_cells, time.time() - begin))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument(
+        'project_id',
+        type=str,
+        help='Your Cloud Platform project ID.'
+    )
+    parser.add_argument(
+        'instance_id',
+        type=str,
+        help='ID of the Cloud Bigtable instance to connect to.')
+    parser.add_argument(
+        '--table',
+        type=str,
+        help='Table to migrate.',
+        default='odds')
+    parser.add_argument(
+        '--target-table',
+        type=str,
+        help='Table to write the migrated rows to. Defaults to \'--table\'.')
+    parser.add_argument(
+        '--start-rowkey',
+        type=str,
+        help='The start row key of the range to migrate.',
+        default='')
+    parser.add_argument(
+        '--stop-rowkey',
+        type=str,
+        help='The stop row key of the range to migrate.',
+        default='')
+    parser.add_argument(
+        '--rowkey-sep',
+        type=str,
+        help='The delimiter used in the row keys of the original layout.',
+        default=':')
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='Number of concurrent workers.',
+        default=8)
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        help='Maximum number of rows per batch.',
+        default=1000)
+    parser.add_argument(
+        '--delete-source',
+        action='store_true',
+        help='Delete the migrated rows from the source table.')
+    parser.add_argument(
+        '--data-only',
+        action='store_true',
+        help='Use a data-only client instead of a client with admin access.')
+
+    args = parser.parse_args()
+    main(args.project_id, args.instance_id, args.table,
+         args.target_table or args.table, args.start_rowkey, args.stop_rowkey,
+         args.rowkey_sep, args.workers, args.batch_size, args.delete_source,
+         not args.data_only)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+
+
+import threading
+from google.cloud import bigtable
+from google.cloud import happybase
+from typing import Dict, Iterable, Tuple
+
+
+class TablePool(object):
+    """A thread-safe pool of Bigtable clients, connections and tables.
+
+    Creating a ``bigtable.Client`` and a ``happybase.Connection`` is costly
+    compared to a short query. The pool keeps one client per
+    (project, admin) pair, one connection per (project, instance) pair and
+    one table per (project, instance, table) triple, so that they are
+    created once and shared by all the callers in the process.
+
+    Args:
+        admin (bool): Whether the clients are created with admin access. A
+            data-only client is enough for reading and writing rows.
+
+    Attributes:
+        admin (bool): Whether the clients are created with admin access.
+    """
+
+    def __init__(self, admin: bool = True):
+        self.admin = admin
+        self._lock = threading.Lock()
+        self._clients: Dict[str, bigtable.Client] = {}
+        self._connections: Dict[Tuple[str, str], happybase.Connection] = {}
+        self._tables: Dict[Tuple[str, str, str], happybase.Table] = {}
+
+    def client(self, project_id: str) -> bigtable.Client:
+        """Get the shared client of the project specified by ``project_id``.
+
+        Args:
+            project_id (str): The project ID on GCP.
+
+        Returns:
+            bigtable.Client: The shared client.
+        """
+        with self._lock:
+            client = self._clients.get(project_id)
+            if client is None:
+                client = bigtable.Client(project=project_id, admin=self.admin)
+                self._clients[project_id] = client
+            return client
+
+    def connection(self, project_id: str, instance_id: str) -> happybase.Connection:
+        """Get the shared connection to the given Bigtable instance.
+
+        Args:
+            project_id (str): The project ID on GCP.
+            instance_id (str): The Bigtable instance ID on GCP.
+
+        Returns:
+            happybase.Connection: The shared connection.
+        """
+        key = (project_id, instance_id)
+        connection = self._connections.get(key)
+        if connection is None:
+            client = self.client(project_id)
+            with self._lock:
+                connection = self._connections.get(key)
+                if connection is None:
+                    connection = happybase.Connection(instance=client.instance(instance_id))
+                    self._connections[key] = connection
+        return connection
+
+    def table(self, project_id: str, instance_id: str, table_name: str) -> happybase.Table:
+        """Get the shared table instance specified by the given IDs and ``table_name``.
+
+        Args:
+            project_id (str): The project ID on GCP.
+            instance_id (str): The Bigtable instance ID on GCP.
+            table_name (str): The target table name in Bigtable on GCP.
+
+        Returns:
+            happybase.Table: The shared table instance.
+        """
+        key = (project_id, instance_id, table_name)
+        table = self._tables.get(key)
+        if table is None:
+            connection = self.connection(project_id, instance_id)
+            with self._lock:
+                table = self._tables.get(key)
+                if table is None:
+                    table = connection.table(table_name)
+                    self._tables[key] = table
+        return table
+
+    def new_table(self, project_id: str, instance_id: str, table_name: str) -> happybase.Table:
+        """Create a table instance bound to a dedicated connection.
+
+        The shared client is reused, but the connection is not pooled. This
+        is meant for workers which should not share a connection.
+
+        Args:
+            project_id (str): The project ID on GCP.
+            instance_id (str): The Bigtable instance ID on GCP.
+            table_name (str): The target table name in Bigtable on GCP.
+
+        Returns:
+            happybase.Table: A table instance with its own connection.
+        """
+        client = self.client(project_id)
+        connection = happybase.Connection(instance=client.instance(instance_id))
+        return connection.table(table_name)
+
+    def warm_up(self, project_id: str, instance_id: str, table_names: Iterable[str]) -> None:
+        """Create the given tables and open their channels ahead of the first query.
+
+        Args:
+            project_id (str): The project ID on GCP.
+            instance_id (str): The Bigtable instance ID on GCP.
+            table_names (Iterable[str]): The table names in Bigtable on GCP.
+        """
+        for table_name in table_names:
+            table = self.table(project_id, instance_id, table_name)
+            for _ in table.scan(limit=1):
+                pass
+
+    def close(self) -> None:
+        """Close all the pooled connections and forget the pooled objects."""
+        with self._lock:
+            for connection in self._connections.values():
+                connection.close()
+            self._tables.clear()
+            self._connections.clear()
+            self._clients.clear()
+
+
+_pools: Dict[bool, TablePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(admin: bool = True) -> TablePool:
+    """Get the process-wide pool with respect to ``admin``.
+
+    Args:
+        admin (bool): Whether the pooled clients have admin access.
+
+    Returns:
+        TablePool: The process-wide pool.
+    """
+    with _pools_lock:
+        pool = _pools.get(admin)
+        if pool is None:
+            pool = TablePool(admin=admin)
+            _pools[admin] = pool
+        return pool
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+
+
+import decoder
+import keycodec
+import re
+from google.cloud import happybase
+from google.cloud.bigtable.row_filters import RowKeyRegexFilter
+from pydantic import BaseModel
+from typing import Iterator, List, NamedTuple, Optional
+
+
+FIELDS = ("sid", "lid", "mid", "mkt", "seq", "per", "vendor")
+
+
+class OddsQuery(BaseModel):
+    """A selection of rows along the row key hierarchy.
+
+    The match is always required. The fields ``mkt``, ``seq``, ``per`` and
+    ``vendor`` are optional, as are both bounds of the time window.
+
+    Args:
+        sid (str): The sport ID.
+        lid (str): The league ID.
+        mid (str): The match ID.
+        mkt (str, optional): The market.
+        seq (str, optional): The sequence of the odd pair within the market.
+        per (str, optional): The period.
+        vendor (str, optional): The vendor.
+        ts_from (int, optional): The lower bound of the epoch timestamps, inclusive.
+        ts_to (int, optional): The upper bound of the epoch timestamps, inclusive.
+        version (int): The version of the row key layout in :mod:`keycodec`.
+        sep (str): The delimiter used in the row keys of the original layout.
+    """
+    sid: str
+    lid: str
+    mid: str
+    mkt: Optional[str] = None
+    seq: Optional[str] = None
+    per: Optional[str] = None
+    vendor: Optional[str] = None
+    ts_from: Optional[int] = None
+    ts_to: Optional[int] = None
+    version: int = 1
+    sep: str = ":"
+
+
+class CompiledQuery(NamedTuple):
+    """The row range and the server-side filter of an :class:`OddsQuery`.
+
+    Attributes:
+        row_start (bytes): The start of the row range, inclusive.
+        row_stop (bytes): The stop of the row range, exclusive.
+        key_regex (Optional[bytes]): The row key regular expression to apply server-side, if any.
+    """
+    row_start: bytes
+    row_stop: bytes
+    key_regex: Optional[bytes]
+
+
+def successor(prefix: str) -> str:
+    """Get the first row key after all the row keys starting with ``prefix``.
+
+    Every prefix generated by :meth:`keycodec.RowKeyCodec.prefix` ends with
+    the delimiter, so incrementing its last character is enough.
+
+    Args:
+        prefix (str): The row key prefix.
+
+    Returns:
+        str: The exclusive stop of the row range of the prefix.
+    """
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def codec_of(query: OddsQuery) -> keycodec.RowKeyCodec:
+    """Get the codec of the row key layout the given query selects.
+
+    Args:
+        query (OddsQuery): The query.
+
+    Returns:
+        keycodec.RowKeyCodec: The codec, honouring the delimiter of the original layout.
+    """
+    codec = keycodec.get_codec(query.version)
+    if query.version == 1 and query.sep != codec.sep:
+        codec = keycodec.AscendingTsCodec(query.sep)
+    return codec
+
+
+def fields_regex(
+    codec: keycodec.RowKeyCodec,
+    leading: List[str],
+    fields: List[Optional[str]],
+    ts_from: Optional[int] = None,
+    ts_to: Optional[int] = None,
+) -> bytes:
+    """Generate the row key regular expression of a selection along the row key hierarchy.
+
+    Args:
+        codec (keycodec.RowKeyCodec): The codec of the row key layout.
+        leading (List[str]): The leading fields forming the row key prefix.
+        fields (List[Optional[str]]): The fields following ``leading``, ``None`` matching any value.
+        ts_from (int, optional): The lower bound of the epoch timestamps, inclusive.
+        ts_to (int, optional): The upper bound of the epoch timestamps, inclusive.
+
+    Returns:
+        bytes: The anchored regular expression.
+    """
+    sep = re.escape(codec.sep)
+    parts = [re.escape(codec.prefix(*leading))]
+    for index, value in enumerate(fields, len(leading)):
+        parts.append(("[^{}]*".format(sep) if value is None else codec.field_regex(index, value)) + sep)
+    if ts_from is None and ts_to is None:
+        parts.append(".*")
+    else:
+        parts.append(codec.ts_regex(
+            ts_from if ts_from is not None else 0,
+            ts_to if ts_to is not None else keycodec.MAX_TS))
+    return ("^" + "".join(parts) + "$").encode("utf-8")
+
+
+def compile_query(query: OddsQuery) -> CompiledQuery:
+    """Compile the given query into the tightest row range.
+
+    The leading fields given without a gap form the row key prefix. When all
+    the seven fields are given, the time window narrows the row range too.
+    Otherwise the fields after a gap and the time window are compiled into a
+    row key regular expression evaluated by Bigtable.
+
+    Args:
+        query (OddsQuery): The query.
+
+    Returns:
+        CompiledQuery: The row range and the server-side filter.
+    """
+    codec = codec_of(query)
+    values = [getattr(query, field) for field in FIELDS]
+    leading: List[str] = []
+    for value in values:
+        if value is None:
+            break
+        leading.append(value)
+    prefix = codec.prefix(*leading)
+    row_start, row_stop = prefix, successor(prefix)
+    has_window = query.ts_from is not None or query.ts_to is not None
+    ts_from = query.ts_from if query.ts_from is not None else 0
+    ts_to = query.ts_to if query.ts_to is not None else keycodec.MAX_TS
+
+    need_regex = len(leading) < len(values) and (
+        has_window or any(value is not None for value in values[len(leading):]))
+    if has_window and not need_regex:
+        bounds = codec.ts_range(ts_from, ts_to)
+        if bounds is None:
+            need_regex = True
+        else:
+            row_start, row_stop = prefix + bounds[0], prefix + bounds[1]
+
+    key_regex = None
+    if need_regex:
+        key_regex = fields_regex(
+            codec, leading, values[len(leading):],
+            query.ts_from, query.ts_to)
+
+    return CompiledQuery(row_start.encode("utf-8"), row_stop.encode("utf-8"), key_regex)
+
+
+def scan_query(
+    table_instance: happybase.Table,
+    query: OddsQuery,
+    columns: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    fast: bool = False,
+) -> Iterator:
+    """Scan the rows selected by the given query.
+
+    Args:
+        table_instance(happybase.Table): The table instance to be scanned.
+        query (OddsQuery): The query.
+        columns (List[str], optional): The columns or column families to retrieve.
+        limit (int, optional): The maximum number of rows to return.
+        fast (bool): Yield unvalidated ``decoder.OddRow`` objects instead of ``RowModelOdd``.
+
+    Yields:
+        models.RowModelOdd: The rows selected by the query.
+    """
+    compiled = compile_query(query)
+    kwargs: dict = {}
+    if compiled.key_regex is not None:
+        kwargs["filter"] = RowKeyRegexFilter(compiled.key_regex)
+    rows = table_instance.scan(
+        row_start=compiled.row_start, row_stop=compiled.row_stop,
+        columns=columns, limit=limit, **kwargs)
+    for key, row in rows:
+        odd_row = decoder.decode_row(key, row, query.sep)
+        yield odd_row if fast else odd_row.to_model()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+
+
+import columnar
+import decoder
+import keycodec
+import math
+import query
+import re
+from google.cloud import happybase
+from google.cloud.bigtable.row_filters import RowKeyRegexFilter
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+
+FAMILY = "ohlc"
+COUNT_COLUMN = b"ohlc:n"
+BUCKETS: Dict[str, int] = {"1m": 60, "5m": 300, "1h": 3600}
+_PRICES = ("o", "h", "l", "c")
+
+
+class Ohlc(NamedTuple):
+    """The open, high, low and close of the odds columns of a series within a bucket.
+
+    Attributes:
+        bucket (str): The bucket size, e.g., ``1m``.
+        sid (str): The sport ID.
+        lid (str): The league ID.
+        mid (str): The match ID.
+        mkt (str): The market.
+        seq (str): The sequence of the odd pair within the market.
+        per (str): The period.
+        vendor (str): The vendor.
+        start (int): The epoch timestamp the bucket starts at.
+        n (int): The number of rows aggregated with at least one odds value.
+        values (Dict[str, Tuple[float, float, float, float]]): The open, high, low and close per odds qualifier.
+    """
+    bucket: str
+    sid: str
+    lid: str
+    mid: str
+    mkt: str
+    seq: str
+    per: str
+    vendor: str
+    start: int
+    n: int
+    values: Dict[str, Tuple[float, float, float, float]]
+
+
+def rollup_rowkey(bucket: str, series: Tuple[str, ...], start: int, sep: str = ":") -> str:
+    """Generate the row key of a rollup.
+
+    The row key is the row key of the original layout of the bucket start,
+    prefixed with the bucket size, e.g., ``1m:1:213:7654321:ou:0:pre:vendorA:1595880180``,
+    so that the rollups of a series at one bucket size are contiguous.
+
+    Args:
+        bucket (str): The bucket size, e.g., ``1m``.
+        series (Tuple[str, ...]): The ``sid``, ``lid``, ``mid``, ``mkt``, ``seq``, ``per`` and ``vendor`` fields.
+        start (int): The epoch timestamp the bucket starts at.
+        sep (str): The delimiter of the fields.
+
+    Returns:
+        str: The row key.
+    """
+    return sep.join([bucket] + list(series) + [str(start)])
+
+
+class _Bucket(object):
+    __slots__ = ("start", "n", "values")
+
+    def __init__(self, start: int):
+        self.start = start
+        self.n = 0
+        self.values: Dict[str, List[float]] = {}
+
+    def add(self, odds: Iterable[Tuple[str, float]]) -> None:
+        priced = False
+        for col, value in odds:
+            if math.isnan(value):
+                continue
+            priced = True
+            ohlc = self.values.get(col)
+            if ohlc is None:
+                self.values[col] = [value, value, value, value]
+            else:
+                if value > ohlc[1]:
+                    ohlc[1] = value
+                if value < ohlc[2]:
+                    ohlc[2] = value
+                ohlc[3] = value
+        if priced:
+            self.n += 1
+
+
+class RollupAggregator(object):
+    """Aggregate row mutations into OHLC rollups incrementally.
+
+    Every series keeps one open bucket per bucket size. A bucket is closed,
+    and its rollup is emitted, as soon as a row of its series falls into a
+    later bucket, or when :meth:`advance` or :meth:`flush` is called. Rows of
+    a series older than its open bucket are counted in ``late`` and ignored,
+    since their bucket was already written.
+
+    Args:
+        buckets (Iterable[str]): The bucket sizes among :data:`BUCKETS`.
+        sep (str): The delimiter used in the row keys of the original layout.
+
+    Attributes:
+        late (int): The number of rows ignored because their bucket was closed.
+    """
+
+    def __init__(self, buckets: Iterable[str] = ("1m",), sep: str = ":"):
+        self._sizes = [(bucket, BUCKETS[bucket]) for bucket in buckets]
+        self._sep = sep
+        self._open: Dict[Tuple[str, Tuple[str, ...]], _Bucket] = {}
+        self._values: Dict[bytes, float] = {}
+        self.late = 0
+
+    def _odds(self, mkt: str, data: dict) -> List[Tuple[str, float]]:
+        layout = decoder.market_layout(mkt)
+        values = self._values
+        odds = []
+        for col, qualifier in zip(layout.columns, layout.qualifiers):
+            raw = data.get(col)
+            if raw is None:
+                continue
+            value = values.get(raw)
+            if value is None:
+                value = columnar.parse_odds_value(raw)
+                values[raw] = value
+            odds.append((qualifier, value))
+        return odds
+
+    def _mutation(self, bucket: str, series: Tuple[str, ...], state: _Bucket) -> Tuple[str, dict]:
+        data = {COUNT_COLUMN: str(state.n).encode("utf-8")}
+        for col, ohlc in state.values.items():
+            for price, value in zip(_PRICES, ohlc):
+                data["{}:{}.{}".format(FAMILY, col, price).encode("utf-8")] = repr(value).encode("utf-8")
+        return rollup_rowkey(bucket, series, state.start, self._sep), data
+
+    def add(self, rowkey: str, data: dict) -> List[Tuple[str, dict]]:
+        """Aggregate a row mutation of storage format v1.
+
+        Args:
+            rowkey (str): The row key of any layout in :mod:`keycodec`.
+            data (dict): The mapping from encoded column names to encoded values.
+
+        Returns:
+            List[Tuple[str, dict]]: The rollup mutations of the buckets closed by this row.
+        """
+        key = keycodec.decode(rowkey, self._sep)
+        series = tuple(key[:7])
+        odds = self._odds(key.mkt, data)
+        closed = []
+        for bucket, size in self._sizes:
+            start = key.ts - key.ts % size
+            state = self._open.get((bucket, series))
+            if state is None or state.start < start:
+                if state is not None:
+                    closed.append(self._mutation(bucket, series, state))
+                state = _Bucket(start)
+                self._open[(bucket, series)] = state
+            elif state.start > start:
+                self.late += 1
+                continue
+            state.add(odds)
+        return closed
+
+    def advance(self, ts: int) -> List[Tuple[str, dict]]:
+        """Close the buckets ending at or before ``ts``, e.g., the current time of a live feed.
+
+        Args:
+            ts (int): The epoch timestamp.
+
+        Returns:
+            List[Tuple[str, dict]]: The rollup mutations of the closed buckets.
+        """
+        sizes = dict(self._sizes)
+        ended = [
+            (bucket, series) for (bucket, series), state in self._open.items()
+            if state.start + sizes[bucket] <= ts]
+        return [self._mutation(b, s, self._open.pop((b, s))) for b, s in ended]
+
+    def flush(self) -> List[Tuple[str, dict]]:
+        """Close all the open buckets.
+
+        Returns:
+            List[Tuple[str, dict]]: The rollup mutations of the closed buckets.
+        """
+        closed = [self._mutation(bucket, series, state) for (bucket, series), state in self._open.items()]
+        self._open.clear()
+        return closed
+
+    def tap(
+        self,
+        mutations: Iterable[Tuple[str, dict]],
+        sink: Callable[[List[Tuple[str, dict]]], object],
+        batch_size: int = 1000,
+    ) -> Iterator[Tuple[str, dict]]:
+        """Pass the given row mutations through while aggregating them.
+
+        The rollups of closed buckets are handed over to ``sink`` in lists of
+        ``batch_size`` mutations, and the remaining ones once ``mutations`` is
+        exhausted.
+
+        Args:
+            mutations (Iterable[Tuple[str, dict]]): Pairs of row key and column mapping.
+            sink (Callable[[List[Tuple[str, dict]]], object]): The writer of the rollup mutations.
+            batch_size (int): The number of rollup mutations handed over at once.
+
+        Yields:
+            Tuple[str, dict]: The given row mutations.
+        """
+        pending: List[Tuple[str, dict]] = []
+        for rowkey, data in mutations:
+            pending.extend(self.add(rowkey, data))
+            if len(pending) >= batch_size:
+                sink(pending)
+                pending = []
+            yield rowkey, data
+        pending.extend(self.flush())
+        if pending:
+            sink(pending)
+
+
+def decode_rollup(rowkey: bytes, row: dict, sep: str = ":") -> Ohlc:
+    """Decode a rollup row.
+
+    Args:
+        rowkey (bytes): The row key generated by :func:`rollup_rowkey`.
+        row (dict): The mapping from encoded column names to encoded values.
+        sep (str): The delimiter of the fields.
+
+    Returns:
+        Ohlc: The rollup.
+    """
+    bucket, sid, lid, mid, mkt, seq, per, vendor, start = rowkey.decode("utf-8").split(sep)
+    prices: Dict[str, Dict[str, float]] = {}
+    for column, value in row.items():
+        if column == COUNT_COLUMN:
+            continue
+        col, _, price = column.decode("utf-8").partition(":")[2].partition(".")
+        prices.setdefault(col, {})[price] = float(value)
+    values = {col: tuple(ohlc[p] for p in _PRICES) for col, ohlc in prices.items()}
+    return Ohlc(bucket, sid, lid, mid, mkt, seq, per, vendor, int(start),
+                int(row.get(COUNT_COLUMN, b"0")), values)
+
+
+def scan_rollups(
+    table_instance: happybase.Table,
+    bucket: str,
+    odds_query: query.OddsQuery,
+    limit: Optional[int] = None,
+) -> Iterator[Ohlc]:
+    """Scan the rollups selected by the given query at one bucket size.
+
+    The query is compiled by :func:`query.compile_query` for the original row
+    key layout, and the bucket size is prepended to the row range and to the
+    row key filter. The time window selects the buckets starting within it.
+
+    Args:
+        table_instance(happybase.Table): The rollup table instance.
+        bucket (str): The bucket size among :data:`BUCKETS`.
+        odds_query (query.OddsQuery): The query.
+        limit (int, optional): The maximum number of rollups to return.
+
+    Yields:
+        Ohlc: The rollups in row key order.
+    """
+    if bucket not in BUCKETS:
+        raise ValueError("Unknown bucket size: {}".format(bucket))
+    compiled = query.compile_query(odds_query.copy(update={"version": 1}))
+    prefix = (bucket + odds_query.sep).encode("utf-8")
+    kwargs: dict = {}
+    if compiled.key_regex is not None:
+        kwargs["filter"] = RowKeyRegexFilter(
+            b"^" + re.escape(prefix) + compiled.key_regex[1:])
+    rows = table_instance.scan(
+        row_start=prefix + compiled.row_start, row_stop=prefix + compiled.row_stop,
+        limit=limit, **kwargs)
+    for key, row in rows:
+        yield decode_rollup(key, row, odds_query.sep)
@@ -0,0 +1,378 @@
+#!/usr/bin/env python
+"""Serve row key lookups and range scans of the odds table as JSON over HTTP.
+
+The server keeps its table instance, and so its connection, warm across
+requests, and optionally caches the rows of the lookups, see
+:class:`cache.CachedTable`. Concurrent identical requests are coalesced
+into one backend call, and the latency of every endpoint is reported by
+``/metrics``.
+
+Endpoints:
+    ``GET /rows?key=<rowkey>&key=...``: the rows of the given row keys, and the row keys not found.
+    ``GET /scan?start=<rowkey>&stop=<rowkey>&limit=<n>&column=<column>``: the rows of a row key range.
+    ``GET /metrics``: the metrics of the server, in the Prometheus text format or as JSON with ``format=json``.
+    ``GET /health``: ``{"status": "ok"}``.
+"""
+
+
+import argparse
+import cache
+import getrows
+import http.server
+import json
+import metrics
+import pool
+import socketserver
+import stream
+import threading
+import time
+import urllib.parse
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, List, Optional, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+
+class SingleFlight(object):
+    """Coalesce concurrent calls with the same key into a single call.
+
+    The first caller of a key runs the call; the callers arriving while it
+    is in flight wait for, and share, its result or its exception. The next
+    caller after it completes runs a new call, i.e., nothing is cached.
+
+    Attributes:
+        calls (int): The number of calls run.
+        shared (int): The number of callers which shared the call of another one.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> Tuple[T, bool]:
+        """Run ``fn``, unless a call with the same ``key`` is in flight.
+
+        Args:
+            key (Hashable): The key identifying identical calls.
+            fn (Callable[[], T]): The call.
+
+        Returns:
+            Tuple[T, bool]: The result, and whether it was shared with another caller.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Future()
+                self.calls += 1
+            else:
+                self.shared += 1
+        if not leader:
+            return flight.result(), True
+        try:
+            result = fn()
+            flight.set_result(result)
+            return result, False
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+
+
+def _dumps(payload) -> bytes:
+    return json.dumps(payload, default=str).encode("utf-8")
+
+
+def _to_dict(model, fast: bool) -> dict:
+    return model._asdict() if fast else model.dict()
+
+
+class QueryService(object):
+    """Answer the requests of the endpoints by means of the functions of :mod:`getrows`.
+
+    The responses are encoded once per backend call, so that the callers
+    of a coalesced call share the encoded response too.
+
+    Args:
+        table (happybase.Table): The table instance to be queried.
+        sep (str): The delimiter in the row keys.
+        chunk_size (int): The maximum number of row keys per request.
+        max_workers (int): The maximum number of concurrent requests of a lookup.
+        max_rows (int): The maximum number of rows returned by a scan.
+        fast (bool): Decode rows into unvalidated ``decoder.OddRow`` objects.
+
+    Attributes:
+        flights (SingleFlight): The coalescing of the identical requests.
+        metrics (metrics.Metrics): The latency per endpoint, as the ``http_<endpoint>`` operations,
+            and the counts of coalesced requests.
+    """
+
+    def __init__(self, table, sep: str = ":", chunk_size: int = 100, max_workers: int = 8,
+                 max_rows: int = 10000, fast: bool = False):
+        self.table = table
+        self.sep = sep
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.max_rows = max_rows
+        self.fast = fast
+        self.flights = SingleFlight()
+        self.metrics = metrics.Metrics(enabled=True)
+
+    def lookup(self, rowkeys: List[str]) -> bytes:
+        """Get the rows of the given row keys.
+
+        Args:
+            rowkeys (List[str]): The row keys.
+
+        Returns:
+            bytes: The JSON object of the rows found, in the order of ``rowkeys``, and the row keys not found.
+        """
+        missing: List[str] = []
+        rows = getrows.get_rowkeys(
+            self.table, rowkeys, self.sep, self.chunk_size, self.max_workers, missing, self.fast)
+        return _dumps({"rows": [_to_dict(row, self.fast) for row in rows], "missing": missing})
+
+    def scan(self, start: str, stop: str, limit: Optional[int] = None,
+             columns: Optional[List[str]] = None) -> bytes:
+        """Scan a row key range.
+
+        Args:
+            start (str): The row key starting the range.
+            stop (str): The row key stopping the range.
+            limit (int, optional): The maximum number of rows, at most ``max_rows``.
+            columns (List[str], optional): The columns or column families to retrieve.
+
+        Returns:
+            bytes: The JSON object of the rows.
+        """
+        limit = min(limit, self.max_rows) if limit else self.max_rows
+        rows = getrows.iter_rows_range(
+            self.table, start, stop, self.sep, limit=limit, columns=columns or None, fast=self.fast)
+        return _dumps({"rows": [_to_dict(row, self.fast) for row in rows]})
+
+    def handle(self, path: str) -> Tuple[int, str, bytes]:
+        """Answer a request.
+
+        Args:
+            path (str): The path of the request with its query string, e.g., ``/rows?key=...``.
+
+        Returns:
+            Tuple[int, str, bytes]: The HTTP status, the content type and the body.
+        """
+        url = urllib.parse.urlsplit(path)
+        params = urllib.parse.parse_qs(url.query)
+        endpoint = url.path.strip("/")
+        start = time.perf_counter()
+        try:
+            if endpoint == "rows":
+                keys = params.get("key", [])
+                if not keys:
+                    return 400, "application/json", _dumps({"error": "missing key"})
+                body, shared = self.flights.do(("rows", tuple(keys)), lambda: self.lookup(keys))
+            elif endpoint == "scan":
+                try:
+                    limit = int(params["limit"][0]) if "limit" in params else None
+                except ValueError:
+                    return 400, "application/json", _dumps({"error": "invalid limit"})
+                scan = (params.get("start", [""])[0], params.get("stop", [""])[0], limit,
+                        tuple(params.get("column", [])))
+                body, shared = self.flights.do(("scan",) + scan, lambda: self.scan(*scan))
+            elif endpoint == "metrics":
+                if params.get("format", [""])[0] == "json":
+                    return 200, "application/json", self.metrics.to_json().encode("utf-8")
+                return 200, "text/plain; version=0.0.4", self.metrics.to_prometheus().encode("utf-8")
+            elif endpoint == "health":
+                return 200, "application/json", _dumps({"status": "ok"})
+            else:
+                return 404, "application/json", _dumps({"error": "unknown endpoint {!r}".format(url.path)})
+        except Exception as e:
+            self.metrics.count("http_errors")
+            return 500, "application/json", _dumps({"error": repr(e)})
+        finally:
+            self.metrics.observe("http_" + (endpoint or "root"), time.perf_counter() - start)
+        if shared:
+            self.metrics.count("http_coalesced")
+        return 200, "application/json", body
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        status, content_type, body = self.server.service.handle(self.path)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # The client address of a Unix socket is not a (host, port) pair.
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service: QueryService, address: str, verbose: bool = False) -> socketserver.BaseServer:
+    """Create the server of ``service``, one thread per connection.
+
+    Args:
+        service (QueryService): The service answering the requests.
+        address (str): ``unix:<path>`` or ``[host]:<port>``, the host defaulting to 127.0.0.1.
+        verbose (bool): Log every request to stderr.
+
+    Returns:
+        socketserver.BaseServer: The server, to be run by ``serve_forever``.
+
+    Raises:
+        FileExistsError: If something other than a socket exists at the path of ``address``.
+    """
+    if address.startswith("unix:"):
+        path = address[len("unix:"):]
+        stream.remove_stale_socket(path)
+        server = _UnixHTTPServer(path, _Handler)
+    else:
+        host, _, port = address.rpartition(":")
+        server = http.server.ThreadingHTTPServer((host or "127.0.0.1", int(port)), _Handler)
+    server.service = service
+    server.verbose = verbose
+    return server
+
+
+def main(
+    project_id: str,
+    instance_id: str,
+    table_name: str,
+    address: str,
+    rowkey_sep: str = ":",
+    chunk_size: int = 100,
+    max_workers: int = 8,
+    max_rows: int = 10000,
+    admin: bool = True,
+    fast: bool = False,
+    verbose: bool = False,
+    cache_size: int = 0,
+    cache_ttl: float = 1.0,
+) -> None:
+    """The main function of ``server.py`` program.
+
+    Args:
+        project_id (str): Project ID on GCP.
+        instance_id (str): Bigtable instance ID on GCP.
+        table_name (str): Table name in Bigtable instance on GCP.
+        address (str): ``unix:<path>`` or ``[host]:<port>`` to listen on.
+        rowkey_sep (str): The delimiter used in the row key.
+        chunk_size (int): The maximum number of row keys per request.
+        max_workers (int): The maximum number of concurrent requests of a lookup.
+        max_rows (int): The maximum number of rows returned by a scan.
+        admin (bool): Whether to use a client with admin access instead of a data-only client.
+        fast (bool): Decode rows into unvalidated ``decoder.OddRow`` objects.
+        verbose (bool): Log every request to stderr.
+        cache_size (int): The maximum number of rows cached for the lookups, no cache if 0.
+        cache_ttl (float): The number of seconds a row is cached.
+    """
+    pool.get_pool(admin).warm_up(project_id, instance_id, [table_name])
+    table = getrows.get_table_instance(project_id, instance_id, table_name, admin)
+    if cache_size > 0:
+        table = cache.CachedTable(table, cache.RowCache(cache_size, cache_ttl))
+    service = QueryService(table, rowkey_sep, chunk_size, max_workers, max_rows, fast)
+    server = make_server(service, address, verbose)
+    print("Serving {} on {}".format(table_name, address), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        'project_id',
+        type=str,
+        help='Your Cloud Platform project ID.'
+    )
+    parser.add_argument(
+        'instance_id',
+        type=str,
+        help='ID of the Cloud Bigtable instance to connect to.')
+    parser.add_argument(
+        '--table',
+        type=str,
+        help='Table to read odd data from.',
+        default='odds')
+    parser.add_argument(
+        "--listen",
+        type=str,
+        default="127.0.0.1:8080",
+        help="\"unix:<path>\" or \"[host]:<port>\" to listen on."
+    )
+    parser.add_argument(
+        "--rowkey-sep",
+        type=str,
+        default=":",
+        help="The delimiter used in the row key."
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=100,
+        help="The maximum number of row keys fetched per request."
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=8,
+        help="The maximum number of concurrent requests of a lookup."
+    )
+    parser.add_argument(
+        "--max-rows",
+        type=int,
+        default=10000,
+        help="The maximum number of rows returned by a scan."
+    )
+    parser.add_argument(
+        "--data-only",
+        action="store_true",
+        help="Use a data-only client instead of a client with admin access."
+    )
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="Decode rows without pydantic validation."
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Log every request."
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=0,
+        help="The maximum number of rows cached for the lookups of /rows, no cache if 0."
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=1.0,
+        help="The number of seconds a row is cached."
+    )
+    args = parser.parse_args()
+    main(args.project_id, args.instance_id, args.table, args.listen,
+         args.rowkey_sep, args.chunk_size, args.max_workers, args.max_rows,
+         not args.data_only, args.fast, args.verbose, args.cache_size, args.cache_ttl)
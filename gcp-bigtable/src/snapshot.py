@@ -0,0 +1,333 @@
+#!/usr/bin/env python
+"""Print the odds of every series of a match as of a point in time."""
+
+
+import argparse
+import decoder
+import getrows
+import keycodec
+import pool
+import query
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from google.cloud import happybase
+from google.cloud.bigtable.row_filters import CellsRowLimitFilter
+from google.cloud.bigtable.row_filters import RowFilterChain
+from google.cloud.bigtable.row_filters import RowKeyRegexFilter
+from google.cloud.bigtable.row_filters import StripValueTransformerFilter
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+# Only the row key of the first cell is returned, which is the cheapest way to read row keys.
+_KEYS_ONLY = [CellsRowLimitFilter(1), StripValueTransformerFilter(True)]
+
+
+class Series(NamedTuple):
+    """A series of rows sharing the row key prefix up to the vendor.
+
+    Attributes:
+        fields (Tuple[str, ...]): The ``sid``, ``lid``, ``mid``, ``mkt``, ``seq``, ``per`` and ``vendor`` fields.
+        first (Tuple[bytes, dict]): The first row of the series in row key order.
+    """
+    fields: Tuple[str, ...]
+    first: Tuple[bytes, dict]
+
+
+def _skip_scan(
+    table_instance, start: bytes, stop: bytes, codec: keycodec.RowKeyCodec, sep: str, columns, keys_only: bool
+) -> List[Series]:
+    """Find the series in ``[start, stop)`` with one single-row scan per series.
+
+    Every scan reads the first row at or after the cursor, and the cursor
+    then jumps past the prefix of the series of that row.
+    """
+    kwargs: dict = {}
+    if keys_only:
+        kwargs["filter"] = RowFilterChain(filters=list(_KEYS_ONLY))
+    found: List[Series] = []
+    cursor = start
+    while not stop or cursor < stop:
+        rows = list(table_instance.scan(
+            row_start=cursor, row_stop=stop or None, limit=1,
+            columns=None if keys_only else columns, **kwargs))
+        if not rows:
+            break
+        key, row = rows[0]
+        fields = tuple(keycodec.decode(key, sep)[:7])
+        found.append(Series(fields, (key, row)))
+        cursor = query.successor(codec.prefix(*fields)).encode("utf-8")
+    return found
+
+
+def find_series(
+    table_instance: happybase.Table,
+    match: query.OddsQuery,
+    splits: int = 4,
+    columns: Optional[List[str]] = None,
+    keys_only: bool = True,
+) -> List[Series]:
+    """Find the distinct series under the prefix selected by ``match``.
+
+    Rather than reading the whole history of the match, the prefix is
+    skip-scanned: a single row is read per series. The row key range is
+    split evenly into ``splits`` sub-ranges which are skip-scanned
+    concurrently.
+
+    Args:
+        table_instance(happybase.Table): The table instance to be scanned.
+        match (query.OddsQuery): The query selecting the match, and optionally leading fields of the series.
+        splits (int): The number of concurrent skip scans.
+        columns (List[str], optional): The columns of the first rows to retrieve, when ``keys_only`` is not set.
+        keys_only (bool): Read the row keys of the first rows only.
+
+    Returns:
+        List[Series]: The series in row key order.
+    """
+    codec = query.codec_of(match)
+    compiled = query.compile_query(match.copy(update={"ts_from": None, "ts_to": None}))
+    ranges = getrows.split_row_range(
+        table_instance, compiled.row_start, compiled.row_stop, splits, use_samples=False)
+
+    def _scan(sub_range):
+        return _skip_scan(
+            table_instance, sub_range[0], sub_range[1], codec, match.sep, columns, keys_only)
+
+    if len(ranges) == 1:
+        results = [_scan(ranges[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+            results = list(executor.map(_scan, ranges))
+
+    # A series straddling a boundary is found again in the next sub-range,
+    # past its first row. Only the first hit, in range order, is its start.
+    series: Dict[Tuple[str, ...], Series] = {}
+    for result in results:
+        for item in result:
+            series.setdefault(item.fields, item)
+    return list(series.values())
+
+
+def _latest_key_before(table_instance, series_query: query.OddsQuery) -> Optional[bytes]:
+    """Find the row key of the latest row of an ascending series selected by ``series_query``."""
+    compiled = query.compile_query(series_query)
+    filters = list(_KEYS_ONLY)
+    if compiled.key_regex is not None:
+        filters.insert(0, RowKeyRegexFilter(compiled.key_regex))
+    keys = deque(
+        (key for key, _ in table_instance.scan(
+            row_start=compiled.row_start, row_stop=compiled.row_stop,
+            filter=RowFilterChain(filters=filters))),
+        maxlen=1)
+    return keys[0] if keys else None
+
+
+def _latest_row_before(table_instance, series_query: query.OddsQuery, columns) -> Optional[Tuple[bytes, dict]]:
+    """Read the latest row of a latest-first series selected by ``series_query``."""
+    compiled = query.compile_query(series_query)
+    rows = list(table_instance.scan(
+        row_start=compiled.row_start, row_stop=compiled.row_stop, limit=1, columns=columns))
+    return rows[0] if rows else None
+
+
+def get_snapshot(
+    table_instance: happybase.Table,
+    sid,
+    lid,
+    mid,
+    at: int,
+    mkt: Optional[str] = None,
+    version: int = 1,
+    sep: str = ":",
+    columns: Optional[List[str]] = None,
+    max_workers: int = 16,
+    splits: int = 4,
+    fast: bool = False,
+) -> list:
+    """Get the odds of every series of a match as of the epoch timestamp ``at``.
+
+    The series are found by :func:`find_series`, then the latest row at or
+    before ``at`` of every series is looked up concurrently with a scan
+    bounded to that series and time window. Series without any row at or
+    before ``at`` are left out.
+
+    With the latest-first layout (``version`` 2), the skip scan already
+    reads the newest row of every series, so only the series updated after
+    ``at`` need a lookup, which reads a single row. With the original layout
+    (``version`` 1), the row keys of the window are scanned without values
+    and the latest rows are fetched by one batched ``rows()`` call.
+
+    Args:
+        table_instance(happybase.Table): The table instance to be scanned.
+        sid: The sport ID.
+        lid: The league ID.
+        mid: The match ID.
+        at (int): The epoch timestamp of the snapshot, inclusive.
+        mkt (str, optional): Restrict the snapshot to the given market.
+        version (int): The version of the row key layout in :mod:`keycodec`.
+        sep (str): The delimiter used in the row keys of the original layout.
+        columns (List[str], optional): The columns or column families to retrieve.
+        max_workers (int): The maximum number of concurrent lookups.
+        splits (int): The number of concurrent skip scans finding the series.
+        fast (bool): Return unvalidated ``decoder.OddRow`` objects instead of ``RowModelOdd``.
+
+    Returns:
+        list: One row per series, in row key order.
+    """
+    match = query.OddsQuery(
+        sid=str(sid), lid=str(lid), mid=str(mid), mkt=mkt, version=version, sep=sep)
+    latest_first = version == keycodec.LATEST_FIRST.version
+    series = find_series(table_instance, match, splits, columns, keys_only=not latest_first)
+
+    def _series_query(item: Series) -> query.OddsQuery:
+        return query.OddsQuery(
+            **dict(zip(query.FIELDS, item.fields)), ts_to=at, version=version, sep=sep)
+
+    rows: Dict[Tuple[str, ...], Tuple[bytes, dict]] = {}
+    pending: List[Series] = []
+    for item in series:
+        if latest_first and keycodec.decode(item.first[0], sep).ts <= at:
+            rows[item.fields] = item.first
+        else:
+            pending.append(item)
+
+    if pending:
+        if latest_first:
+            def _lookup(item):
+                return _latest_row_before(table_instance, _series_query(item), columns)
+        else:
+            def _lookup(item):
+                return _latest_key_before(table_instance, _series_query(item))
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as executor:
+            results = list(executor.map(_lookup, pending))
+        if latest_first:
+            for item, row in zip(pending, results):
+                if row is not None:
+                    rows[item.fields] = row
+        else:
+            keys = [key for key in results if key is not None]
+            fetched = dict(table_instance.rows(keys, columns)) if keys else {}
+            for item, key in zip(pending, results):
+                if key in fetched:
+                    rows[item.fields] = (key, fetched[key])
+
+    snapshot = []
+    for item in series:
+        row = rows.get(item.fields)
+        if row is not None:
+            odd_row = decoder.decode_row(row[0], row[1], sep)
+            snapshot.append(odd_row if fast else odd_row.to_model())
+    return snapshot
+
+
+def main(
+    project_id: str,
+    instance_id: str,
+    table_name: str,
+    sid: str,
+    lid: str,
+    mid: str,
+    at: int,
+    mkt: Optional[str] = None,
+    version: int = 1,
+    sep: str = ":",
+    max_workers: int = 16,
+    admin: bool = True,
+    fast: bool = False,
+) -> None:
+    """The main function of ``snapshot.py`` program.
+
+    Args:
+        project_id (str): Project ID on GCP.
+        instance_id (str): Bigtable instance ID on GCP.
+        table_name (str): Table name in Bigtable instance on GCP.
+        sid (str): The sport ID.
+        lid (str): The league ID.
+        mid (str): The match ID.
+        at (int): The epoch timestamp of the snapshot.
+        mkt (str, optional): Restrict the snapshot to the given market.
+        version (int): The version of the row key layout in :mod:`keycodec`.
+        sep (str): The delimiter used in the row keys of the original layout.
+        max_workers (int): The maximum number of concurrent lookups.
+        admin (bool): Whether to use a client with admin access instead of a data-only client.
+        fast (bool): Decode rows into unvalidated ``decoder.OddRow`` objects.
+    """
+    table = pool.get_pool(admin).table(project_id, instance_id, table_name)
+    start = time.time()
+    rows = get_snapshot(
+        table, sid, lid, mid, at, mkt, version, sep,
+        max_workers=max_workers, fast=fast)
+    end = time.time()
+    for row in rows:
+        print(row._asdict() if fast else row.dict())
+    print("Elapsed time for the snapshot of {} series: {}s".format(len(rows), end - start))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument(
+        'project_id',
+        type=str,
+        help='Your Cloud Platform project ID.'
+    )
+    parser.add_argument(
+        'instance_id',
+        type=str,
+        help='ID of the Cloud Bigtable instance to connect to.')
+    parser.add_argument(
+        'sid',
+        type=str,
+        help='The sport ID.')
+    parser.add_argument(
+        'lid',
+        type=str,
+        help='The league ID.')
+    parser.add_argument(
+        'mid',
+        type=str,
+        help='The match ID.')
+    parser.add_argument(
+        'at',
+        type=int,
+        help='The epoch timestamp of the snapshot.')
+    parser.add_argument(
+        '--table',
+        type=str,
+        help='Table to read odd data from.',
+        default='odds')
+    parser.add_argument(
+        '--mkt',
+        type=str,
+        help='Restrict the snapshot to the given market.')
+    parser.add_argument(
+        '--rowkey-version',
+        type=int,
+        choices=[1, 2],
+        default=1,
+        help='The row key layout the rows are stored with.')
+    parser.add_argument(
+        '--rowkey-sep',
+        type=str,
+        default=':',
+        help='The delimiter used in the row keys of the original layout.')
+    parser.add_argument(
+        '--max-workers',
+        type=int,
+        default=16,
+        help='The maximum number of concurrent lookups.')
+    parser.add_argument(
+        '--data-only',
+        action='store_true',
+        help='Use a data-only client instead of a client with admin access.')
+    parser.add_argument(
+        '--fast',
+        action='store_true',
+        help='Decode rows without pydantic validation.')
+
+    args = parser.parse_args()
+    main(args.project_id, args.instance_id, args.table,
+         args.sid, args.lid, args.mid, args.at, args.mkt,
+         args.rowkey_version, args.rowkey_sep, args.max_workers,
+         not args.data_only, args.fast)
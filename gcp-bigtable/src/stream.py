@@ -0,0 +1,497 @@
+#!/usr/bin/env python
+"""Write a live feed of odds messages read from stdin or a local socket into Bigtable."""
+
+
+import argparse
+import cellcodec
+import csv
+import delta
+import errno
+import json
+import os
+import queue
+import socket
+import stat
+import sys
+import threading
+import time
+import typing
+import writerows
+from collections import OrderedDict
+from pydantic import BaseModel
+
+
+CSV_FIELDS = (
+    "vendor", "game_state", "score", "game_time", "market", "created_ts",
+    "oddSeq", "h", "a", "d", "k", "ov", "ud",
+)
+_EOF = object()
+
+
+class StreamOptions(BaseModel):
+    """Options of the streaming ingest.
+
+    Args:
+        fmt (str): The format of the messages, either ``ndjson`` or ``csv`` with a header line.
+        max_rows (int): Flush once this number of distinct row keys is pending.
+        max_bytes (int): Flush once this number of bytes is pending.
+        max_delay (float): Flush once the oldest pending message waited this number of seconds.
+        queue_size (int): The maximum number of parsed messages waiting for the writer.
+        rowkey_version (int): The version of the row key layout in :mod:`keycodec`.
+        cell_format (int): The storage format of the cells, see :class:`writerows.IngestOptions`.
+        delta (bool): Skip the messages which do not change the odds or information of their series.
+        delta_ignore (List[str]): The columns not compared in ``delta`` mode, e.g., ``info:et``.
+        admin (bool): Whether to use a client with admin access instead of a data-only client.
+    """
+    fmt: str = "ndjson"
+    max_rows: int = 500
+    max_bytes: int = 1024 * 1024
+    max_delay: float = 0.05
+    queue_size: int = 10000
+    rowkey_version: int = 1
+    cell_format: int = 1
+    delta: bool = False
+    delta_ignore: typing.List[str] = []
+    admin: bool = True
+
+
+class MicroBatcher(object):
+    """Accumulate row mutations into micro-batches bounded in rows, bytes and delay.
+
+    Repeated updates of the same row key within a batch are coalesced into
+    one mutation, the columns of later updates overriding earlier ones.
+
+    Args:
+        max_rows (int): The maximum number of distinct row keys per batch.
+        max_bytes (int): The maximum number of bytes per batch.
+        max_delay (float): The maximum number of seconds a mutation waits in a batch.
+        clock (typing.Callable[[], float]): The monotonic clock.
+
+    Attributes:
+        coalesced (int): The number of updates merged into a pending mutation.
+    """
+
+    def __init__(
+        self,
+        max_rows: int = 500,
+        max_bytes: int = 1024 * 1024,
+        max_delay: float = 0.05,
+        clock: typing.Callable[[], float] = time.monotonic,
+    ):
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self._clock = clock
+        self._pending: "OrderedDict[str, dict]" = OrderedDict()
+        self._bytes = 0
+        self._since: typing.Optional[float] = None
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, rowkey: str, data: dict) -> bool:
+        """Add a row mutation.
+
+        Args:
+            rowkey (str): The row key.
+            data (dict): The mapping from encoded column names to encoded values.
+
+        Returns:
+            bool: Whether the batch is full and has to be flushed.
+        """
+        if self._since is None:
+            self._since = self._clock()
+        pending = self._pending.get(rowkey)
+        if pending is None:
+            self._pending[rowkey] = dict(data)
+            self._bytes += len(rowkey)
+        else:
+            self.coalesced += 1
+            pending.update(data)
+        self._bytes += sum(len(k) + len(v) for k, v in data.items())
+        return len(self._pending) >= self.max_rows or self._bytes >= self.max_bytes
+
+    def timeout(self) -> typing.Optional[float]:
+        """Get the number of seconds until the pending batch is due.
+
+        Returns:
+            typing.Optional[float]: The remaining delay, or ``None`` if nothing is pending.
+        """
+        if self._since is None:
+            return None
+        return max(0.0, self._since + self.max_delay - self._clock())
+
+    def drain(self) -> typing.List[typing.Tuple[str, dict]]:
+        """Take the pending mutations, in the order their row keys arrived.
+
+        Returns:
+            typing.List[typing.Tuple[str, dict]]: The pending mutations.
+        """
+        batch = list(self._pending.items())
+        self._pending = OrderedDict()
+        self._bytes = 0
+        self._since = None
+        return batch
+
+
+def _decode_lines(
+        lines: typing.Iterable[typing.Union[str, bytes]],
+        errors: typing.Optional[typing.List[int]]) -> typing.Iterator[str]:
+    for line in lines:
+        if isinstance(line, bytes):
+            try:
+                line = line.decode("utf-8")
+            except UnicodeDecodeError:
+                if errors is None:
+                    raise
+                errors[0] += 1
+                continue
+        yield line
+
+
+def _parse_json(lines: typing.Iterable[str], errors: typing.Optional[typing.List[int]]) -> typing.Iterator[dict]:
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("Not a JSON object: {!r}".format(line))
+        except ValueError:
+            if errors is None:
+                raise
+            errors[0] += 1
+            continue
+        yield record
+
+
+def parse_messages(
+        lines: typing.Iterable[typing.Union[str, bytes]],
+        fmt: str = "ndjson",
+        errors: typing.Optional[typing.List[int]] = None) -> typing.Iterator[writerows.CSVModel]:
+    """Parse the lines of a feed into ``CSVModel`` objects.
+
+    Fields missing from a message are empty, as in a CSV row. Every line
+    is decoded and parsed on its own, so that a malformed line only loses
+    its own message when ``errors`` is given.
+
+    Args:
+        lines (typing.Iterable[typing.Union[str, bytes]]): The lines of the feed, UTF-8 encoded if bytes.
+        fmt (str): Either ``ndjson``, one JSON object per line, or ``csv`` starting with a header line.
+        errors (typing.List[int], optional): If given, the malformed lines are skipped and counted
+            in its first item instead of raising.
+
+    Yields:
+        writerows.CSVModel: The model corresponding to one message.
+    """
+    decoded = _decode_lines(lines, errors)
+    if fmt == "csv":
+        records: typing.Iterable[dict] = csv.DictReader(decoded)
+    elif fmt == "ndjson":
+        records = _parse_json(decoded, errors)
+    else:
+        raise ValueError("Unknown format: {}".format(fmt))
+    empty = dict.fromkeys(CSV_FIELDS, "")
+    for record in records:
+        yield writerows.CSVModel(o={**empty, **{k: "" if v is None else str(v) for k, v in record.items()}})
+
+
+def remove_stale_socket(path: str) -> None:
+    """Remove the Unix socket left at ``path`` by a previous run, if any.
+
+    Args:
+        path (str): The path of the Unix socket.
+
+    Raises:
+        FileExistsError: If something other than a socket exists at ``path``.
+    """
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(errno.EEXIST, "Not a socket", path)
+    os.unlink(path)
+
+
+def listen(address: str) -> socket.socket:
+    """Create a socket listening on ``address``.
+
+    Args:
+        address (str): ``unix:<path>`` or ``[host]:<port>``, the host defaulting to 127.0.0.1.
+
+    Returns:
+        socket.socket: The listening socket.
+
+    Raises:
+        OSError: If the address cannot be bound, e.g., the port is taken.
+    """
+    if address.startswith("unix:"):
+        path = address[len("unix:"):]
+        remove_stale_socket(path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        bound: typing.Union[str, typing.Tuple[str, int]] = path
+    else:
+        host, _, port = address.rpartition(":")
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        bound = (host or "127.0.0.1", int(port))
+    try:
+        server.bind(bound)
+        server.listen()
+    except OSError:
+        server.close()
+        raise
+    return server
+
+
+def _accept(server: socket.socket, sources: queue.Queue) -> None:
+    """Accept connections on ``server`` and put every connection into ``sources``."""
+    while True:
+        conn, _ = server.accept()
+        sources.put(conn)
+
+
+def _consume(source, out: queue.Queue, options: StreamOptions, errors: typing.List[int]) -> None:
+    """Parse the lines of one source into row mutations put into ``out``."""
+    if isinstance(source, socket.socket):
+        # Read as bytes, so that an undecodable line only loses its own message.
+        with source, source.makefile("rb") as lines:
+            _consume(lines, out, options, errors)
+        return
+    for csv_model in parse_messages(source, options.fmt, errors):
+        try:
+            out.put(writerows.gen_row_mutation(csv_model, options.rowkey_version))
+        except (KeyError, ValueError):
+            errors[0] += 1
+
+
+def _dispatch(sources: queue.Queue, out: queue.Queue, options: StreamOptions, errors: typing.List[int]) -> None:
+    """Parse every source taken from ``sources`` on its own thread until the end of the stream."""
+    consumers = []
+    while True:
+        source = sources.get()
+        if source is _EOF:
+            break
+        consumer = threading.Thread(target=_consume, args=(source, out, options, errors), daemon=True)
+        consumer.start()
+        consumers.append(consumer)
+    for consumer in consumers:
+        consumer.join()
+    out.put(_EOF)
+
+
+def stream_ingest(
+    table,
+    sources: queue.Queue,
+    options: typing.Optional[StreamOptions] = None,
+    stats: typing.Optional[dict] = None,
+) -> typing.Tuple[int, int]:
+    """Write the messages of a live feed through latency-bounded micro-batches.
+
+    Every item of ``sources`` is either an iterable of lines, e.g.,
+    ``sys.stdin.buffer``, or a connected socket, and is parsed on its own thread. The sentinel put by
+    :func:`end_of_stream` ends the ingest once the lines before it are written.
+
+    Args:
+        table (happybase.Table): The target table instance.
+        sources (queue.Queue): The line sources.
+        options (StreamOptions, optional): The options of the ingest. Defaults to ``StreamOptions()``.
+        stats (dict, optional): If given, updated with the counters of the ingest.
+
+    Returns:
+        typing.Tuple[int, int]: The number of rows and cells written.
+    """
+    options = options or StreamOptions()
+    mutations: queue.Queue = queue.Queue(maxsize=options.queue_size)
+    errors = [0]
+    batcher = MicroBatcher(options.max_rows, options.max_bytes, options.max_delay)
+    delta_filter = None
+    if options.delta:
+        delta_filter = delta.DeltaFilter(ignore=[col.encode("utf-8") for col in options.delta_ignore])
+    num_rows = 0
+    num_cells = 0
+    messages = 0
+    flushes = 0
+    max_latency = 0.0
+
+    def _flush() -> None:
+        nonlocal num_rows, num_cells, flushes, max_latency
+        waited = options.max_delay - (batcher.timeout() or 0.0)
+        batch = batcher.drain()
+        if delta_filter is not None:
+            batch = list(delta_filter.filter(batch))
+        if options.cell_format == 2:
+            batch = [(rowkey, cellcodec.pack_columns(data)) for rowkey, data in batch]
+        start = time.monotonic()
+        rows, cells = writerows.write_mutations(table, batch, len(batch) or 1, sys.maxsize)
+        max_latency = max(max_latency, waited + time.monotonic() - start)
+        num_rows += rows
+        num_cells += cells
+        flushes += 1
+
+    try:
+        threading.Thread(target=_dispatch, args=(sources, mutations, options, errors), daemon=True).start()
+        while True:
+            try:
+                item = mutations.get(timeout=batcher.timeout())
+            except queue.Empty:
+                _flush()
+                continue
+            if item is _EOF:
+                break
+            messages += 1
+            if batcher.add(*item):
+                _flush()
+    except KeyboardInterrupt:
+        # Interrupting is the normal end of a live feed: the messages parsed so far are written.
+        while True:
+            try:
+                item = mutations.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _EOF:
+                messages += 1
+                batcher.add(*item)
+        raise
+    finally:
+        try:
+            if len(batcher):
+                _flush()
+        finally:
+            if stats is not None:
+                stats.update(
+                    messages=messages, rows=num_rows, cells=num_cells, flushes=flushes,
+                    coalesced=batcher.coalesced, errors=errors[0], max_latency=max_latency,
+                    skipped=delta_filter.skipped if delta_filter is not None else 0)
+    return num_rows, num_cells
+
+
+def end_of_stream(sources: queue.Queue) -> None:
+    """Mark the end of the line sources given to :func:`stream_ingest`.
+
+    Args:
+        sources (queue.Queue): The line sources.
+    """
+    sources.put(_EOF)
+
+
+def main(
+        project_id: str,
+        instance_id: str,
+        table_name: str,
+        source: str = "-",
+        options: typing.Optional[StreamOptions] = None):
+    """The main function of this program.
+
+    Args:
+        project_id (str): The target project ID on GCP.
+        instance_id (str): The target Bigtable instance ID on GCP.
+        table_name (str): The target table name in the specified Bigtable instance.
+        source (str): ``-`` for stdin, ``unix:<path>`` or ``[host]:<port>`` for a local socket.
+        options (StreamOptions, optional): The options of the ingest. Defaults to ``StreamOptions()``.
+    """
+    options = options or StreamOptions()
+    table = writerows.get_table(project_id, instance_id, table_name, options.admin)
+    sources: queue.Queue = queue.Queue()
+    if source == "-":
+        sources.put(sys.stdin.buffer)
+        end_of_stream(sources)
+    else:
+        # Bound here, so that a taken port or a bad path fails the program instead of a thread.
+        server = listen(source)
+        threading.Thread(target=_accept, args=(server, sources), daemon=True).start()
+
+    stats: dict = {}
+    start = time.time()
+    try:
+        stream_ingest(table, sources, options, stats)
+    except KeyboardInterrupt:
+        pass
+    elapsed = time.time() - start
+    print("Elapsed time for streaming: {}s".format(elapsed))
+    print(stats)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument(
+        'project_id',
+        type=str,
+        help='Your Cloud Platform project ID.'
+    )
+    parser.add_argument(
+        'instance_id',
+        type=str,
+        help='ID of the Cloud Bigtable instance to connect to.')
+    parser.add_argument(
+        '--source',
+        type=str,
+        help='"-" for stdin, "unix:<path>" or "[host]:<port>" to listen on a local socket.',
+        default='-')
+    parser.add_argument(
+        '--table',
+        type=str,
+        help='Table to write odd data.',
+        default='odds')
+    parser.add_argument(
+        '--format',
+        choices=['ndjson', 'csv'],
+        help='Format of the messages. CSV input starts with a header line.',
+        default='ndjson')
+    parser.add_argument(
+        '--max-rows',
+        type=int,
+        help='Flush once this number of distinct row keys is pending.',
+        default=500)
+    parser.add_argument(
+        '--max-bytes',
+        type=int,
+        help='Flush once this number of bytes is pending.',
+        default=1024 * 1024)
+    parser.add_argument(
+        '--max-delay',
+        type=float,
+        help='Flush once the oldest pending message waited this number of seconds.',
+        default=0.05)
+    parser.add_argument(
+        '--rowkey-version',
+        type=int,
+        choices=[1, 2],
+        help='Row key layout: 1 for ascending timestamps, 2 for latest first.',
+        default=1)
+    parser.add_argument(
+        '--cell-format',
+        type=int,
+        choices=[1, 2],
+        help='Storage format: 1 for one cell per value, 2 for packed binary cells.',
+        default=1)
+    parser.add_argument(
+        '--delta',
+        action='store_true',
+        help='Skip messages which do not change the odds or information of their series.')
+    parser.add_argument(
+        '--delta-ignore',
+        action='append',
+        default=[],
+        help='A column, e.g. "info:et", not compared in delta mode.')
+    parser.add_argument(
+        '--data-only',
+        action='store_true',
+        help='Use a data-only client instead of a client with admin access.')
+
+    args = parser.parse_args()
+    options = StreamOptions(
+        fmt=args.format,
+        max_rows=args.max_rows,
+        max_bytes=args.max_bytes,
+        max_delay=args.max_delay,
+        rowkey_version=args.rowkey_version,
+        cell_format=args.cell_format,
+        delta=args.delta,
+        delta_ignore=args.delta_ignore,
+        admin=not args.data_only)
+    main(args.project_id, args.instance_id, args.table, args.source, options)
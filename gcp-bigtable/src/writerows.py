@@ -2,11 +2,26 @@
 
 import csv
 import datetime
+import glob
+import queue
+import threading
+import time
+import types
 import typing
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+import cache
+import cellcodec
+import checkpoint
+import delta
+import fastcsv
+import flow
+import index
+import keycodec
+import metrics
+import pool
+import rollup
 from pydantic import BaseModel
-from google.cloud import bigtable
-from google.cloud import happybase
 
 
 class CSVModel(BaseModel):
@@ -26,10 +41,13 @@ def gen_rowkey(
         seq: int,
         period: str,
         vendor: str,
-        timestamp: int) -> str:
+        timestamp: int,
+        version: int = 1) -> str:
     """Generate a row key based on the following format with ``#`` as the seperator.
     
     <sport_id>#<league_id>#<match_id>#<market>#<seq>#<period>#<vendor>#<timestamp>,
+
+    With ``version`` 2, the latest-first layout of :class:`keycodec.ReverseTsCodec` is used instead.
     
     Args:
         sport_id (int): The sport ID.
@@ -40,13 +58,14 @@ def gen_rowkey(
         period (str): The abbriviated current period, e.g., 1st half (`1h`)/2nd half (`2h`) in soccer, 1st quarter/2nd quarter/... etc. in basketball.
         vendor (str): The vendor from which the odd messages originate.
         timestamp (int): The epoch timestamp of the creation time included in the original odd message.
+        version (int): The version of the row key layout in :mod:`keycodec`.
 
     Returns:
         str: The row key corresponds to the given input prarmeters.
     """
-    rowkey_list = [str(sport_id), str(league_id), str(match_id), market,
-                   str(seq), period, vendor, str(timestamp)]
-    return ":".join(rowkey_list)
+    key = keycodec.RowKey(str(sport_id), str(league_id), str(match_id), market,
+                          str(seq), period, vendor, int(timestamp))
+    return keycodec.get_codec(version).encode(key)
 
 
 def get_column_dict(model_instance) -> dict:
@@ -88,49 +107,724 @@ def get_column_dict(model_instance) -> dict:
     return cols
 
 
-def main(project_id: str, instance_id: str, src: str, table_name: str):
+def _message_rowkey(market: str, seq: str, game_state: str, vendor: str, ts: int, version: int) -> str:
+    """Generate the row key of one odds message from its fields."""
+    return gen_rowkey(
+        1,
+        213,
+        7654321,
+        market,
+        seq if seq else "0",
+        "pre" if game_state in ["prematch"] else game_state,
+        vendor,
+        ts,
+        version
+    )
+
+
+def gen_row_mutation(csv_model: CSVModel, version: int = 1) -> typing.Tuple[str, dict]:
+    """Generate the row key and the whole column mapping of one CSV row.
+
+    All the columns given by :func:`get_column_dict` are gathered into a single 
+    mapping so that one CSV row can be written by means of one mutation.
+
+    Args:
+        csv_model (CSVModel): The corresponding CSVModel instance to one CSV row from odds message.
+        version (int): The version of the row key layout in :mod:`keycodec`.
+
+    Returns:
+        typing.Tuple[str, dict]: The row key and the mapping from encoded column names to encoded values.
+    """
+    ts = int(datetime.datetime.fromisoformat(csv_model.o["created_ts"]).timestamp())
+    rowkey = _message_rowkey(
+        csv_model.o["market"], csv_model.o["oddSeq"], csv_model.o["game_state"],
+        csv_model.o["vendor"], ts, version)
+    data = {}
+    for family, cols in get_column_dict(csv_model).items():
+        for k, v in cols.items():
+            column_name = "{fam}:{qualifier}".format(fam=family, qualifier=k)
+            data[column_name.encode('utf-8')] = v.encode('utf-8')
+    return rowkey, data
+
+
+class _FieldNames(dict):
+    """A row mapping every missing field to its own name."""
+
+    def __missing__(self, key: str) -> str:
+        return key
+
+
+def _column_layout(market: str) -> typing.List[typing.Tuple[bytes, str]]:
+    """Get the encoded column names of a market along with the CSV fields they come from."""
+    template = types.SimpleNamespace(o=_FieldNames(market=market))
+    return [
+        ("{fam}:{qualifier}".format(fam=family, qualifier=k).encode('utf-8'), field)
+        for family, cols in get_column_dict(template).items()
+        for k, field in cols.items()
+    ]
+
+
+def gen_chunk_mutations(
+        chunk: fastcsv.CsvChunk,
+        version: int = 1) -> typing.Iterator[typing.Tuple[int, typing.Tuple[str, dict]]]:
+    """Generate the row mutations of a chunk of CSV rows without building any ``CSVModel``.
+
+    The mutations are the ones of :func:`gen_row_mutation`. The columns of 
+    a market are derived once per chunk from :func:`get_column_dict`, and the 
+    timestamps are converted per chunk by :meth:`fastcsv.CsvChunk.timestamps`.
+
+    Args:
+        chunk (fastcsv.CsvChunk): The chunk of CSV rows.
+        version (int): The version of the row key layout in :mod:`keycodec`.
+
+    Yields:
+        typing.Tuple[int, typing.Tuple[str, dict]]: The byte offset after a row and the row mutation.
+    """
+    columns = chunk.columns
+    ts = chunk.timestamps("created_ts").tolist()
+    offsets = chunk.offsets.tolist()
+    series_fields: dict = {}
+    layouts: dict = {}
+    series = zip(columns["market"], columns["oddSeq"], columns["game_state"], columns["vendor"])
+    for i, key in enumerate(series):
+        fields = series_fields.get(key)
+        if fields is None:
+            fields = tuple(value.decode('utf-8') for value in key)
+            series_fields[key] = fields
+        layout = layouts.get(key[0])
+        if layout is None:
+            layout = [(column, columns[field]) for column, field in _column_layout(fields[0])]
+            layouts[key[0]] = layout
+        data = {column: values[i] for column, values in layout}
+        yield offsets[i], (_message_rowkey(*fields, ts[i], version), data)
+
+
+def read_csv_models(src: str) -> typing.Iterator[CSVModel]:
+    """Read the given CSV file lazily and yield one ``CSVModel`` per row.
+
+    Args:
+        src (str): The source CSV file.
+
+    Yields:
+        CSVModel: The model corresponding to one CSV row.
+    """
+    with open(src, 'r') as csv_file:
+        for row in csv.DictReader(csv_file):
+            yield CSVModel(o=row)
+
+
+def read_csv_rows(src: str, offset: int = 0) -> typing.Iterator[typing.Tuple[int, CSVModel]]:
+    """Read the given CSV file lazily from a byte offset, along with the offset after every row.
+
+    Args:
+        src (str): The source CSV file.
+        offset (int): The byte offset of the first row to read, e.g., from a checkpoint. 0 for the first row.
+
+    Yields:
+        typing.Tuple[int, CSVModel]: The byte offset after a row and the model corresponding to the row.
+    """
+    with open(src, 'rb') as csv_file:
+        header = csv_file.readline()
+        position = max(offset, len(header))
+        csv_file.seek(position)
+
+        def _lines():
+            nonlocal position
+            yield header.decode('utf-8')
+            for line in csv_file:
+                position += len(line)
+                yield line.decode('utf-8')
+
+        # The reader pulls the lines of one row at a time, so ``position`` is the end of the row.
+        for row in csv.DictReader(_lines()):
+            yield position, CSVModel(o=row)
+
+
+class IngestOptions(BaseModel):
+    """Options of writing CSV files into Bigtable.
+
+    Args:
+        bulk (bool): Write one mutation per row key in batches instead of one ``put`` per column.
+        batch_size (int): The maximum number of rows per batch.
+        batch_bytes (int): The maximum number of bytes per batch.
+        workers (int): The number of writer threads per file. More than one implies ``bulk``.
+        queue_size (int): The maximum number of chunks waiting for a writer.
+        admin (bool): Whether to use a client with admin access instead of a data-only client.
+        delta (bool): Skip the rows which do not change the odds or information of their series.
+        delta_ignore (List[str]): The columns not compared in ``delta`` mode, e.g., ``info:et``.
+        heartbeat (int, optional): The minimal number of seconds between heartbeats in ``delta`` mode.
+        rowkey_version (int): The version of the row key layout in :mod:`keycodec`.
+        cell_format (int): The storage format of the cells, i.e., 1 for one cell per value or 2 for the packed cells of :mod:`cellcodec`.
+        rollups (List[str]): The bucket sizes of the OHLC rollups maintained, e.g., ``["1m", "1h"]``.
+        rollup_table (str, optional): The table of the rollups. Defaults to the target table name suffixed with ``_rollup``.
+        indexes (List[str]): The kinds of secondary index maintained among :data:`index.KINDS`. Implies ``bulk``.
+        index_table (str, optional): The table of the indexes. Defaults to the target table name suffixed with ``_index``.
+        index_bucket (int): The number of seconds of a time bucket of the ``time`` index.
+        flow_control (flow.FlowControl, optional): Pace the batches and retry the throttled row mutations. Implies ``bulk``.
+        checkpoint (bool): Persist the position up to which the rows are durably written. Implies ``bulk``.
+        checkpoint_dir (str, optional): The directory of the state files. Defaults to the directory of every source file.
+        checkpoint_interval (float): The minimal number of seconds between two saves of a state file.
+        resume (bool): Skip the rows durably written according to the state files. Implies ``checkpoint``.
+            Not supported with ``rollups``, whose open buckets are not checkpointed.
+        fast_csv (bool): Read the CSV files through :mod:`fastcsv` instead of ``csv.DictReader`` and ``CSVModel``.
+        warm_up (bool): Open the channels of the pooled tables before reading a file.
+    """
+    bulk: bool = False
+    batch_size: int = 1000
+    batch_bytes: int = 4 * 1024 * 1024
+    workers: int = 1
+    queue_size: int = 8
+    admin: bool = True
+    delta: bool = False
+    delta_ignore: typing.List[str] = []
+    heartbeat: typing.Optional[int] = None
+    rowkey_version: int = 1
+    cell_format: int = 1
+    rollups: typing.List[str] = []
+    rollup_table: typing.Optional[str] = None
+    indexes: typing.List[str] = []
+    index_table: typing.Optional[str] = None
+    index_bucket: int = 60
+    flow_control: typing.Optional[flow.FlowControl] = None
+    checkpoint: bool = False
+    checkpoint_dir: typing.Optional[str] = None
+    checkpoint_interval: float = 5.0
+    resume: bool = False
+    fast_csv: bool = False
+    warm_up: bool = False
+
+
+def put_mutations(table, mutations: typing.Iterable[typing.Tuple[str, dict]]) -> typing.Tuple[int, int]:
+    """Write row mutations by issuing one ``put`` per column.
+
+    Args:
+        table (happybase.Table): The target table instance.
+        mutations (typing.Iterable[typing.Tuple[str, dict]]): Pairs of row key and column mapping.
+
+    Returns:
+        typing.Tuple[int, int]: The number of rows and cells written.
+    """
+    m = metrics.get_metrics()
+    num_rows = 0
+    num_cells = 0
+    for rowkey, data in mutations:
+        for column_name, value in data.items():
+            with m.stage("rpc", "put"):
+                table.put(rowkey, {column_name: value})
+            num_cells += 1
+        num_rows += 1
+        if m.enabled:
+            m.count("written_rows")
+            m.count("written_cells", len(data))
+            m.count("written_bytes", metrics.row_size(rowkey, data))
+    return num_rows, num_cells
+
+
+def put_rows(table, csv_models: typing.Iterable[CSVModel]) -> typing.Tuple[int, int]:
+    """Write rows by issuing one ``put`` per column.
+
+    Args:
+        table (happybase.Table): The target table instance.
+        csv_models (typing.Iterable[CSVModel]): The rows to be written.
+
+    Returns:
+        typing.Tuple[int, int]: The number of rows and cells written.
+    """
+    return put_mutations(table, (gen_row_mutation(csv_model) for csv_model in csv_models))
+
+
+def get_table(project_id: str, instance_id: str, table_name: str, admin: bool = True):
+    """Get the table specified by ``table_name`` from the process-wide pool.
+
+    Args:
+        project_id (str): The target project ID on GCP.
+        instance_id (str): The target Bigtable instance ID on GCP.
+        table_name (str): The target table name in the specified Bigtable instance.
+        admin (bool): Whether to use a client with admin access instead of a data-only client.
+
+    Returns:
+        happybase.Table: A pooled table instance.
+    """
+    with metrics.get_metrics().stage("connect", "connect"):
+        return pool.get_pool(admin).table(project_id, instance_id, table_name)
+
+
+def write_mutations(
+        table,
+        mutations: typing.Iterable[typing.Tuple[str, dict]],
+        batch_size: int = 1000,
+        batch_bytes: int = 4 * 1024 * 1024,
+        indexer: typing.Optional[index.Indexer] = None,
+        writer: typing.Optional[flow.FlowWriter] = None,
+        progress: typing.Optional[checkpoint.Checkpoint] = None,
+        row_cache: typing.Optional[cache.RowCache] = None) -> typing.Tuple[int, int]:
+    """Write the given row mutations through a ``happybase`` batch.
+
+    The mutations are accumulated in a batch which is sent once either 
+    ``batch_size`` rows or ``batch_bytes`` bytes are pending.
+
+    With an ``indexer``, the index entries of the rows of a batch are 
+    written right after the batch is sent, so that an index entry never 
+    points to a row not written yet.
+
+    With a ``writer``, the batches are paced and their throttled row 
+    mutations re-submitted by :class:`flow.FlowBatch` instead.
+
+    With a ``progress``, all the rows read so far are marked as durably 
+    written once a batch, and its index entries, are sent.
+
+    With a ``row_cache``, the cached entries of the rows of a batch are 
+    invalidated right after the batch is sent, so that the readers of the 
+    cache, e.g., a :class:`cache.CachedTable`, see the rows written.
+
+    With the metrics enabled, the time spent producing the mutations, 
+    e.g., parsing the CSV rows, is attributed to the ``parse`` stage, the 
+    time spent filling the batch to the ``batch`` stage and the sends to 
+    the ``rpc`` stage, every send being a ``write_batch`` operation.
+
+    Args:
+        table (happybase.Table): The target table instance.
+        mutations (typing.Iterable[typing.Tuple[str, dict]]): Pairs of row key and column mapping.
+        batch_size (int): The maximum number of rows pending in a batch.
+        batch_bytes (int): The maximum number of bytes pending in a batch.
+        indexer (index.Indexer, optional): The writer of the index entries.
+        writer (flow.FlowWriter, optional): The flow-controlled writer of ``table``.
+        progress (checkpoint.Checkpoint, optional): The checkpoint of the source of ``mutations``.
+        row_cache (cache.RowCache, optional): The cache of the rows of ``table`` to invalidate.
+
+    Returns:
+        typing.Tuple[int, int]: The number of rows and cells written.
+    """
+    m = metrics.get_metrics()
+    laps = m.laps() if m.enabled else None
+    num_rows = 0
+    num_cells = 0
+    pending_rows = 0
+    pending_bytes = 0
+    pending_keys: typing.List[str] = []
+    sent_cells = 0
+    with (writer.batch() if writer is not None else table.batch()) as batch:
+        for rowkey, data in mutations:
+            if laps is not None:
+                laps.lap("parse")
+            batch.put(rowkey, data)
+            num_rows += 1
+            num_cells += len(data)
+            pending_rows += 1
+            pending_bytes += len(rowkey) + sum(len(k) + len(v) for k, v in data.items())
+            if indexer is not None or row_cache is not None:
+                pending_keys.append(rowkey)
+            if pending_rows >= batch_size or pending_bytes >= batch_bytes:
+                if laps is not None:
+                    laps.lap("batch")
+                    sent = time.perf_counter()
+                batch.send()
+                if laps is not None:
+                    _count_written(m, time.perf_counter() - sent, pending_rows, num_cells - sent_cells,
+                                   pending_bytes)
+                    sent_cells = num_cells
+                pending_rows = 0
+                pending_bytes = 0
+                if pending_keys:
+                    _written(pending_keys, indexer, row_cache)
+                    pending_keys = []
+                if progress is not None:
+                    progress.commit()
+                if laps is not None:
+                    laps.lap("rpc")
+        if laps is not None:
+            laps.lap("batch")
+            sent = time.perf_counter()
+    # The pending mutations are sent on exit.
+    if laps is not None and pending_rows:
+        _count_written(m, time.perf_counter() - sent, pending_rows, num_cells - sent_cells, pending_bytes)
+    if pending_keys:
+        _written(pending_keys, indexer, row_cache)
+    if progress is not None:
+        progress.commit()
+    if laps is not None:
+        laps.lap("rpc")
+        laps.close()
+    return num_rows, num_cells
+
+
+def _written(rowkeys: typing.List[str], indexer: typing.Optional[index.Indexer],
+             row_cache: typing.Optional[cache.RowCache]) -> None:
+    """Index and invalidate the rows of a batch once it is sent."""
+    if indexer is not None:
+        indexer.write(rowkeys)
+    if row_cache is not None:
+        row_cache.invalidate(rowkey.encode("utf-8") for rowkey in rowkeys)
+
+
+def _count_written(m: metrics.Metrics, latency: float, rows: int, cells: int, num_bytes: int) -> None:
+    m.observe("write_batch", latency)
+    m.count("written_rows", rows)
+    m.count("written_cells", cells)
+    m.count("written_bytes", num_bytes)
+
+
+def put_rows_bulk(
+        table,
+        csv_models: typing.Iterable[CSVModel],
+        batch_size: int = 1000,
+        batch_bytes: int = 4 * 1024 * 1024) -> typing.Tuple[int, int]:
+    """Write rows by means of one mutation per row key flushed in batches.
+
+    Args:
+        table (happybase.Table): The target table instance.
+        csv_models (typing.Iterable[CSVModel]): The rows to be written.
+        batch_size (int): The maximum number of rows pending in a batch.
+        batch_bytes (int): The maximum number of bytes pending in a batch.
+
+    Returns:
+        typing.Tuple[int, int]: The number of rows and cells written.
+    """
+    mutations = (gen_row_mutation(csv_model) for csv_model in csv_models)
+    return write_mutations(table, mutations, batch_size, batch_bytes)
+
+
+def write_mutations_parallel(
+        project_id: str,
+        instance_id: str,
+        table_name: str,
+        mutations: typing.Iterable[typing.Tuple[str, dict]],
+        workers: int = 4,
+        batch_size: int = 1000,
+        batch_bytes: int = 4 * 1024 * 1024,
+        queue_size: int = 8,
+        admin: bool = True,
+        index_table: typing.Optional[str] = None,
+        indexes: typing.Sequence[str] = index.KINDS,
+        index_bucket: int = 60,
+        controller: typing.Optional[flow.RateController] = None,
+        progress: typing.Optional[checkpoint.Checkpoint] = None) -> typing.Tuple[int, int]:
+    """Write row mutations through a reader stage feeding ``workers`` writer threads.
+
+    The calling thread consumes ``mutations``, which typically parses the 
+    rows, in chunks of ``batch_size`` rows. The chunks are handed over 
+    through a queue holding at most ``queue_size`` chunks, so that the 
+    reader blocks as soon as the writers fall behind. Every writer opens 
+    its own connection.
+
+    With a ``progress``, every chunk is sealed when handed over and 
+    confirmed once written, so that the durable position only covers 
+    chunks written without a gap.
+
+    Args:
+        project_id (str): The target project ID on GCP.
+        instance_id (str): The target Bigtable instance ID on GCP.
+        table_name (str): The target table name in the specified Bigtable instance.
+        mutations (typing.Iterable[typing.Tuple[str, dict]]): Pairs of row key and column mapping.
+        workers (int): The number of writer threads.
+        batch_size (int): The maximum number of rows per batch.
+        batch_bytes (int): The maximum number of bytes per batch.
+        queue_size (int): The maximum number of chunks waiting for a writer.
+        admin (bool): Whether to use a client with admin access instead of a data-only client.
+        index_table (str, optional): The index table. No index is written if not given.
+        indexes (typing.Sequence[str]): The kinds of index among :data:`index.KINDS`.
+        index_bucket (int): The number of seconds of a time bucket of the ``time`` index.
+        controller (flow.RateController, optional): The rate controller shared by the writers, if flow-controlled.
+        progress (checkpoint.Checkpoint, optional): The checkpoint of the source of ``mutations``.
+
+    Returns:
+        typing.Tuple[int, int]: The number of rows and cells written.
+    """
+    chunks: queue.Queue = queue.Queue(maxsize=queue_size)
+    failed = threading.Event()
+    errors: list = []
+    counts: list = []
+    lock = threading.Lock()
+
+    def _writer():
+        num_rows = 0
+        num_cells = 0
+        try:
+            table = pool.get_pool(admin).new_table(project_id, instance_id, table_name)
+            indexer = None
+            if index_table:
+                indexer = index.Indexer(
+                    pool.get_pool(admin).new_table(project_id, instance_id, index_table),
+                    indexes, index_bucket)
+            writer = flow.FlowWriter(table, controller) if controller is not None else None
+            while True:
+                try:
+                    chunk = chunks.get(timeout=0.5)
+                except queue.Empty:
+                    if failed.is_set():
+                        break
+                    continue
+                if chunk is None:
+                    break
+                token, chunk = chunk
+                rows, cells = write_mutations(table, chunk, batch_size, batch_bytes, indexer, writer)
+                num_rows += rows
+                num_cells += cells
+                if progress is not None:
+                    progress.confirm(token)
+        except Exception as e:
+            errors.append(e)
+            failed.set()
+        with lock:
+            counts.append((num_rows, num_cells))
+
+    def _put(item) -> bool:
+        while not failed.is_set():
+            try:
+                chunks.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    threads = [threading.Thread(target=_writer, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    # The writers account for their own stages, the reader for the parsing and the waits for a writer.
+    m = metrics.get_metrics()
+    laps = m.laps() if m.enabled else None
+    chunk: list = []
+    try:
+        for mutation in mutations:
+            chunk.append(mutation)
+            if len(chunk) >= batch_size:
+                if laps is not None:
+                    laps.lap("parse")
+                if not _put((progress.seal() if progress is not None else None, chunk)):
+                    break
+                if laps is not None:
+                    laps.lap("queue")
+                chunk = []
+        # With a progress, the rows dropped after the last chunk are sealed too.
+        if chunk or progress is not None:
+            _put((progress.seal() if progress is not None else None, chunk))
+        for _ in threads:
+            _put(None)
+    except BaseException:
+        failed.set()
+        raise
+    for thread in threads:
+        thread.join()
+    if laps is not None:
+        laps.lap("queue")
+        laps.close()
+
+    if errors:
+        raise errors[0]
+    return sum(c[0] for c in counts), sum(c[1] for c in counts)
+
+
+def put_rows_parallel(
+        project_id: str,
+        instance_id: str,
+        table_name: str,
+        csv_models: typing.Iterable[CSVModel],
+        workers: int = 4,
+        batch_size: int = 1000,
+        batch_bytes: int = 4 * 1024 * 1024,
+        queue_size: int = 8,
+        admin: bool = True) -> typing.Tuple[int, int]:
+    """Write rows through a reader stage feeding ``workers`` writer threads.
+
+    See :func:`write_mutations_parallel` for the details.
+
+    Args:
+        project_id (str): The target project ID on GCP.
+        instance_id (str): The target Bigtable instance ID on GCP.
+        table_name (str): The target table name in the specified Bigtable instance.
+        csv_models (typing.Iterable[CSVModel]): The rows to be written.
+        workers (int): The number of writer threads.
+        batch_size (int): The maximum number of rows per batch.
+        batch_bytes (int): The maximum number of bytes per batch.
+        queue_size (int): The maximum number of chunks waiting for a writer.
+        admin (bool): Whether to use a client with admin access instead of a data-only client.
+
+    Returns:
+        typing.Tuple[int, int]: The number of rows and cells written.
+    """
+    mutations = (gen_row_mutation(csv_model) for csv_model in csv_models)
+    return write_mutations_parallel(
+        project_id, instance_id, table_name, mutations,
+        workers, batch_size, batch_bytes, queue_size, admin)
+
+
+def _write(
+        project_id: str,
+        instance_id: str,
+        table_name: str,
+        mutations: typing.Iterable[typing.Tuple[str, dict]],
+        options: IngestOptions,
+        index_table: typing.Optional[str],
+        controller: typing.Optional[flow.RateController],
+        progress: typing.Optional[checkpoint.Checkpoint]) -> typing.Tuple[int, int]:
+    """Dispatch the row mutations of :func:`ingest_file` to the writer selected by ``options``."""
+    if options.workers > 1:
+        return write_mutations_parallel(
+            project_id, instance_id, table_name, mutations, options.workers,
+            options.batch_size, options.batch_bytes, options.queue_size, options.admin,
+            index_table, options.indexes, options.index_bucket, controller, progress)
+    table = get_table(project_id, instance_id, table_name, options.admin)
+    if options.bulk or index_table or controller is not None or progress is not None:
+        indexer = None
+        if index_table:
+            indexer = index.Indexer(
+                get_table(project_id, instance_id, index_table, options.admin),
+                options.indexes, options.index_bucket)
+        writer = flow.FlowWriter(table, controller) if controller is not None else None
+        return write_mutations(
+            table, mutations, options.batch_size, options.batch_bytes, indexer, writer, progress)
+    return put_mutations(table, mutations)
+
+
+def ingest_file(
+        project_id: str,
+        instance_id: str,
+        table_name: str,
+        src: str,
+        options: typing.Optional[IngestOptions] = None) -> typing.Tuple[int, int]:
+    """Write a single CSV file into the table specified by ``table_name``.
+
+    Args:
+        project_id (str): The target project ID on GCP.
+        instance_id (str): The target Bigtable instance ID on GCP.
+        table_name (str): The target table name in the specified Bigtable instance.
+        src (str): The source CSV file.
+        options (IngestOptions, optional): The options of writing. Defaults to ``IngestOptions()``.
+
+    Returns:
+        typing.Tuple[int, int]: The number of rows and cells written.
+
+    Raises:
+        ValueError: If both ``options.resume`` and ``options.rollups`` are set.
+    """
+    options = options or IngestOptions()
+    if options.resume and options.rollups:
+        # The rows before the checkpoint would be missing from the rollup buckets still open at that point.
+        raise ValueError("Resuming is not supported with rollups")
+    rollup_table_name = options.rollup_table or "{}_rollup".format(table_name)
+    index_table = None
+    if options.indexes:
+        index_table = options.index_table or "{}_index".format(table_name)
+    if options.warm_up:
+        table_names = [table_name]
+        if options.rollups:
+            table_names.append(rollup_table_name)
+        if index_table:
+            table_names.append(index_table)
+        pool.get_pool(options.admin).warm_up(project_id, instance_id, table_names)
+    progress = None
+    if options.checkpoint or options.resume:
+        progress = checkpoint.Checkpoint(
+            checkpoint.state_path(src, options.checkpoint_dir), src, options.checkpoint_interval)
+        if options.resume and progress.load():
+            print("{}: resuming at byte offset {}, skipped {} rows".format(
+                src, progress.offset, progress.skipped))
+    offset = progress.offset if progress is not None else 0
+    if options.fast_csv:
+        rows = (
+            row for chunk in fastcsv.read_chunks(src, offset)
+            for row in gen_chunk_mutations(chunk, options.rowkey_version))
+    else:
+        rows = (
+            (position, gen_row_mutation(csv_model, options.rowkey_version))
+            for position, csv_model in read_csv_rows(src, offset))
+    if progress is not None:
+        mutations = progress.track(rows)
+    else:
+        mutations = (mutation for _, mutation in rows)
+    aggregator = None
+    if options.rollups:
+        # Every series is assumed to live in a single source file.
+        aggregator = rollup.RollupAggregator(options.rollups)
+        rollup_table = get_table(project_id, instance_id, rollup_table_name, options.admin)
+        mutations = aggregator.tap(
+            mutations,
+            lambda closed: write_mutations(rollup_table, closed, options.batch_size, options.batch_bytes),
+            options.batch_size)
+    delta_filter = None
+    if options.delta:
+        delta_filter = delta.DeltaFilter(
+            ignore=[col.encode("utf-8") for col in options.delta_ignore],
+            heartbeat=options.heartbeat)
+        mutations = delta_filter.filter(mutations)
+    if options.cell_format == 2:
+        # Packed after the delta filter, which compares and ignores individual columns.
+        mutations = ((rowkey, cellcodec.pack_columns(data)) for rowkey, data in mutations)
+
+    controller = None
+    if options.flow_control is not None:
+        controller = flow.RateController(options.flow_control)
+    try:
+        result = _write(project_id, instance_id, table_name, mutations, options,
+                        index_table, controller, progress)
+    finally:
+        if progress is not None:
+            # Only the rows confirmed as written are recorded, even on failure.
+            progress.save()
+
+    if delta_filter is not None:
+        print("{}: skipped {} unchanged rows, wrote {} heartbeats".format(
+            src, delta_filter.skipped, delta_filter.heartbeats))
+    if aggregator is not None and aggregator.late:
+        print("{}: {} rows too late for their rollup bucket".format(src, aggregator.late))
+    if controller is not None:
+        print("{}: retried {} row mutations, rate decreased {} times, final rate {:.0f} rows/s".format(
+            src, controller.retried, controller.decreases, controller.rate))
+    return result
+
+
+def main(
+        project_id: str,
+        instance_id: str,
+        src: str,
+        table_name: str,
+        options: typing.Optional[IngestOptions] = None,
+        processes: int = 1):
     """The main function of this program.
     
     At first, we connect to a Bigtable instance specified by ``project_id`` 
     and ``instance_id``. Then we read rows from the given CSV file and write 
     them into the table specified by ``table_name``.
 
+    The ``src`` may be a glob pattern matching several CSV files, in which 
+    case the files are sharded across ``processes`` worker processes.
+
     Args:
         project_id (str): The target project ID on GCP.
         instance_id (str): The target Bigtable instance ID on GCP.
-        src (str): The source CSV file.
+        src (str): The source CSV file or a glob pattern of CSV files.
         table_name (str): The target table name in the specified Bigtable instance.
-    """
-    client = bigtable.Client(project=project_id, admin=True)
-    instance = client.instance(instance_id)
-    connection = happybase.Connection(instance=instance)
+        options (IngestOptions, optional): The options of writing. Defaults to ``IngestOptions()``.
+        processes (int): The number of processes the source files are sharded across.
 
-    table = connection.table(table_name)
+    Note:
+        The metrics only cover the calling process, i.e., not the worker processes used with ``processes``.
+    """
+    options = options or IngestOptions()
+    srcs = sorted(glob.glob(src)) or [src]
 
-    with open(src, 'r') as csv_file:
-        rows = csv.DictReader(csv_file)
-        column_name = ""
-        for row in rows:
-            csv_model = CSVModel(o=row)
-            seq = csv_model.o["oddSeq"] if csv_model.o["oddSeq"] else "0"
-            ts = int(datetime.datetime.fromisoformat(csv_model.o["created_ts"]).timestamp())
-            rowkey = gen_rowkey(
-                1,
-                213,
-                7654321,
-                csv_model.o["market"],
-                seq,
-                "pre" if csv_model.o["game_state"] in ["prematch"] else csv_model.o["game_state"],
-                csv_model.o["vendor"],
-                ts
-            )
-            col_dict = get_column_dict(csv_model)
-            for family, cols in col_dict.items():
-                for k, v in cols.items():
-                    column_name = "{fam}:{qualifier}".format(fam=family, qualifier=k)
-                    table.put(
-                        rowkey, {column_name.encode('utf-8'): v.encode('utf-8')}
-                    )
+    start = time.time()
+    if processes > 1 and len(srcs) > 1:
+        with ProcessPoolExecutor(max_workers=min(processes, len(srcs))) as executor:
+            futures = [
+                executor.submit(ingest_file, project_id, instance_id, table_name, path, options)
+                for path in srcs
+            ]
+            results = [future.result() for future in futures]
+    else:
+        results = [
+            ingest_file(project_id, instance_id, table_name, path, options)
+            for path in srcs
+        ]
+    num_rows = sum(r[0] for r in results)
+    num_cells = sum(r[1] for r in results)
+    elapsed = time.time() - start
+    print("Elapsed time for writing {} rows ({} cells): {}s".format(
+        num_rows, num_cells, elapsed))
+    if elapsed > 0:
+        print("Throughput: {:.1f} rows/s, {:.1f} cells/s".format(
+            num_rows / elapsed, num_cells / elapsed))
 
 
 if __name__ == '__main__':
@@ -149,13 +843,186 @@ if __name__ == '__main__':
     parser.add_argument(
         'src',
         type=str,
-        help='CSV-formated file as the data source.'
+        help='CSV-formated file or a glob pattern of files as the data source.'
     )
     parser.add_argument(
         '--table',
         type=str,
         help='Table to write odd data.',
         default='odds')
+    parser.add_argument(
+        '--bulk',
+        action='store_true',
+        help='Write one mutation per row key in batches.')
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        help='Maximum number of rows per batch in bulk mode.',
+        default=1000)
+    parser.add_argument(
+        '--batch-bytes',
+        type=int,
+        help='Maximum number of bytes per batch in bulk mode.',
+        default=4 * 1024 * 1024)
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='Number of writer threads, each with its own connection.',
+        default=1)
+    parser.add_argument(
+        '--processes',
+        type=int,
+        help='Number of processes to shard multiple source files across.',
+        default=1)
+    parser.add_argument(
+        '--queue-size',
+        type=int,
+        help='Maximum number of batches waiting for a writer thread.',
+        default=8)
+    parser.add_argument(
+        '--data-only',
+        action='store_true',
+        help='Use a data-only client instead of a client with admin access.')
+
+    parser.add_argument(
+        '--delta',
+        action='store_true',
+        help='Skip rows which do not change the odds or information of their series.')
+    parser.add_argument(
+        '--delta-ignore',
+        action='append',
+        default=[],
+        help='A column, e.g. "info:et", not compared in delta mode.')
+    parser.add_argument(
+        '--heartbeat',
+        type=int,
+        help='Minimal number of seconds between "still valid" heartbeats in delta mode.')
+
+    parser.add_argument(
+        '--rowkey-version',
+        type=int,
+        choices=[1, 2],
+        help='Row key layout: 1 for ascending timestamps, 2 for latest first.',
+        default=1)
+    parser.add_argument(
+        '--cell-format',
+        type=int,
+        choices=[1, 2],
+        help='Storage format: 1 for one cell per value, 2 for packed binary cells.',
+        default=1)
+    parser.add_argument(
+        '--rollup',
+        action='append',
+        choices=sorted(rollup.BUCKETS),
+        default=[],
+        help='Maintain OHLC rollups of the odds at the given bucket size.')
+    parser.add_argument(
+        '--rollup-table',
+        type=str,
+        help='Table of the rollups, with the column family "ohlc". Defaults to "<table>_rollup".')
+    parser.add_argument(
+        '--index',
+        action='append',
+        choices=list(index.KINDS),
+        default=[],
+        help='Maintain a secondary index by vendor then time, or by time bucket. Implies --bulk.')
+    parser.add_argument(
+        '--index-table',
+        type=str,
+        help='Table of the indexes, with the column family "idx". Defaults to "<table>_index".')
+    parser.add_argument(
+        '--index-bucket',
+        type=int,
+        help='Number of seconds of a time bucket of the time index.',
+        default=60)
+
+    parser.add_argument(
+        '--flow-control',
+        action='store_true',
+        help='Pace the batches by the write latency and retry throttled rows with backoff. Implies --bulk.')
+    parser.add_argument(
+        '--target-latency',
+        type=float,
+        help='Write latency in seconds above which the rate is decreased in flow control mode.',
+        default=0.5)
+    parser.add_argument(
+        '--initial-rate',
+        type=float,
+        help='Initial rate in rows per second, shared by all the writer threads, in flow control mode.',
+        default=5000.0)
+    parser.add_argument(
+        '--max-attempts',
+        type=int,
+        help='Maximum number of attempts of a row mutation in flow control mode.',
+        default=8)
+
+    parser.add_argument(
+        '--checkpoint',
+        action='store_true',
+        help='Persist the position up to which every source file is durably written. Implies --bulk.')
+    parser.add_argument(
+        '--checkpoint-dir',
+        type=str,
+        help='Directory of the "<file>.checkpoint" state files. Defaults to the directory of every source file.')
+    parser.add_argument(
+        '--checkpoint-interval',
+        type=float,
+        help='Minimal number of seconds between two saves of a state file.',
+        default=5.0)
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Skip the rows durably written according to the state files. Implies --checkpoint. Not supported with --rollup.')
+    parser.add_argument(
+        '--fast-csv',
+        action='store_true',
+        help='Read the CSV files through a memory map in chunks of columns instead of csv.DictReader.')
+    parser.add_argument(
+        '--warm-up',
+        action='store_true',
+        help='Open the channels of the tables before reading a file.')
+    parser.add_argument(
+        '--metrics-file',
+        type=str,
+        help=('Write the time per stage, the latency per operation and the counts of rows, cells and '
+              'bytes written to this file on exit, as JSON if it ends with ".json", otherwise in the '
+              'Prometheus text format. Only the main process is covered with --processes.'))
+    parser.add_argument(
+        '--metrics-interval',
+        type=float,
+        help='Also write --metrics-file every given number of seconds.')
 
     args = parser.parse_args()
-    main(args.project_id, args.instance_id, args.src, args.table)
+    if args.resume and args.rollup:
+        parser.error("'--resume' cannot be combined with '--rollup'")
+    if args.metrics_file:
+        metrics.export(args.metrics_file, args.metrics_interval)
+    options = IngestOptions(
+        bulk=args.bulk,
+        batch_size=args.batch_size,
+        batch_bytes=args.batch_bytes,
+        workers=args.workers,
+        queue_size=args.queue_size,
+        admin=not args.data_only,
+        delta=args.delta,
+        delta_ignore=args.delta_ignore,
+        heartbeat=args.heartbeat,
+        rowkey_version=args.rowkey_version,
+        cell_format=args.cell_format,
+        rollups=args.rollup,
+        rollup_table=args.rollup_table,
+        indexes=args.index,
+        index_table=args.index_table,
+        index_bucket=args.index_bucket,
+        flow_control=flow.FlowControl(
+            target_latency=args.target_latency,
+            initial_rate=args.initial_rate,
+            max_attempts=args.max_attempts) if args.flow_control else None,
+        checkpoint=args.checkpoint,
+        checkpoint_dir=args.checkpoint_dir,
+        checkpoint_interval=args.checkpoint_interval,
+        resume=args.resume,
+        fast_csv=args.fast_csv,
+        warm_up=args.warm_up)
+    main(args.project_id, args.instance_id, args.src, args.table,
+         options, args.processes)
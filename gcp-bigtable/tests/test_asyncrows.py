@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import asyncio
+import asyncrows
+import getrows
+import os
+import pytest
+from google.cloud.bigtable.data.row import Cell
+from google.cloud.bigtable.data.row import Row
+from google.cloud.bigtable.data.row_filters import CellsColumnLimitFilter
+from memtable import MemoryTable
+from writerows import gen_row_mutation
+from writerows import read_csv_models
+from writerows import write_mutations
+
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "data", "input_data.csv")
+
+
+class _DataTable(object):
+    """A stand-in of ``TableAsync`` serving the rows of a :class:`MemoryTable`."""
+
+    def __init__(self, table: MemoryTable, latency: float = 0.0):
+        self._table = table
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.cancelled = 0
+        self.requests = 0
+
+    @staticmethod
+    def _row(key, data):
+        cells = []
+        for column, value in sorted(data.items()):
+            family, qualifier = column.split(b":", 1)
+            cells.append(Cell(value, key, family.decode("utf-8"), qualifier, 0))
+        return Row(key, cells)
+
+    async def read_rows(self, query):
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        return [self._row(key, data) for key, data in self._table.rows(query.row_keys)]
+
+    async def read_rows_stream(self, query):
+        row_range = query.row_ranges[0]
+
+        async def _stream():
+            for key, data in self._table.scan(
+                    row_start=row_range.start_key, row_stop=row_range.end_key, limit=query.limit):
+                await asyncio.sleep(0)
+                yield self._row(key, data)
+
+        return _stream()
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture(scope="module")
+def table():
+    table = MemoryTable()
+    write_mutations(table, [gen_row_mutation(model) for model in read_csv_models(DATA)])
+    return table
+
+
+class TestAsyncRows(object):
+    def test_get_rows_matches_getrows(self, table):
+        keys = [key.decode("utf-8") for key, _ in table.scan()][:250] + ["1:missing"]
+        missing = []
+        rows = asyncio.run(asyncrows.get_rows(
+            asyncrows.AsyncTable(_DataTable(table)), keys, ":", chunk_size=50, missing=missing))
+        assert rows == getrows.get_rowkeys(table, keys, ":")
+        assert missing == ["1:missing"]
+        assert asyncio.run(asyncrows.get_rows(asyncrows.AsyncTable(_DataTable(table)), keys[:3])) == rows[:3]
+
+
+    def test_no_row_keys_issue_no_request(self, table):
+        data_table = _DataTable(table)
+        assert asyncio.run(asyncrows.AsyncTable(data_table).rows([])) == []
+        assert asyncio.run(asyncrows.get_rows(asyncrows.AsyncTable(data_table), [])) == []
+        assert data_table.requests == 0
+
+
+    def test_in_flight_bound_and_cancellation(self, table):
+        keys = [key.decode("utf-8") for key, _ in table.scan()][:100]
+        data_table = _DataTable(table, latency=0.01)
+        rows = asyncio.run(asyncrows.get_rows(asyncrows.AsyncTable(data_table, max_in_flight=3), keys, ":", 5))
+        assert len(rows) == 100 and data_table.max_in_flight == 3
+
+        data_table = _DataTable(table, latency=10)
+
+        async def _cancel():
+            task = asyncio.ensure_future(asyncrows.get_rows(asyncrows.AsyncTable(data_table), keys, ":", 10))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(_cancel())
+        assert data_table.cancelled == 10 and data_table.in_flight == 0
+
+
+    def test_scan_rows(self, table):
+        keys = [key for key, _ in table.scan()]
+        start, stop = keys[10].decode("utf-8"), keys[60].decode("utf-8")
+
+        async def _scan(limit=None):
+            async_table = asyncrows.AsyncTable(_DataTable(table), max_in_flight=1)
+            rows = [row async for row in asyncrows.scan_rows(async_table, start, stop, ":", limit, fast=True)]
+            # The slot of the scan is released.
+            assert not async_table._slots.locked()
+            return rows
+
+        assert asyncio.run(_scan()) == list(getrows.iter_rows_range(table, start, stop, ":", fast=True))
+        assert len(asyncio.run(_scan(limit=7))) == 7
+
+
+    def test_columns_filter(self):
+        assert isinstance(asyncrows.columns_filter(), CellsColumnLimitFilter)
+        selection, latest = asyncrows.columns_filter(["odds", "info:s"]).filters
+        odds, info = selection.filters
+        assert isinstance(latest, CellsColumnLimitFilter) and latest.num_cells == 1
+        assert odds.regex == b"odds"
+        assert [f.regex for f in info.filters] == [b"info", b"s"]
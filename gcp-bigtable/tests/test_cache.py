@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import pytest
+from cache import CachedTable
+from cache import RowCache
+from memtable import MemoryTable
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _table(rows):
+    table = MemoryTable()
+    with table.batch() as batch:
+        for key, data in rows.items():
+            batch.put(key, data)
+    return table
+
+
+class TestRowCache(object):
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+
+    @pytest.fixture
+    def cache(self, clock):
+        return RowCache(maxsize=2, ttl=10, negative_ttl=1, clock=clock)
+
+
+    def test_lru_eviction(self, cache):
+        cache.put(b"a", {b"odds:h": b"1.57"})
+        cache.put(b"b", {b"odds:h": b"1.61"})
+        assert cache.get(b"a")
+        cache.put(b"c", {b"odds:h": b"1.70"})
+        assert cache.get(b"b") is None
+        assert cache.stats().evictions == 1
+
+
+    def test_ttl_and_negative_ttl(self, cache, clock):
+        cache.put(b"a", {b"odds:h": b"1.57"})
+        cache.put(b"missing", {})
+        assert cache.get(b"missing") == {}
+        clock.now = 5
+        assert cache.get(b"missing") is None
+        assert cache.get(b"a")
+        clock.now = 11
+        assert cache.get(b"a") is None
+        stats = cache.stats()
+        assert (stats.hits, stats.misses, stats.expirations) == (2, 2, 2)
+
+
+class TestCachedTable(object):
+    def test_read_through_and_invalidation(self):
+        table = _table({b"a": {b"odds:h": b"1.57"}})
+        calls = []
+        table.hook = lambda name, operation, keys: calls.append(operation)
+        cached = CachedTable(table, RowCache(ttl=10))
+        assert cached.rows([b"a", b"missing"]) == [(b"a", {b"odds:h": b"1.57"})]
+        assert cached.rows(["a", "missing"]) == [(b"a", {b"odds:h": b"1.57"})]
+        assert calls == ["rows"]
+        cached.put(b"a", {b"odds:h": b"1.61"})
+        assert cached.rows([b"a"]) == [(b"a", {b"odds:h": b"1.61"})]
+        assert calls == ["rows", "put", "rows"]
+
+
+    def test_read_during_a_write_is_not_left_cached(self):
+        table = _table({b"a": {b"odds:h": b"1.57"}, b"b": {b"odds:h": b"2.10"}})
+        cached = CachedTable(table, RowCache(ttl=10))
+
+        def _read_in_flight(name, operation, keys):
+            if operation in ("put", "send"):
+                # A concurrent read lands while the write is in flight.
+                cached.rows(keys)
+
+        table.hook = _read_in_flight
+        cached.put(b"a", {b"odds:h": b"1.61"})
+        assert cached.rows([b"a"]) == [(b"a", {b"odds:h": b"1.61"})]
+        with cached.batch() as batch:
+            batch.put(b"b", {b"odds:h": b"2.20"})
+        assert cached.rows([b"b"]) == [(b"b", {b"odds:h": b"2.20"})]
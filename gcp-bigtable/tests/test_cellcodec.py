@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import numpy as np
+import os
+import pytest
+from cellcodec import INFO_COLUMN
+from cellcodec import ODDS_COLUMN
+from cellcodec import pack_columns
+from cellcodec import pack_odds
+from cellcodec import unpack_odds
+from columnar import to_columnar
+from decoder import decode_row
+from writerows import gen_row_mutation
+from writerows import read_csv_models
+
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "data", "input_data.csv")
+
+
+@pytest.fixture(scope="module")
+def mutations():
+    return [gen_row_mutation(csv_model) for csv_model in read_csv_models(DATA)]
+
+
+class TestCellCodec(object):
+    def test_quarter_lines_round_trip(self):
+        odds = {"k": "-0/0.5", "ovr": "0.90", "und": ""}
+        assert unpack_odds(pack_odds(odds)) == (("k", "ovr", "und"), ("-0/0.5", "0.90", ""))
+
+
+    def test_both_formats_decode_alike(self, mutations):
+        for rowkey, data in mutations:
+            packed = pack_columns(data)
+            assert set(packed) == {INFO_COLUMN, ODDS_COLUMN}
+            assert decode_row(rowkey, packed) == decode_row(rowkey, data)
+
+
+    def test_packed_cells_are_smaller(self, mutations):
+        def size(data):
+            return sum(len(column) + len(value) for column, value in data.items())
+        plain = sum(size(data) for _, data in mutations)
+        packed = sum(size(pack_columns(data)) for _, data in mutations)
+        assert packed < plain
+
+
+    def test_columnar_reads_both_formats(self, mutations):
+        rows = [(rowkey.encode("utf-8"), data) for rowkey, data in mutations]
+        plain = to_columnar(rows)
+        packed = to_columnar((rowkey, pack_columns(data)) for rowkey, data in rows)
+        for name in ("h", "a", "d", "k", "ovr", "und"):
+            np.testing.assert_array_equal(getattr(plain, name), getattr(packed, name))
+
+
+    def test_unpackable_values_are_kept_as_cells(self):
+        data = {b"odds:h": b"n/a", b"odds:a": b"2.10", b"odds:d": b"3.30",
+                b"info:s": b"0-0", b"info:per": b"1h", b"info:et": b"12:00",
+                b"info:valid": b"100"}
+        packed = pack_columns(data)
+        assert packed[b"odds:h"] == b"n/a"
+        assert ODDS_COLUMN not in packed
+        assert INFO_COLUMN in packed
+        assert packed[b"info:valid"] == b"100"
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import os
+import pool
+import pytest
+import writerows
+from checkpoint import Checkpoint
+from memtable import MemoryTable
+from writerows import IngestOptions
+from writerows import ingest_file
+from writerows import read_csv_rows
+
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "data", "input_data.csv")
+
+
+def _table(fail_at=None):
+    sends = []
+
+    def _hook(name, operation, keys):
+        if operation == "send":
+            if len(sends) == fail_at:
+                raise RuntimeError("connection lost")
+            sends.append(keys)
+
+    return MemoryTable(hook=_hook), sends
+
+
+class _Pool(object):
+    def __init__(self, table):
+        self._table = table
+
+    def new_table(self, *args):
+        return self._table
+
+
+@pytest.fixture
+def src(tmp_path):
+    with open(DATA) as data_file:
+        lines = data_file.readlines()[:26]
+    path = tmp_path / "odds.csv"
+    path.write_text("".join(lines))
+    return str(path)
+
+
+def _ingest(monkeypatch, src, table, **options):
+    monkeypatch.setattr(writerows, "get_table", lambda *args: table)
+    monkeypatch.setattr(pool, "get_pool", lambda admin: _Pool(table))
+    return ingest_file("project", "instance", "odds", src, IngestOptions(checkpoint=True, **options))
+
+
+class TestCheckpoint(object):
+    def test_read_from_offset(self, src):
+        rows = list(read_csv_rows(src))
+        assert rows[-1][0] == os.path.getsize(src)
+        tail = list(read_csv_rows(src, rows[9][0]))
+        assert [model for _, model in tail] == [model for _, model in rows[10:]]
+
+
+    def test_watermark_skips_gaps(self, tmp_path, src):
+        progress = Checkpoint(str(tmp_path / "state"), src, interval=0.0)
+        rows = progress.track(iter([(10, "a"), (20, "b"), (30, "c")]))
+        next(rows)
+        first = progress.seal()
+        next(rows)
+        second = progress.seal()
+        progress.confirm(second)
+        assert (progress.offset, progress.rows) == (0, 0)
+        progress.confirm(first)
+        assert (progress.offset, progress.rows) == (20, 2)
+        resumed = Checkpoint(str(tmp_path / "state"), src)
+        assert resumed.load() == 2
+        assert list(resumed.track(iter([(30, "c")]))) == ["c"]
+        assert resumed.seal() == 0
+
+
+    def test_resume_after_failure(self, monkeypatch, src):
+        failing, sends = _table(fail_at=1)
+        with pytest.raises(RuntimeError):
+            _ingest(monkeypatch, src, failing, batch_size=10)
+        assert sum(len(send) for send in sends) == len(failing) == 10
+
+        table = MemoryTable()
+        assert _ingest(monkeypatch, src, table, batch_size=10, resume=True)[0] == 15
+        assert set(dict(failing.scan())).isdisjoint(dict(table.scan()))
+        assert len(failing) + len(table) == 25
+        assert _ingest(monkeypatch, src, MemoryTable(), resume=True) == (0, 0)
+
+
+    def test_resume_refuses_rollups(self, monkeypatch, src):
+        with pytest.raises(ValueError):
+            _ingest(monkeypatch, src, MemoryTable(), resume=True, rollups=["1m"])
+
+
+    def test_parallel(self, monkeypatch, tmp_path, src):
+        table = MemoryTable()
+        _ingest(monkeypatch, src, table, batch_size=4, workers=3, checkpoint_dir=str(tmp_path))
+        progress = Checkpoint(os.path.join(str(tmp_path), "odds.csv.checkpoint"), src)
+        assert progress.load() == 25
+        assert progress.offset == os.path.getsize(src)
+        assert len(table) == 25
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import getrows
+import math
+import numpy as np
+import os
+import pytest
+from columnar import ODDS_QUALIFIERS
+from columnar import ColumnarBuilder
+from columnar import parse_odds_value
+from columnar import scan_columnar
+from columnar import to_columnar
+from memtable import MemoryTable
+from writerows import gen_row_mutation
+from writerows import read_csv_models
+from writerows import write_mutations
+
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "data", "input_data.csv")
+
+
+@pytest.fixture(scope="module")
+def models():
+    return list(read_csv_models(DATA))
+
+
+@pytest.fixture(scope="module")
+def rows(models):
+    return [(rowkey.encode("utf-8"), data) for rowkey, data in map(gen_row_mutation, models)]
+
+
+def _expected_odds(rows):
+    return {
+        col: [parse_odds_value(data[b"odds:" + col.encode("utf-8")]) if b"odds:" + col.encode("utf-8") in data
+              else float("nan") for _, data in rows]
+        for col in ODDS_QUALIFIERS}
+
+
+def _assert_columns(columns, rows):
+    keys = [rowkey.decode("utf-8").split(":") for rowkey, _ in rows]
+    np.testing.assert_array_equal(columns.ts, [int(key[7]) for key in keys])
+    np.testing.assert_array_equal(columns.seq, [int(key[4]) for key in keys])
+    assert [columns.vendors[code] for code in columns.vendor] == [key[6] for key in keys]
+    assert [columns.markets[code] for code in columns.mkt] == [key[3] for key in keys]
+    assert [columns.periods[code] for code in columns.per] == [key[5] for key in keys]
+    for col, expected in _expected_odds(rows).items():
+        np.testing.assert_array_equal(getattr(columns, col), expected)
+
+
+class TestColumnar(object):
+    def test_parse_odds_value(self):
+        assert parse_odds_value(b"1.57") == 1.57
+        assert parse_odds_value(b"4.5/5") == 4.75
+        assert parse_odds_value(b"-0.5/1") == -0.75
+        assert parse_odds_value(b"-0/0.5") == -0.25
+        assert math.isnan(parse_odds_value(b""))
+
+
+    def test_builder_grows_by_chunks(self, rows):
+        builder = ColumnarBuilder(chunk_size=7)
+        assert len(builder) == 0
+        for rowkey, data in rows[:30]:
+            builder.append(rowkey, data)
+        assert len(builder) == 30
+        columns = builder.build()
+        assert columns.ts.dtype == np.int64 and columns.vendor.dtype == np.int32
+        _assert_columns(columns, rows[:30])
+        assert len(ColumnarBuilder().build().ts) == 0
+
+
+    def test_to_columnar_reads_both_row_key_layouts(self, models, rows):
+        latest_first = [(rowkey.encode("utf-8"), data) for rowkey, data in
+                        (gen_row_mutation(model, version=2) for model in models)]
+        original = to_columnar(rows)
+        _assert_columns(original, rows)
+        columns = to_columnar(latest_first, chunk_size=100)
+        for name in ("ts", "seq") + ODDS_QUALIFIERS:
+            np.testing.assert_array_equal(getattr(columns, name), getattr(original, name))
+
+
+    def test_scan_columnar(self, rows):
+        table = MemoryTable()
+        write_mutations(table, [(rowkey.decode("utf-8"), data) for rowkey, data in rows])
+        scanned = list(table.scan())
+        start, stop = scanned[10][0].decode("utf-8"), scanned[60][0].decode("utf-8")
+        _assert_columns(scan_columnar(table, start, stop), scanned[10:60])
+        assert len(scan_columnar(table, start, stop, limit=5).ts) == 5
+
+
+    def test_getrows_saves_a_range_as_npz(self, monkeypatch, tmp_path, rows):
+        table = MemoryTable()
+        write_mutations(table, [(rowkey.decode("utf-8"), data) for rowkey, data in rows])
+        monkeypatch.setattr(getrows, "get_table_instance", lambda *args: table)
+        path = str(tmp_path / "odds.npz")
+        getrows.main("project", "instance", "odds", [], "", "", ":", limit=20, columnar_path=path)
+        saved = np.load(path)
+        expected = to_columnar(list(table.scan(limit=20)))
+        np.testing.assert_array_equal(saved["ts"], expected.ts)
+        np.testing.assert_array_equal(saved["h"], expected.h)
+        assert tuple(saved["vendors"]) == expected.vendors
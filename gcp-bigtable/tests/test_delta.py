@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import pytest
+from delta import DeltaFilter
+from delta import HEARTBEAT_COLUMN
+
+
+class TestDeltaFilter(object):
+    @pytest.fixture
+    def mutations(self):
+        odds = {b"odds:h": b"1.57", b"odds:a": b"3.75", b"odds:d": b"4.05"}
+        return [
+            ("1:213:7654321:1x2:0:pre:vendorA:100", {**odds, b"info:et": b"-"}),
+            ("1:213:7654321:1x2:0:pre:vendorA:101", {**odds, b"info:et": b"1"}),
+            ("1:213:7654321:1x2:0:pre:vendorB:102", {**odds, b"info:et": b"1"}),
+            ("1:213:7654321:1x2:0:pre:vendorA:200", {**odds, b"info:et": b"2"}),
+            ("1:213:7654321:1x2:0:pre:vendorA:201", {**odds, b"odds:h": b"1.61"}),
+        ]
+
+
+    def test_skips_unchanged_snapshots(self, mutations):
+        delta_filter = DeltaFilter(ignore=[b"info:et"])
+        rowkeys = [rowkey for rowkey, _ in delta_filter.filter(mutations)]
+        assert rowkeys == [
+            "1:213:7654321:1x2:0:pre:vendorA:100",
+            "1:213:7654321:1x2:0:pre:vendorB:102",
+            "1:213:7654321:1x2:0:pre:vendorA:201",
+        ]
+        assert delta_filter.skipped == 2
+
+
+    def test_heartbeat(self, mutations):
+        delta_filter = DeltaFilter(ignore=[b"info:et"], heartbeat=50)
+        emitted = list(delta_filter.filter(mutations))
+        assert ("1:213:7654321:1x2:0:pre:vendorA:100", {HEARTBEAT_COLUMN: b"200"}) in emitted
+        assert delta_filter.heartbeats == 1
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import columnar
+import csv
+import numpy as np
+import os
+import pytest
+from fastcsv import read_chunks
+from writerows import gen_chunk_mutations
+from writerows import gen_row_mutation
+from writerows import read_csv_rows
+
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "data", "input_data.csv")
+
+
+class TestFastCsv(object):
+    @pytest.mark.parametrize("version", [1, 2])
+    def test_same_mutations_and_offsets(self, version):
+        expected = [(offset, gen_row_mutation(model, version)) for offset, model in read_csv_rows(DATA)]
+        fast = [row for chunk in read_chunks(DATA, chunk_bytes=4096) for row in gen_chunk_mutations(chunk, version)]
+        assert fast == expected
+        resumed = [row for chunk in read_chunks(DATA, expected[99][0]) for row in gen_chunk_mutations(chunk, version)]
+        assert resumed == expected[100:]
+
+
+    def test_columns(self):
+        chunks = list(read_chunks(DATA, chunk_bytes=65536))
+        with open(DATA) as csv_file:
+            expected = list(csv.DictReader(csv_file))
+        assert [row for chunk in chunks for row in chunk.dicts()] == expected
+        k = np.concatenate([chunk.numbers("k") for chunk in chunks])
+        np.testing.assert_array_equal(k, [columnar.parse_odds_value(row["k"].encode()) for row in expected])
+
+
+    def test_quotes_crlf_and_blank_lines(self, tmp_path):
+        path = tmp_path / "odds.csv"
+        path.write_bytes(b'a,b\r\n1,"x,y"\r\n\r\n2,z\r\n3,"multi\nline"\n4,w')
+        chunks = list(read_chunks(str(path), chunk_bytes=8))
+        rows = [row for chunk in chunks for row in chunk.dicts()]
+        assert rows == [{"a": "1", "b": "x,y"}, {"a": "2", "b": "z"},
+                        {"a": "3", "b": "multi\nline"}, {"a": "4", "b": "w"}]
+        assert chunks[-1].offsets[-1] == os.path.getsize(str(path))
+
+
+    def test_quoted_newline_only_extends_its_chunk(self, tmp_path):
+        path = tmp_path / "odds.csv"
+        path.write_bytes(b'a,b\n1,"multi\nline"\n' + b"".join(b"%d,w\n" % i for i in range(2, 22)))
+        chunks = list(read_chunks(str(path), chunk_bytes=8))
+        rows = [row for chunk in chunks for row in chunk.dicts()]
+        assert rows == [{"a": "1", "b": "multi\nline"}] + [{"a": str(i), "b": "w"} for i in range(2, 22)]
+        assert max(len(chunk.offsets) for chunk in chunks) <= 2
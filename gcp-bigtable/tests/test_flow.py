@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import pytest
+from flow import FlowControl
+from flow import FlowWriter
+from flow import RateController
+from flow import WriteError
+from flow import backoff_delay
+from google.api_core import exceptions
+from writerows import write_mutations
+
+
+class _Status(object):
+    def __init__(self, code):
+        self.code = code
+        self.message = ""
+
+
+class _Row(object):
+    def __init__(self, row_key):
+        self.row_key = row_key.encode("utf-8")
+        self.cells = []
+
+    def set_cell(self, family, qualifier, value, timestamp=None):
+        self.cells.append((family, qualifier, value, timestamp))
+
+
+class _LowLevelTable(object):
+    def __init__(self, outcomes):
+        # One outcome per call: an exception, or a mapping from row key to status code.
+        self.outcomes = list(outcomes)
+        self.calls = []
+        self.cells = {}
+
+    def row(self, row_key):
+        return _Row(row_key)
+
+    def mutate_rows(self, rows, retry=None):
+        assert retry is None
+        self.calls.append([row.row_key for row in rows])
+        outcome = self.outcomes.pop(0) if self.outcomes else {}
+        if isinstance(outcome, Exception):
+            raise outcome
+        statuses = []
+        for row in rows:
+            code = outcome.get(row.row_key, 0)
+            if code == 0:
+                for cell in row.cells:
+                    self.cells[(row.row_key,) + cell[:2]] = cell[2:]
+            statuses.append(_Status(code))
+        return statuses
+
+
+class _Table(object):
+    def __init__(self, outcomes=()):
+        self._low_level_table = _LowLevelTable(outcomes)
+
+
+class _Clock(object):
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+MUTATIONS = [
+    ("1:213:7654321:1x2:0:pre:vendorA:{}".format(ts), {b"odds:h": b"1.57", b"info:s": b"0-0"})
+    for ts in range(100, 104)
+]
+
+
+def _write(outcomes, **options):
+    table, clock = _Table(outcomes), _Clock()
+    controller = RateController(FlowControl(**options), clock, clock.sleep)
+    result = write_mutations(table, MUTATIONS, batch_size=2, writer=FlowWriter(table, controller))
+    return table._low_level_table, controller, clock, result
+
+
+class TestFlow(object):
+    def test_backoff_is_jittered_and_capped(self):
+        assert backoff_delay(1, 0.1, 10.0, lambda: 0.5) == pytest.approx(0.05)
+        assert backoff_delay(4, 0.1, 10.0, lambda: 0.999) == pytest.approx(0.7992)
+        assert backoff_delay(20, 0.1, 10.0, lambda: 0.999) == pytest.approx(9.99)
+
+
+    def test_only_failed_entries_are_resubmitted_with_the_same_timestamp(self):
+        key = MUTATIONS[1][0].encode("utf-8")
+        low, controller, clock, result = _write([{key: 14}, {}, {}])
+        assert result == (4, 8)
+        assert low.calls == [[MUTATIONS[0][0].encode("utf-8"), key], [key],
+                             [m[0].encode("utf-8") for m in MUTATIONS[2:]]]
+        assert len(low.cells) == 8
+        first, retried = (low.cells[(m[0].encode("utf-8"), "odds", b"h")][1] for m in MUTATIONS[:2])
+        assert first == retried is not None
+        assert controller.retried == 1
+        assert controller.decreases == 1
+
+
+    def test_retryable_exception_then_success(self):
+        low, controller, clock, _ = _write([exceptions.ServiceUnavailable("rebalancing")])
+        assert len(low.calls) == 3
+        assert low.calls[0] == low.calls[1]
+        assert len(low.cells) == 8
+
+
+    def test_non_retryable_errors_are_raised(self):
+        with pytest.raises(exceptions.PermissionDenied):
+            _write([exceptions.PermissionDenied("nope")])
+        with pytest.raises(WriteError) as e:
+            _write([{MUTATIONS[0][0].encode("utf-8"): 3}])
+        assert e.value.rowkeys == [MUTATIONS[0][0].encode("utf-8")]
+
+
+    def test_attempts_are_bounded(self):
+        key = MUTATIONS[0][0].encode("utf-8")
+        with pytest.raises(WriteError):
+            _write([{key: 8}] * 3, max_attempts=3)
+
+
+    def test_aimd(self):
+        clock = _Clock()
+        controller = RateController(
+            FlowControl(initial_rate=1000, increase=100, decrease=0.5, target_latency=0.5, min_rate=300),
+            clock, clock.sleep)
+        controller.observe(0.1)
+        assert controller.rate == 1100
+        controller.observe(0.9)
+        controller.observe(0.9)
+        assert controller.rate == 550
+        clock.now += 0.5
+        controller.observe(0.1, throttled=2)
+        assert controller.rate == 300
+        assert controller.retried == 2
+        controller.acquire(300)
+        controller.acquire(150)
+        assert clock.sleeps == [pytest.approx(1.0)]
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import follow
+import keycodec
+import os
+import pytest
+import query
+from memtable import MemoryTable
+from writerows import gen_row_mutation
+from writerows import read_csv_models
+from writerows import write_mutations
+
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "data", "input_data.csv")
+
+
+class _Done(Exception):
+    pass
+
+
+@pytest.fixture(scope="module", params=[1, 2])
+def mutations(request):
+    # Sorted by timestamp, as the rows of every series are written in timestamp order.
+    mutations = [gen_row_mutation(model, request.param) for model in read_csv_models(DATA)]
+    mutations.sort(key=lambda mutation: keycodec.decode(mutation[0]).ts)
+    return request.param, mutations
+
+
+class TestFollow(object):
+    def test_polls_only_new_rows(self, mutations):
+        version, mutations = mutations
+        table = MemoryTable()
+        half = len(mutations) // 2
+        write_mutations(table, mutations[:half])
+        follower = follow.Follower(table, query.OddsQuery(sid="1", lid="213", mid="7654321", version=version))
+
+        first = follower.poll()
+        assert {key for key, _ in first} == {key.encode("utf-8") for key, _ in mutations[:half]}
+        write_mutations(table, mutations[half:])
+        scans, ranges, series = follower.scans, follower.ranges(), len(follower.marks)
+        second = follower.poll()
+        assert follower.scans - scans == len(ranges) <= series + 1
+        # A row updated in place, i.e., with the timestamp of its mark, is not emitted again.
+        assert {key for key, _ in second} == (
+            {key.encode("utf-8") for key, _ in mutations[half:]} - {key for key, _ in first})
+        assert len(first) + len(second) == len(table)
+        ts = [keycodec.decode(key).ts for key, _ in second]
+        assert ts == sorted(ts)
+        assert follower.poll() == []
+
+
+    def test_follow_rows(self, mutations):
+        version, mutations = mutations
+        table = MemoryTable()
+        half = len(mutations) // 2
+        write_mutations(table, mutations[:half])
+        delays = []
+
+        def _sleep(delay):
+            delays.append(delay)
+            if len(delays) == 1:
+                write_mutations(table, mutations[half:])
+            elif len(delays) == 4:
+                raise _Done()
+
+        rows = []
+        options = follow.FollowOptions(min_interval=1, max_interval=3, fast=True)
+        with pytest.raises(_Done):
+            for row in follow.follow_rows(
+                    table, query.OddsQuery(sid="1", lid="213", mid="7654321", version=version), options,
+                    sleep=_sleep):
+                rows.append(row)
+        assert len(rows) == len(table)
+        assert len({(row.mkt, row.seq, row.per, row.vendor, row.ts) for row in rows}) == len(rows)
+        assert delays == [1, 1, 2, 3]
@@ -6,6 +6,8 @@ import pytest
 from typing import List
 from getrows import get_rowkeys
 from getrows import get_table_instance
+from getrows import iter_rows_range
+from getrows import parallel_scan_rows_range
 from getrows import scan_rows_range
 
 
@@ -53,6 +55,17 @@ class TestGetrows(object):
         result_models = get_rowkeys(table_instance, rowkeys, sep = ":")
         assert len(result_models) > 1
     
+    def test_get_rowkeys_keeps_order_and_reports_missing(
+        self, table_instance, rowkeys: List[str]
+    ):
+        missing: List[str] = []
+        unknown = "1:213:7654321:ou:0:pre:betradar:0"
+        result_models = get_rowkeys(
+            table_instance, [unknown] + rowkeys, sep=":", chunk_size=1, missing=missing)
+        assert missing == [unknown]
+        assert [int(m.ts.timestamp()) for m in result_models] == \
+            [int(k.split(":")[-1]) for k in rowkeys]
+
     def test_row_scan_single_vendor(
         self,
         table_instance,
@@ -64,4 +77,41 @@ class TestGetrows(object):
                                         start_rowkey_single_vendor,
                                         stop_rowkey_single_vendor,
                                         sep = ":")
-        assert len(result_models) > 1
\ No newline at end of file
+        assert len(result_models) > 1
+
+    def test_iter_rows_range_with_projection(
+        self,
+        table_instance,
+        start_rowkey_single_vendor,
+        stop_rowkey_single_vendor
+    ):
+        result_models = list(iter_rows_range(
+                                        table_instance,
+                                        start_rowkey_single_vendor,
+                                        stop_rowkey_single_vendor,
+                                        sep = ":",
+                                        limit = 2,
+                                        columns = ["odds"]))
+        assert len(result_models) == 2
+        assert all(m.info is None and m.odds is not None for m in result_models)
+
+
+    def test_parallel_scan_matches_sequential_scan(
+        self,
+        table_instance,
+        start_rowkey_single_vendor,
+        stop_rowkey_single_vendor
+    ):
+        expected = [(m.vendor, m.ts) for m in scan_rows_range(
+                                        table_instance,
+                                        start_rowkey_single_vendor,
+                                        stop_rowkey_single_vendor,
+                                        sep = ":")]
+        result_models = parallel_scan_rows_range(
+                                        table_instance,
+                                        start_rowkey_single_vendor,
+                                        stop_rowkey_single_vendor,
+                                        sep = ":",
+                                        splits = 4,
+                                        use_samples = False)
+        assert [(m.vendor, m.ts) for m in result_models] == expected
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import pytest
+from getrows import plan_query
+from getrows import query_rows
+from index import IndexQuery
+from index import Indexer
+from index import entry_rowkey
+from memtable import MemoryTable
+from writerows import write_mutations
+
+
+@pytest.fixture
+def tables():
+    log = []
+
+    def _record(name, operation, keys):
+        if operation == "send":
+            log.append((name, sorted(keys)))
+
+    main, index_table = MemoryTable("main", hook=_record), MemoryTable("index", hook=_record)
+    odds = {b"odds:h": b"1.57", b"odds:a": b"3.75", b"odds:d": b"4.05"}
+    mutations = [
+        ("1:213:7654321:1x2:0:pre:vendorA:1595880201", odds),
+        ("1:213:7654321:1x2:0:pre:vendorB:1595880230", odds),
+        ("1:213:1234567:1x2:0:pre:vendorA:1595880290", odds),
+        ("1:213:7654321:ah:0:pre:vendorA:1595880400", {b"odds:k": b"0.5", b"odds:h": b"0.9", b"odds:a": b"1.0"}),
+    ]
+    write_mutations(main, mutations, batch_size=2, indexer=Indexer(index_table))
+    return main, index_table, log
+
+
+class TestIndex(object):
+    def test_index_entries_follow_their_batch(self, tables):
+        _, index_table, log = tables
+        assert [name for name, _ in log] == ["main", "index", "main", "index"]
+        for (_, rows), (_, entries) in zip(log[::2], log[1::2]):
+            assert {entry_rowkey(entry) for entry in entries} == set(rows)
+        assert len(index_table) == 8
+
+
+    def test_plan(self):
+        assert plan_query(IndexQuery(sid="1", lid="213", mid="7654321", vendor="vendorA"), ["vendor"]) == "prefix"
+        assert plan_query(IndexQuery(vendor="vendorA"), ["vendor", "time"]) == "vendor"
+        assert plan_query(IndexQuery(vendor="vendorA", ts_from=1), ["time"]) == "time"
+        assert plan_query(IndexQuery(vendor="vendorA"), []) == "scan"
+
+
+    @pytest.mark.parametrize("kind", ["vendor", "time"])
+    def test_index_lookup(self, tables, kind):
+        main, index_table, _ = tables
+        plans = []
+        rows = list(query_rows(
+            main, IndexQuery(vendor="vendorA", mkt="1x2", ts_from=1595880200, ts_to=1595880300),
+            index_table, [kind], fast=True, plans=plans))
+        assert plans == [kind]
+        assert [(row.mid, row.ts) for row in rows] == [("7654321", 1595880201), ("1234567", 1595880290)]
+
+
+    def test_many_index_entries_are_paged(self, tables):
+        main, index_table, _ = tables
+        plans = []
+        rows = list(query_rows(
+            main, IndexQuery(vendor="vendorA", mkt="1x2"), index_table, ["vendor"],
+            max_index_rows=1, fast=True, plans=plans))
+        assert plans == ["vendor"]
+        assert [(row.mid, row.ts) for row in rows] == [("7654321", 1595880201), ("1234567", 1595880290)]
+        rows = list(query_rows(
+            main, IndexQuery(vendor="vendorA"), index_table, ["vendor"], max_index_rows=2, limit=2, fast=True))
+        assert [(row.mid, row.ts) for row in rows] == [("7654321", 1595880201), ("1234567", 1595880290)]
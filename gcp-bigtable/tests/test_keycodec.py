@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import keycodec
+import pytest
+
+
+class TestKeyCodec(object):
+    @pytest.fixture
+    def key(self):
+        return keycodec.RowKey("1", "213", "7654321", "ou", "0", "pre", "betradar", 1595906157)
+
+
+    def test_legacy_layout_is_unchanged(self, key):
+        rowkey = keycodec.LEGACY.encode(key)
+        assert rowkey == "1:213:7654321:ou:0:pre:betradar:1595906157"
+        assert keycodec.decode(rowkey) == key
+
+
+    def test_latest_first_round_trip(self, key):
+        rowkey = keycodec.LATEST_FIRST.encode(key)
+        assert rowkey == "v2:001:000213:0007654321:ou:000:pre:betradar:8404093842"
+        assert keycodec.decode(rowkey.encode("utf-8")) == key
+
+
+    def test_latest_first_sorts_newest_first(self, key):
+        older = keycodec.LATEST_FIRST.encode(key)
+        newer = keycodec.LATEST_FIRST.encode(key._replace(ts=key.ts + 1))
+        prefix = keycodec.LATEST_FIRST.prefix("1", "213", "7654321", "ou", "0", "pre", "betradar")
+        assert newer < older
+        assert newer.startswith(prefix) and older.startswith(prefix)
+
+
+    def test_field_overflow(self, key):
+        with pytest.raises(ValueError):
+            keycodec.LATEST_FIRST.encode(key._replace(sid="1000"))
+
+
+    def test_codec_base_class_is_abstract(self):
+        with pytest.raises(TypeError):
+            keycodec.RowKeyCodec()
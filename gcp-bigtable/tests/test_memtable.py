@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import getrows
+import os
+import pytest
+from google.cloud.bigtable.row_filters import CellsRowLimitFilter
+from google.cloud.bigtable.row_filters import RowFilterChain
+from google.cloud.bigtable.row_filters import RowKeyRegexFilter
+from google.cloud.bigtable.row_filters import StripValueTransformerFilter
+from memtable import MemoryTable
+from writerows import gen_row_mutation
+from writerows import read_csv_models
+from writerows import write_mutations
+
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "data", "input_data.csv")
+
+
+@pytest.fixture(scope="module")
+def mutations():
+    return [gen_row_mutation(model) for model in read_csv_models(DATA)]
+
+
+@pytest.fixture
+def table(mutations):
+    table = MemoryTable()
+    write_mutations(table, mutations, batch_size=100)
+    return table
+
+
+class TestMemoryTable(object):
+    def test_batches_are_rpcs(self, table, mutations):
+        assert table.rpcs == (len(mutations) + 99) // 100
+        assert len(table) == len({rowkey for rowkey, _ in mutations})
+
+
+    def test_scan_is_sorted_and_bounded(self, table):
+        keys = [key for key, _ in table.scan()]
+        assert keys == sorted(keys)
+        prefix = b"1:213:7654321:ah:"
+        assert [k for k, _ in table.scan(row_prefix=prefix)] == [k for k in keys if k.startswith(prefix)]
+        assert [k for k, _ in table.scan(row_start=keys[10], row_stop=keys[20])] == keys[10:20]
+        assert len(list(table.scan(limit=5, batch_size=2))) == 5
+        rpcs = table.rpcs
+        assert len(list(table.scan(batch_size=2))) == len(keys) and table.rpcs == rpcs + 1
+
+
+    def test_filters_and_columns(self, table):
+        row_filter = RowFilterChain(filters=[
+            RowKeyRegexFilter(b"^.*:ah:.*$"), CellsRowLimitFilter(1), StripValueTransformerFilter(True)])
+        rows = list(table.scan(filter=row_filter))
+        assert rows and all(b":ah:" in key and list(row.values()) == [b""] for key, row in rows)
+        key = rows[0][0]
+        assert set(table.row(key, columns=["info"])) == {b"info:per", b"info:s", b"info:et"}
+        assert table.rows([key, b"missing"], columns=[b"odds:h"]) == [(key, {b"odds:h": table.row(key)[b"odds:h"]})]
+        assert table.row(b"missing") == {}
+
+
+    def test_getrows_and_latency(self, mutations):
+        sleeps = []
+        table = MemoryTable(latency=0.01, sleep=sleeps.append)
+        write_mutations(table, mutations, batch_size=100)
+        rowkeys = [rowkey for rowkey, _ in mutations[:50]]
+        rows = getrows.get_rowkeys(table, rowkeys, sep=":", chunk_size=10, max_workers=1, fast=True)
+        assert [row.ts for row in rows] == [int(rowkey.rsplit(":", 1)[1]) for rowkey in rowkeys]
+        assert len(getrows.scan_rows_range(table, rowkeys[0], rowkeys[-1] + "~", ":")) > 0
+        assert len(sleeps) == table.rpcs == (len(mutations) + 99) // 100 + 5 + 1
+
+
+    def test_getrows_defaults_to_the_written_delimiter(self, table, mutations):
+        rowkeys = [rowkey for rowkey, _ in mutations[:3]]
+        rows = getrows.get_rowkeys(table, rowkeys, fast=True)
+        assert [(row.vendor, row.ts) for row in rows] == [
+            (rowkey.split(":")[6], int(rowkey.rsplit(":", 1)[1])) for rowkey in rowkeys]
+
+
+    def test_getrows_rejects_a_chunk_size_below_one(self, table, mutations):
+        rowkeys = [rowkey for rowkey, _ in mutations[:3]]
+        rpcs = table.rpcs
+        for chunk_size in (0, -1):
+            with pytest.raises(ValueError):
+                getrows.get_rowkeys(table, rowkeys, chunk_size=chunk_size)
+        assert table.rpcs == rpcs
+
+
+    def test_hook_sees_every_rpc_before_it_is_served(self):
+        calls = []
+        table = MemoryTable(hook=lambda *call: calls.append(call))
+        table.put("b", {b"odds:h": b"1"})
+        with table.batch() as batch:
+            batch.put(b"a", {b"odds:h": b"2"})
+            batch.delete(b"b")
+        assert table.rows([b"a", b"b"]) == [(b"a", {b"odds:h": b"2"})]
+        assert list(table.scan()) == [(b"a", {b"odds:h": b"2"})]
+        assert calls == [("odds", "put", [b"b"]), ("odds", "send", [b"b", b"a"]),
+                         ("odds", "rows", [b"a", b"b"]), ("odds", "scan", [])]
+
+        def _fail(name, operation, keys):
+            raise RuntimeError("connection lost")
+
+        table.hook = _fail
+        with pytest.raises(RuntimeError):
+            table.put(b"c", {b"odds:h": b"3"})
+        assert len(table) == 1 and table.rpcs == 4
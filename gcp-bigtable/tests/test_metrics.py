@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import getrows
+import json
+import metrics
+import os
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from memtable import MemoryTable
+from writerows import gen_row_mutation
+from writerows import read_csv_models
+from writerows import write_mutations
+
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "data", "input_data.csv")
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    m = metrics.Metrics(enabled=True)
+    monkeypatch.setattr(metrics, "_METRICS", m)
+    return m
+
+
+class TestMetrics(object):
+    def test_histogram(self):
+        histogram = metrics.Histogram([0.01, 0.1, 1.0])
+        assert histogram.quantile(0.5) is None
+        for seconds in [0.005] * 98 + [0.05, 5.0]:
+            histogram.observe(seconds)
+        assert histogram.counts == [98, 1, 0, 1]
+        assert histogram.quantile(0.5) == 0.01
+        assert histogram.quantile(0.99) == 0.1
+        assert histogram.quantile(1.0) == float("inf")
+
+
+    def test_disabled_collects_nothing(self, monkeypatch):
+        m = metrics.Metrics()
+        monkeypatch.setattr(metrics, "_METRICS", m)
+        table = MemoryTable()
+        write_mutations(table, [gen_row_mutation(model) for model in read_csv_models(DATA)][:10])
+        with m.stage("connect"):
+            pass
+        assert m.snapshot() == {"stages": {}, "operations": {}, "counters": {}}
+
+
+    def test_reads_and_writes(self, enabled, tmp_path):
+        mutations = [gen_row_mutation(model) for model in read_csv_models(DATA)]
+        table = MemoryTable()
+        write_mutations(table, mutations, batch_size=100)
+        keys = [key.decode("utf-8") for key, _ in table.scan()]
+        scanned = list(getrows.iter_rows_range(table, "", "", ":"))
+        getrows.get_rowkeys(table, keys[:30], ":", chunk_size=10, max_workers=1)
+
+        snapshot = enabled.snapshot()
+        counters = snapshot["counters"]
+        assert counters["written_rows"] == len(mutations)
+        assert counters["written_cells"] == sum(len(data) for _, data in mutations)
+        assert counters["written_bytes"] == sum(metrics.row_size(*mutation) for mutation in mutations)
+        assert counters["read_rows"] == len(scanned) + 30
+        assert snapshot["operations"]["write_batch"]["count"] == (len(mutations) + 99) // 100
+        assert snapshot["operations"]["rows"]["count"] == 3
+        assert snapshot["operations"]["scan"]["count"] == 1
+        stages = snapshot["stages"]
+        assert stages["rpc"]["calls"] == (len(mutations) + 99) // 100 + len(scanned) + 3
+        assert stages["decode"]["calls"] == stages["model"]["calls"] == len(scanned) + 30
+        assert all(stage["wall_seconds"] >= 0 and stage["cpu_seconds"] >= 0 for stage in stages.values())
+
+        prom, js = str(tmp_path / "odds.prom"), str(tmp_path / "odds.json")
+        enabled.write(prom)
+        enabled.write(js)
+        text = open(prom).read()
+        assert 'odds_latency_seconds_bucket{op="scan",le="+Inf"} 1' in text
+        assert "odds_read_rows_total {}".format(len(scanned) + 30) in text
+        assert json.load(open(js))["counters"] == counters
+
+
+    def test_concurrent_writes(self, enabled, tmp_path):
+        path = str(tmp_path / "odds.json")
+        enabled.count("written_rows", 3)
+
+        def _write(_):
+            for _ in range(50):
+                enabled.write(path)
+
+        with ThreadPoolExecutor(4) as executor:
+            list(executor.map(_write, range(4)))
+        assert json.load(open(path))["counters"] == {"written_rows": 3}
+        assert os.listdir(str(tmp_path)) == ["odds.json"]
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import keycodec
+import os
+import pytest
+from memtable import MemoryTable
+from migrate import migrate_range
+from migrate import rewrite_rows
+from writerows import gen_row_mutation
+from writerows import read_csv_models
+from writerows import write_mutations
+
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "data", "input_data.csv")
+
+
+class _FailingTable(MemoryTable):
+    def __init__(self, batches):
+        super().__init__("odds_v2")
+        self._batches = batches
+
+    def batch(self, *args, **kwargs):
+        if self._batches == 0:
+            raise RuntimeError("connection lost")
+        self._batches -= 1
+        return super().batch(*args, **kwargs)
+
+
+@pytest.fixture
+def rows():
+    models = list(read_csv_models(DATA))[:40]
+    return dict((rowkey.encode("utf-8"), data) for rowkey, data in map(gen_row_mutation, models))
+
+
+@pytest.fixture
+def table(rows):
+    table = MemoryTable()
+    write_mutations(table, [(rowkey.decode("utf-8"), data) for rowkey, data in rows.items()])
+    return table
+
+
+class TestMigrate(object):
+    def test_rewrite_rows_skips_migrated_keys(self, rows):
+        old_key, data = next(iter(rows.items()))
+        new_key = keycodec.LATEST_FIRST.encode(keycodec.decode(old_key))
+        assert list(rewrite_rows([(old_key, data), (new_key.encode("utf-8"), data)])) == [
+            (old_key, new_key, data)]
+        legacy = keycodec.AscendingTsCodec("#").encode(keycodec.decode(old_key))
+        assert list(rewrite_rows([(legacy.encode("utf-8"), data)], sep="#")) == [
+            (legacy.encode("utf-8"), new_key, data)]
+
+
+    def test_same_table_with_delete_source(self, rows, table):
+        assert migrate_range(table, table, b"", b"", batch_size=7, delete_source=True)[0] == len(rows)
+        migrated = dict(table.scan())
+        assert len(migrated) == len(rows)
+        assert all(key.startswith(b"v2:") for key in migrated)
+        assert {keycodec.LEGACY.encode(keycodec.decode(key)).encode("utf-8"): data
+                for key, data in migrated.items()} == rows
+        # A second pass finds nothing left to migrate.
+        assert migrate_range(table, table, b"", b"", delete_source=True) == (0, 0)
+        assert dict(table.scan()) == migrated
+
+
+    def test_range_into_another_table_keeps_the_source(self, rows, table):
+        keys = sorted(rows)
+        target = MemoryTable("odds_v2")
+        assert migrate_range(table, target, keys[5], keys[15])[0] == 10
+        assert sorted(keycodec.LEGACY.encode(keycodec.decode(key)).encode("utf-8")
+                      for key, _ in target.scan()) == keys[5:15]
+        assert dict(table.scan()) == rows
+
+
+    def test_source_rows_are_deleted_batch_by_batch(self, rows, table):
+        target = _FailingTable(batches=2)
+        with pytest.raises(RuntimeError):
+            migrate_range(table, target, b"", b"", batch_size=7, delete_source=True)
+        assert len(target) == 14 and len(table) == len(rows) - 14
+        migrated = {keycodec.LEGACY.encode(keycodec.decode(key)).encode("utf-8") for key, _ in target.scan()}
+        assert migrated.isdisjoint(dict(table.scan())) and migrated == set(sorted(rows)[:14])
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import getrows
+import os
+import pool
+import pytest
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from memtable import MemoryTable
+from writerows import IngestOptions
+from writerows import ingest_file
+
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "data", "input_data.csv")
+
+
+class _Client(object):
+    created = []
+
+    def __init__(self, project, admin):
+        self.project = project
+        self.admin = admin
+        _Client.created.append(self)
+
+    def instance(self, instance_id):
+        return (self.project, instance_id)
+
+
+class _Connection(object):
+    created = []
+    calls = []
+
+    def __init__(self, instance):
+        self.instance = instance
+        self.closed = False
+        _Connection.created.append(self)
+
+    def table(self, name):
+        table = MemoryTable(name, hook=lambda *call: _Connection.calls.append(call[:2]))
+        table.connection = self
+        return table
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def table_pool(monkeypatch):
+    _Client.created, _Connection.created, _Connection.calls = [], [], []
+    monkeypatch.setattr(pool.bigtable, "Client", _Client)
+    monkeypatch.setattr(pool.happybase, "Connection", _Connection)
+    return pool.TablePool(admin=False)
+
+
+class TestTablePool(object):
+    def test_clients_connections_and_tables_are_shared(self, table_pool):
+        client = table_pool.client("project")
+        assert table_pool.client("project") is client and not client.admin
+        assert table_pool.client("other") is not client
+
+        connection = table_pool.connection("project", "instance")
+        assert connection.instance == ("project", "instance")
+        assert table_pool.connection("project", "instance") is connection
+        assert table_pool.connection("project", "other") is not connection
+
+        table = table_pool.table("project", "instance", "odds")
+        assert table.name == "odds" and table.connection is connection
+        assert table_pool.table("project", "instance", "odds") is table
+        assert table_pool.table("project", "instance", "odds_index") is not table
+        assert len(_Client.created) == 2 and len(_Connection.created) == 2
+
+
+    def test_concurrent_callers_share_one_table(self, table_pool):
+        start = threading.Barrier(8)
+
+        def _table(_):
+            start.wait()
+            return table_pool.table("project", "instance", "odds")
+
+        with ThreadPoolExecutor(8) as executor:
+            tables = list(executor.map(_table, range(8)))
+        assert all(table is tables[0] for table in tables)
+        assert len(_Client.created) == 1 and len(_Connection.created) == 1
+
+
+    def test_new_table_has_its_own_connection(self, table_pool):
+        shared = table_pool.table("project", "instance", "odds")
+        table = table_pool.new_table("project", "instance", "odds")
+        assert table is not shared and table.connection is not shared.connection
+        assert len(_Client.created) == 1
+        assert table_pool.table("project", "instance", "odds") is shared
+
+
+    def test_warm_up_and_close(self, table_pool):
+        table_pool.warm_up("project", "instance", ["odds", "odds_index"])
+        assert [table_pool.table("project", "instance", name).rpcs for name in ("odds", "odds_index")] == [1, 1]
+        connection = table_pool.connection("project", "instance")
+        dedicated = table_pool.new_table("project", "instance", "odds").connection
+        table_pool.close()
+        assert connection.closed and not dedicated.closed
+        assert table_pool.connection("project", "instance") is not connection
+        assert len(_Client.created) == 2
+
+
+    def test_get_pool_per_access(self):
+        assert pool.get_pool(False) is pool.get_pool(False)
+        assert pool.get_pool(True) is not pool.get_pool(False)
+        assert pool.get_pool(True).admin and not pool.get_pool(False).admin
+
+
+    def test_getrows_warm_up(self, monkeypatch, table_pool):
+        monkeypatch.setattr(pool, "get_pool", lambda admin: table_pool)
+        getrows.main("project", "instance", "odds", ["1:2:3:1x2:0:pre:vendorA:1"], "", "", ":", warm_up=True)
+        assert _Connection.calls == [("odds", "scan"), ("odds", "rows")]
+
+
+    def test_writerows_warm_up(self, monkeypatch, tmp_path, table_pool):
+        with open(DATA) as data_file:
+            lines = data_file.readlines()[:6]
+        src = tmp_path / "odds.csv"
+        src.write_text("".join(lines))
+        monkeypatch.setattr(pool, "get_pool", lambda admin: table_pool)
+        ingest_file("project", "instance", "odds", str(src),
+                    IngestOptions(warm_up=True, indexes=["vendor"], rollups=["1m"]))
+        assert _Connection.calls[:3] == [("odds", "scan"), ("odds_rollup", "scan"), ("odds_index", "scan")]
+        assert all(operation != "scan" for _, operation in _Connection.calls[3:])
+        assert len(table_pool.table("project", "instance", "odds")) == 5
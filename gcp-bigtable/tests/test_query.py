@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import re
+from query import OddsQuery
+from query import compile_query
+
+
+class TestCompileQuery(object):
+    def test_prefix_only(self):
+        compiled = compile_query(OddsQuery(sid="1", lid="213", mid="7654321", mkt="ou"))
+        assert compiled.row_start == b"1:213:7654321:ou:"
+        assert compiled.row_stop == b"1:213:7654321:ou;"
+        assert compiled.key_regex is None
+
+
+    def test_full_series_with_window(self):
+        compiled = compile_query(OddsQuery(
+            sid="1", lid="213", mid="7654321", mkt="ou", seq="0", per="pre",
+            vendor="betradar", ts_from=1595880201, ts_to=1595906157))
+        assert compiled.row_start == b"1:213:7654321:ou:0:pre:betradar:1595880201"
+        assert compiled.row_stop == b"1:213:7654321:ou:0:pre:betradar:1595906157\x00"
+        assert compiled.key_regex is None
+
+
+    def test_gap_is_pushed_down_as_regex(self):
+        compiled = compile_query(OddsQuery(
+            sid="1", lid="213", mid="7654321", vendor="betradar",
+            ts_from=1595880201, ts_to=1595906157))
+        assert compiled.row_start == b"1:213:7654321:"
+        regex = re.compile(compiled.key_regex)
+        assert regex.fullmatch(b"1:213:7654321:ou:0:pre:betradar:1595906157")
+        assert not regex.fullmatch(b"1:213:7654321:ou:0:pre:bet188:1595904940")
+        assert not regex.fullmatch(b"1:213:7654321:ou:0:pre:betradar:1595906158")
+
+
+    def test_latest_first_window(self):
+        compiled = compile_query(OddsQuery(
+            sid="1", lid="213", mid="7654321", mkt="ou", seq="0", per="pre",
+            vendor="betradar", ts_from=1595880201, ts_to=1595906157, version=2))
+        prefix = b"v2:001:000213:0007654321:ou:000:pre:betradar:"
+        assert compiled.row_start == prefix + b"8404093842"
+        assert compiled.row_stop == prefix + b"8404119798\x00"
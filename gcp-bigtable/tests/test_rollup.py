@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import os
+import pytest
+from columnar import parse_odds_value
+from keycodec import decode
+from query import OddsQuery
+from rollup import RollupAggregator
+from rollup import decode_rollup
+from rollup import scan_rollups
+from writerows import gen_row_mutation
+from writerows import read_csv_models
+
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "data", "input_data.csv")
+
+
+@pytest.fixture(scope="module")
+def mutations():
+    return [gen_row_mutation(csv_model) for csv_model in read_csv_models(DATA)]
+
+
+class _RecordingTable(object):
+    def __init__(self, rows):
+        self.rows = sorted(rows)
+        self.kwargs = None
+
+    def scan(self, row_start=None, row_stop=None, limit=None, **kwargs):
+        self.kwargs = dict(kwargs, row_start=row_start, row_stop=row_stop)
+        return iter([(k, r) for k, r in self.rows if row_start <= k < row_stop][:limit])
+
+
+class TestRollup(object):
+    def test_matches_brute_force(self, mutations):
+        aggregator = RollupAggregator(["1m", "5m"])
+        rollups = []
+        for rowkey, data in mutations:
+            rollups.extend(aggregator.add(rowkey, data))
+        rollups.extend(aggregator.flush())
+        assert aggregator.late == 0
+
+        expected = {}
+        for rowkey, data in mutations:
+            key = decode(rowkey)
+            value = parse_odds_value(data.get(b"odds:h", b""))
+            if value != value:
+                continue
+            group = expected.setdefault((tuple(key[:7]), key.ts - key.ts % 60), [])
+            group.append(value)
+        decoded = [decode_rollup(k.encode("utf-8"), d) for k, d in rollups]
+        minutes = {(tuple(r[1:8]), r.start): r for r in decoded if r.bucket == "1m"}
+        assert sum(r.n for r in minutes.values()) == len(mutations)
+        for group, values in expected.items():
+            assert minutes[group].values["h"] == (values[0], max(values), min(values), values[-1])
+
+
+    def test_buckets_close_when_a_later_row_arrives(self):
+        aggregator = RollupAggregator(["1m"])
+        odds = {b"odds:h": b"1.5", b"odds:a": b"2.5", b"odds:d": b"3.0"}
+        assert aggregator.add("1:213:7654321:1x2:0:pre:vendorA:100", odds) == []
+        closed = aggregator.add("1:213:7654321:1x2:0:pre:vendorA:130", odds)
+        assert [rowkey for rowkey, _ in closed] == ["1m:1:213:7654321:1x2:0:pre:vendorA:60"]
+        assert aggregator.add("1:213:7654321:1x2:0:pre:vendorA:110", odds) == []
+        assert aggregator.late == 1
+        assert [rowkey for rowkey, _ in aggregator.advance(180)] == ["1m:1:213:7654321:1x2:0:pre:vendorA:120"]
+
+
+    def test_rows_without_odds_are_not_counted(self):
+        aggregator = RollupAggregator(["1m"])
+        aggregator.add("1:213:7654321:ou:0:pre:vendorA:100", {b"odds:k": b"2.5", b"odds:ovr": b"1.9"})
+        aggregator.add("1:213:7654321:ou:0:pre:vendorA:110", {b"odds:k": b"", b"odds:ovr": b""})
+        aggregator.add("1:213:7654321:ou:0:pre:vendorA:115", {b"info:et": b"1"})
+        [(_, data)] = aggregator.flush()
+        assert data[b"ohlc:n"] == b"1"
+        assert data[b"ohlc:k.c"] == b"2.5"
+
+
+    def test_scan_rollups_prepends_the_bucket(self):
+        table = _RecordingTable([
+            (b"1m:1:213:7654321:ou:0:pre:vendorA:60", {b"ohlc:n": b"2", b"ohlc:k.o": b"2.5",
+                                                       b"ohlc:k.h": b"2.75", b"ohlc:k.l": b"2.5",
+                                                       b"ohlc:k.c": b"2.75"}),
+            (b"5m:1:213:7654321:ou:0:pre:vendorA:0", {b"ohlc:n": b"2"}),
+        ])
+        result = list(scan_rollups(table, "1m", OddsQuery(sid="1", lid="213", mid="7654321", mkt="ou")))
+        assert table.kwargs["row_start"] == b"1m:1:213:7654321:ou:"
+        assert [(r.start, r.n, r.values) for r in result] == [(60, 2, {"k": (2.5, 2.75, 2.5, 2.75)})]
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import cache
+import getrows
+import http.client
+import json
+import os
+import pytest
+import server
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from memtable import MemoryTable
+from writerows import gen_row_mutation
+from writerows import read_csv_models
+from writerows import write_mutations
+
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "data", "input_data.csv")
+
+
+@pytest.fixture(scope="module")
+def table():
+    table = MemoryTable()
+    write_mutations(table, [gen_row_mutation(model) for model in read_csv_models(DATA)])
+    return table
+
+
+@pytest.fixture
+def serve(table):
+    servers = []
+
+    def _serve(service):
+        httpd = server.make_server(service, "127.0.0.1:0")
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        servers.append(httpd)
+
+        def _get(path):
+            conn = http.client.HTTPConnection(*httpd.server_address)
+            conn.request("GET", path)
+            response = conn.getresponse()
+            body = response.read()
+            conn.close()
+            return response.status, body
+
+        return _get
+
+    yield _serve
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+class TestServer(object):
+    def test_single_flight(self):
+        flights = server.SingleFlight()
+        started, release = threading.Event(), threading.Event()
+
+        def _call():
+            started.set()
+            release.wait()
+            return object()
+
+        with ThreadPoolExecutor(6) as executor:
+            leader = executor.submit(flights.do, "key", _call)
+            started.wait()
+            followers = [executor.submit(flights.do, "key", _call) for _ in range(5)]
+            while flights.shared < 5:
+                pass
+            release.set()
+            result, shared = leader.result()
+            assert not shared
+            assert all(f.result() == (result, True) for f in followers)
+        assert (flights.calls, flights.shared) == (1, 5)
+        with pytest.raises(KeyError):
+            flights.do("key", lambda: {}["missing"])
+        assert flights.calls == 2 and not flights._flights
+
+
+    def test_endpoints(self, table, serve):
+        get = serve(server.QueryService(table, sep=":", max_rows=20, fast=True))
+        keys = [key.decode("utf-8") for key, _ in table.scan(limit=3)]
+        status, body = get("/rows?key={}&key={}&key=1:missing".format(keys[0], keys[2]))
+        assert status == 200
+        response = json.loads(body)
+        expected = getrows.get_rowkeys(table, [keys[0], keys[2]], ":", fast=True)
+        assert response["rows"] == json.loads(json.dumps([row._asdict() for row in expected]))
+        assert response["missing"] == ["1:missing"]
+
+        status, body = get("/scan?start={}&limit=100&column=info".format(keys[1]))
+        rows = json.loads(body)["rows"]
+        first = getrows.get_rowkeys(table, [keys[1]], ":", fast=True)[0]
+        assert status == 200 and len(rows) == 20 and rows[0]["ts"] == first.ts
+        assert all(row["odds"] is None for row in rows)
+
+        assert get("/scan?limit=x")[0] == 400
+        assert get("/rows")[0] == 400
+        assert get("/nowhere")[0] == 404
+        assert json.loads(get("/health")[1]) == {"status": "ok"}
+        assert json.loads(get("/metrics?format=json")[1])["operations"]["http_rows"]["count"] == 2
+        assert b'odds_latency_seconds_count{op="http_scan"} 2' in get("/metrics")[1]
+
+
+    def test_coalescing(self, table, serve):
+        latent = MemoryTable(latency=0.2)
+        latent._data, latent._keys = table._data, None
+        service = server.QueryService(latent, sep=":", fast=True)
+        get = serve(service)
+        key = next(iter(latent._data)).decode("utf-8")
+        with ThreadPoolExecutor(8) as executor:
+            responses = list(executor.map(lambda _: get("/rows?key=" + key), range(8)))
+        assert len({body for _, body in responses}) == 1
+        assert latent.rpcs < 8
+        assert service.flights.calls + service.flights.shared == 8
+        assert json.loads(service.metrics.to_json())["counters"]["http_coalesced"] == service.flights.shared
+
+
+    def test_defaults_match_the_written_row_keys(self, table, serve):
+        get = serve(server.QueryService(table))
+        key = next(iter(table._data)).decode("utf-8")
+        status, body = get("/rows?key=" + key)
+        assert status == 200 and len(json.loads(body)["rows"]) == 1
+        status, body = get("/scan?limit=2")
+        assert status == 200 and len(json.loads(body)["rows"]) == 2
+
+
+    def test_cached_lookups_see_the_written_rows(self):
+        table = MemoryTable()
+        rowkey, data = next(gen_row_mutation(model) for model in read_csv_models(DATA))
+        write_mutations(table, [(rowkey, data)])
+        row_cache = cache.RowCache(ttl=60)
+        service = server.QueryService(cache.CachedTable(table, row_cache), fast=True)
+        body = service.lookup([rowkey])
+        rpcs = table.rpcs
+        assert service.lookup([rowkey]) == body and table.rpcs == rpcs
+        write_mutations(table, [(rowkey, {**data, b"odds:h": b"9.99"})], row_cache=row_cache)
+        assert b"9.99" in service.lookup([rowkey])
+
+
+    def test_unix_socket_only_replaces_a_stale_socket(self, table, tmp_path):
+        path = str(tmp_path / "odds.sock")
+        service = server.QueryService(table)
+        server.make_server(service, "unix:" + path).server_close()
+        httpd = server.make_server(service, "unix:" + path)
+        httpd.server_close()
+        typo = tmp_path / "odds.csv"
+        typo.write_text("keep")
+        with pytest.raises(FileExistsError):
+            server.make_server(service, "unix:" + str(typo))
+        assert typo.read_text() == "keep"
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import bisect
+import pytest
+import re
+from google.cloud.bigtable.row_filters import RowFilterChain
+from google.cloud.bigtable.row_filters import RowKeyRegexFilter
+from keycodec import LATEST_FIRST
+from keycodec import RowKey
+from snapshot import find_series
+from snapshot import get_snapshot
+from query import OddsQuery
+
+
+class _SortedTable(object):
+    """Just enough of ``happybase.Table`` for snapshots: row key filters are honoured, other filters ignored."""
+
+    def __init__(self, rows):
+        self._rows = sorted(rows.items())
+        self._keys = [key for key, _ in self._rows]
+        self.scans = 0
+
+    def scan(self, row_start=None, row_stop=None, limit=None, columns=None, filter=None):
+        self.scans += 1
+        filters = filter.filters if isinstance(filter, RowFilterChain) else [filter]
+        regexes = [re.compile(f.regex) for f in filters if isinstance(f, RowKeyRegexFilter)]
+        i = bisect.bisect_left(self._keys, row_start) if row_start else 0
+        count = 0
+        for key, row in self._rows[i:]:
+            if row_stop and key >= row_stop:
+                break
+            if limit is not None and count >= limit:
+                break
+            if all(regex.fullmatch(key) for regex in regexes):
+                count += 1
+                yield key, row
+
+    def rows(self, keys, columns=None):
+        found = dict(self._rows)
+        return [(key, found[key]) for key in keys if key in found]
+
+
+def _odds(h):
+    return {b"odds:h": h, b"odds:a": b"2.10", b"odds:d": b"3.30", b"info:s": b"0-0"}
+
+
+@pytest.fixture(params=[1, 2])
+def version(request):
+    return request.param
+
+
+@pytest.fixture
+def table(version):
+    rows = {}
+    for vendor, history in (("bet188", [100, 200, 300]), ("betradar", [150, 250]), ("bwin", [400])):
+        for ts in history:
+            key = RowKey("1", "213", "7654321", "1x2", "0", "pre", vendor, ts)
+            rowkey = LATEST_FIRST.encode(key) if version == 2 else ":".join(str(f) for f in key)
+            rows[rowkey.encode("utf-8")] = _odds(str(ts).encode("utf-8"))
+    return _SortedTable(rows)
+
+
+class TestSnapshot(object):
+    def test_find_series(self, table, version):
+        match = OddsQuery(sid="1", lid="213", mid="7654321", version=version)
+        series = find_series(table, match, splits=4)
+        assert [item.fields[6] for item in series] == ["bet188", "betradar", "bwin"]
+
+
+    def test_latest_row_at_or_before(self, table, version):
+        snapshot = get_snapshot(table, 1, 213, 7654321, 260, version=version)
+        assert [(row.vendor, row.odds.h) for row in snapshot] == [
+            ("bet188", "200"), ("betradar", "250")]
+
+
+    def test_series_updated_before_are_answered_by_the_skip_scan(self, table, version):
+        snapshot = get_snapshot(table, 1, 213, 7654321, 1000, version=version, splits=1, fast=True)
+        assert [row.ts for row in snapshot] == [300, 250, 400]
+        if version == 2:
+            # One skip-scan per series plus the empty scan ending it, and no lookups.
+            assert table.scans == 4
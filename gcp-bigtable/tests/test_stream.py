@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import io
+import json
+import pytest
+import queue
+import signal
+import socket
+import threading
+import time
+from stream import MicroBatcher
+from stream import StreamOptions
+from stream import end_of_stream
+from stream import listen
+from stream import stream_ingest
+
+
+HEADER = "vendor,game_state,score,game_time,market,created_ts,oddSeq,h,a,d,k,ov,ud\n"
+LINES = [
+    "vendorA,prematch,,,1x2,2020-07-28T05:08:13,0,1.57,3.75,4.05,,,\n",
+    "vendorA,prematch,,,1x2,2020-07-28T05:08:13,0,1.61,3.75,4.05,,,\n",
+    "vendorB,prematch,,,1x2,2020-07-28T05:08:13,0,1.60,3.70,4.00,,,\n",
+]
+
+
+class _Batch(object):
+    def __init__(self, table):
+        self._table = table
+        self._pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.send()
+
+    def put(self, row, data):
+        self._pending.append((row, data))
+
+    def send(self):
+        if self._pending:
+            self._table.sends.append(self._pending)
+            self._pending = []
+
+
+class _Table(object):
+    def __init__(self):
+        self.sends = []
+
+    def batch(self):
+        return _Batch(self)
+
+
+def _ingest(sources, **options):
+    table = _Table()
+    stats = {}
+    stream_ingest(table, sources, StreamOptions(**options), stats)
+    return table, stats
+
+
+class TestStream(object):
+    def test_batcher_flushes_on_rows_bytes_and_delay(self):
+        now = [0.0]
+        batcher = MicroBatcher(max_rows=2, max_bytes=100, max_delay=0.05, clock=lambda: now[0])
+        assert batcher.timeout() is None
+        assert not batcher.add("a", {b"odds:h": b"1"})
+        now[0] = 0.03
+        assert abs(batcher.timeout() - 0.02) < 1e-9
+        assert not batcher.add("a", {b"odds:h": b"2"})
+        assert batcher.coalesced == 1
+        assert batcher.add("b", {b"odds:h": b"1"})
+        assert batcher.drain() == [("a", {b"odds:h": b"2"}), ("b", {b"odds:h": b"1"})]
+        assert batcher.timeout() is None
+        assert batcher.add("c", {b"odds:h": b"x" * 100})
+
+
+    def test_csv_updates_of_one_row_are_coalesced(self):
+        sources = queue.Queue()
+        sources.put(io.StringIO(HEADER + "".join(LINES)))
+        end_of_stream(sources)
+        table, stats = _ingest(sources, fmt="csv", max_delay=10.0)
+        assert len(table.sends) == 1
+        rows = table.sends[0]
+        assert [rowkey.split(":")[6] for rowkey, _ in rows] == ["vendorA", "vendorB"]
+        assert rows[0][1][b"odds:h"] == b"1.61"
+        assert stats["messages"] == 3
+        assert stats["coalesced"] == 1
+        assert stats["rows"] == 2
+
+
+    def test_ndjson_over_socket_with_bad_lines(self):
+        fields = HEADER.strip().split(",")
+        server, client = socket.socketpair()
+        sources = queue.Queue()
+        sources.put(server)
+
+        def _send():
+            with client:
+                for line in LINES[:2]:
+                    record = dict(zip(fields, line.strip().split(",")))
+                    client.sendall((json.dumps(record) + "\n").encode("utf-8"))
+                client.sendall(b'{"vendor": "vendorA", "created_ts": "nope"}\n')
+            end_of_stream(sources)
+
+        threading.Thread(target=_send).start()
+        table, stats = _ingest(sources, max_rows=1)
+        assert [len(send) for send in table.sends] == [1, 1]
+        assert stats["errors"] == 1
+        assert stats["flushes"] == 2
+
+
+    def test_bad_line_in_the_middle_only_loses_itself(self):
+        fields = HEADER.strip().split(",")
+        records = [json.dumps(dict(zip(fields, line.strip().split(",")))) for line in (LINES[0], LINES[2])]
+        sources = queue.Queue()
+        sources.put(io.BytesIO("\n".join([records[0], "not json", "[1]", records[1]]).encode("utf-8")
+                               + b"\n\xff\xfe\n"))
+        end_of_stream(sources)
+        table, stats = _ingest(sources, max_delay=10.0)
+        assert [rowkey.split(":")[6] for send in table.sends for rowkey, _ in send] == ["vendorA", "vendorB"]
+        assert stats["errors"] == 3
+
+
+    def test_interrupt_writes_the_pending_batch(self):
+        main = threading.main_thread().ident
+
+        def _feed():
+            yield HEADER
+            yield from LINES
+            # Every line is queued by the time the next one is asked for, and soon batched.
+            time.sleep(0.2)
+            signal.pthread_kill(main, signal.SIGINT)
+
+        sources = queue.Queue()
+        sources.put(_feed())
+        table = _Table()
+        stats = {}
+        with pytest.raises(KeyboardInterrupt):
+            stream_ingest(table, sources, StreamOptions(fmt="csv", max_delay=10.0), stats)
+        assert [len(send) for send in table.sends] == [2]
+        assert stats["messages"] == 3
+        assert stats["rows"] == 2
+
+
+    def test_listen_fails_in_the_calling_thread(self, tmp_path):
+        server = listen("127.0.0.1:0")
+        with server, pytest.raises(OSError):
+            listen("127.0.0.1:{}".format(server.getsockname()[1]))
+        with pytest.raises(OSError):
+            listen("unix:" + str(tmp_path / "missing" / "odds.sock"))
+
+
+    def test_listen_only_replaces_a_stale_socket(self, tmp_path):
+        path = tmp_path / "odds.sock"
+        listen("unix:" + str(path)).close()
+        with listen("unix:" + str(path)):
+            client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            with client:
+                client.connect(str(path))
+        typo = tmp_path / "odds.csv"
+        typo.write_text(HEADER)
+        with pytest.raises(FileExistsError):
+            listen("unix:" + str(typo))
+        assert typo.read_text() == HEADER
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+import os
+import pytest
+import writerows
+from memtable import MemoryTable
+from writerows import IngestOptions
+from writerows import gen_row_mutation
+from writerows import ingest_file
+from writerows import put_rows
+from writerows import put_rows_bulk
+from writerows import read_csv_models
+
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "data", "input_data.csv")
+
+
+def _recording_table():
+    calls = []
+    table = MemoryTable(hook=lambda name, operation, keys: calls.append((operation, keys)))
+    return table, calls
+
+
+def _sends(calls):
+    return [len(keys) for operation, keys in calls if operation == "send"]
+
+
+@pytest.fixture(scope="module")
+def models():
+    return list(read_csv_models(DATA))[:25]
+
+
+class TestWriteRows(object):
+    def test_bulk_sends_one_mutation_per_row_in_batches(self, models):
+        table, calls = _recording_table()
+        num_rows, num_cells = put_rows_bulk(table, models, batch_size=10)
+        rows = {rowkey.encode("utf-8"): data for rowkey, data in map(gen_row_mutation, models)}
+        assert (num_rows, num_cells) == (len(rows), sum(len(data) for data in rows.values()))
+        assert [operation for operation, _ in calls] == ["send"] * 3
+        assert _sends(calls) == [10, 10, 5]
+        assert dict(table.scan()) == rows
+
+
+    def test_bulk_batches_are_bounded_by_bytes(self, models):
+        table, calls = _recording_table()
+        put_rows_bulk(table, models[:6], batch_bytes=1)
+        assert _sends(calls) == [1] * 6
+        table, calls = _recording_table()
+        put_rows_bulk(table, models[:6], batch_bytes=10 ** 6)
+        assert _sends(calls) == [6]
+
+
+    def test_bulk_and_put_modes_agree(self, monkeypatch, models):
+        tables = []
+
+        def _get_table(*args):
+            tables.append(_recording_table())
+            return tables[-1][0]
+
+        monkeypatch.setattr(writerows, "get_table", _get_table)
+        bulk = ingest_file("project", "instance", "odds", DATA, IngestOptions(bulk=True, batch_size=100))
+        put = ingest_file("project", "instance", "odds", DATA, IngestOptions())
+        assert bulk == put
+        (bulk_table, bulk_calls), (put_table, put_calls) = tables
+        assert {operation for operation, _ in bulk_calls} == {"send"}
+        assert max(_sends(bulk_calls)) <= 100
+        assert [operation for operation, _ in put_calls] == ["put"] * put[1]
+        assert dict(bulk_table.scan()) == dict(put_table.scan())
+        assert put_rows(MemoryTable(), models) == put_rows_bulk(MemoryTable(), models)